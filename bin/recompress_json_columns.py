@@ -0,0 +1,34 @@
+"""Recompresses bpmn_json and spiff_step_details.task_json with the given codec and reports the results.
+
+usage: recompress_json_columns.py [codec] [batch_size]
+
+codec is one of none, zlib, zstd or legacy (plain json text, needed before downgrading the migration).
+It defaults to SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC.
+"""
+import sys
+
+from spiffworkflow_backend import get_hacked_up_app_for_script
+from spiffworkflow_backend.services.json_column_compression_service import (
+    JsonColumnCompressionService,
+)
+
+
+def main() -> None:
+    """Main."""
+    app = get_hacked_up_app_for_script()
+    with app.app_context():
+        codec_name = app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"]
+        if len(sys.argv) > 1:
+            codec_name = sys.argv[1]
+        batch_size = 500
+        if len(sys.argv) > 2:
+            batch_size = int(sys.argv[2])
+
+        for stats in JsonColumnCompressionService.recompress_all(
+            codec_name, batch_size
+        ):
+            print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
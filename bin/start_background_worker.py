@@ -0,0 +1,25 @@
+"""Start a background worker that runs the background processor until it gets SIGTERM."""
+import os
+import time
+
+from spiffworkflow_backend import create_app
+from spiffworkflow_backend.helpers.db_helper import try_to_connect
+from spiffworkflow_backend.services.background_worker_service import (
+    BackgroundWorkerService,
+)
+
+
+def main() -> None:
+    """Main."""
+    # the worker runs the background processor itself so the app must not start the scheduler too
+    os.environ["SPIFFWORKFLOW_BACKEND_RUN_BACKGROUND_SCHEDULER"] = "false"
+    app = create_app()
+    start_time = time.time()
+    with app.app_context():
+        try_to_connect(start_time)
+
+    BackgroundWorkerService(app).run()
+
+
+if __name__ == "__main__":
+    main()
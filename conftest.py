@@ -1,15 +1,20 @@
 """Conftest."""
 import os
 import shutil
+from collections.abc import Iterator
 
 import pytest
 from flask.app import Flask
 from flask.testing import FlaskClient
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.stub_connector_proxy import (
+    StubConnectorProxy,
+)
 
 from spiffworkflow_backend.models.db import db
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.user import UserModel
+from spiffworkflow_backend.services.connector_proxy_client import ConnectorProxyClient
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
 )
@@ -17,6 +22,7 @@ from spiffworkflow_backend.services.process_instance_service import (
     ProcessInstanceService,
 )
 from spiffworkflow_backend.services.process_model_service import ProcessModelService
+from spiffworkflow_backend.services.service_task_service import ConnectorResponseCache
 
 # from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
 
@@ -58,6 +64,35 @@ def with_db_and_bpmn_file_cleanup() -> None:
             shutil.rmtree(process_model_service.root_path())
 
 
+@pytest.fixture()
+def stub_connector_proxy(app: Flask) -> Iterator[StubConnectorProxy]:
+    """Points the connector proxy client at a stub for the duration of a test."""
+    config_keys = [
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL",
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_READ_TIMEOUT_SECONDS",
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_RETRY_BACKOFF_SECONDS",
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS",
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_FAILURE_THRESHOLD",
+    ]
+    original_config = {key: app.config[key] for key in config_keys}
+    stub = StubConnectorProxy()
+    app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL"] = stub.url
+    app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_READ_TIMEOUT_SECONDS"] = 0.5
+    app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_RETRY_BACKOFF_SECONDS"] = 0.01
+    app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"] = [
+        "http/GetRequest"
+    ]
+    ConnectorProxyClient.reset()
+    ConnectorResponseCache.reset()
+    try:
+        yield stub
+    finally:
+        stub.stop()
+        app.config.update(original_config)
+        ConnectorProxyClient.reset()
+        ConnectorResponseCache.reset()
+
+
 @pytest.fixture()
 def with_super_admin_user() -> UserModel:
     """With_super_admin_user."""
@@ -0,0 +1,58 @@
+"""empty message
+
+Revision ID: b1c4e5a92d07
+Revises: 4a8b7e3f12c6
+Create Date: 2023-03-06 10:03:51.472208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1c4e5a92d07'
+down_revision = '4a8b7e3f12c6'
+branch_labels = None
+depends_on = None
+
+
+# existing json is kept as plain json text which the CompressedJSON type still reads.
+# run bin/recompress_json_columns.py afterwards to compress existing rows.
+# to downgrade, first run "bin/recompress_json_columns.py legacy" so every row is plain json text again.
+COLUMNS = [
+    ('process_instance', 'bpmn_json', True),
+    ('spiff_step_details', 'task_json', False),
+]
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    for table_name, column_name, nullable in COLUMNS:
+        if dialect_name == 'postgresql':
+            op.execute(
+                f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE bytea"
+                f" USING convert_to({column_name}::text, 'UTF8')"
+            )
+        elif dialect_name == 'mysql':
+            op.alter_column(table_name, column_name, existing_type=mysql.JSON(), type_=mysql.LONGBLOB(), existing_nullable=nullable)
+        else:
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.alter_column(column_name, existing_type=sa.JSON(), type_=sa.LargeBinary(), existing_nullable=nullable)
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    for table_name, column_name, nullable in COLUMNS:
+        if dialect_name == 'postgresql':
+            op.execute(
+                f"ALTER TABLE {table_name} ALTER COLUMN {column_name} TYPE json"
+                f" USING convert_from({column_name}, 'UTF8')::json"
+            )
+        elif dialect_name == 'mysql':
+            # mysql will not build json from a binary string so go through text first
+            op.alter_column(table_name, column_name, existing_type=mysql.LONGBLOB(), type_=mysql.LONGTEXT(), existing_nullable=nullable)
+            op.alter_column(table_name, column_name, existing_type=mysql.LONGTEXT(), type_=mysql.JSON(), existing_nullable=nullable)
+        else:
+            with op.batch_alter_table(table_name) as batch_op:
+                batch_op.alter_column(column_name, existing_type=sa.LargeBinary(), type_=sa.JSON(), existing_nullable=nullable)
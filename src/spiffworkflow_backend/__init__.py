@@ -66,16 +66,28 @@ def start_scheduler(
 ) -> None:
     """Start_scheduler."""
     scheduler = scheduler_class()
+    interval_seconds = app.config[
+        "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_INTERVAL_SECONDS"
+    ]
     scheduler.add_job(
         BackgroundProcessingService(app).process_message_instances_with_app_context,
         "interval",
-        seconds=10,
+        seconds=interval_seconds,
     )
     scheduler.add_job(
         BackgroundProcessingService(app).process_waiting_process_instances,
         "interval",
-        seconds=10,
+        seconds=interval_seconds,
     )
+    if app.config["SPIFFWORKFLOW_BACKEND_LOCK_HEARTBEAT_SECONDS"] > 0:
+        scheduler.add_job(
+            BackgroundProcessingService(app).renew_locks_with_app_context,
+            "interval",
+            seconds=app.config["SPIFFWORKFLOW_BACKEND_LOCK_HEARTBEAT_SECONDS"],
+        )
+    # a thread of its own so a message notification from this process wakes it up right away.
+    # started first since a BlockingScheduler never returns from start.
+    BackgroundProcessingService.start_processing_message_notifications(app)
     scheduler.start()
 
 
@@ -6,6 +6,8 @@ import uuid
 from flask.app import Flask
 from werkzeug.utils import ImportStringError
 
+from spiffworkflow_backend.helpers.json_codec import JsonCodec
+from spiffworkflow_backend.helpers.json_codec import JsonCodecError
 from spiffworkflow_backend.services.logging_service import setup_logger
 
 
@@ -72,6 +74,18 @@ def _set_up_tenant_specific_fields_as_list_of_strings(app: Flask) -> None:
             )
 
 
+def _set_up_connector_proxy_idempotent_commands_as_list_of_strings(
+    app: Flask,
+) -> None:
+    idempotent_commands = app.config.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"
+    )
+    if isinstance(idempotent_commands, str):
+        app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"] = [
+            command.strip() for command in idempotent_commands.split(",") if command
+        ]
+
+
 def setup_config(app: Flask) -> None:
     """Setup_config."""
     # ensure the instance folder exists
@@ -135,6 +149,35 @@ def setup_config(app: Flask) -> None:
             " FLASK_SESSION_SECRET_KEY"
         )
 
+    if app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKER_TYPE"] not in [
+        "thread",
+        "process",
+    ]:
+        raise ConfigurationError(
+            "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKER_TYPE must be either"
+            " thread or process"
+        )
+
+    if app.config["SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE"] not in [
+        "database",
+        "memory",
+        "none",
+    ]:
+        raise ConfigurationError(
+            "SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE must be one of database,"
+            " memory or none"
+        )
+    if app.config["SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS"] < 1:
+        raise ConfigurationError(
+            "SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS must be at least 1"
+        )
+    try:
+        JsonCodec.check_codec(app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"])
+    except JsonCodecError as exception:
+        raise ConfigurationError(
+            f"SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC is not usable: {exception}"
+        ) from exception
+
     app.secret_key = os.environ.get("FLASK_SESSION_SECRET_KEY")
 
     app.config["PROCESS_UUID"] = uuid.uuid4()
@@ -148,3 +191,4 @@ def setup_config(app: Flask) -> None:
     thread_local_data = threading.local()
     app.config["THREAD_LOCAL_DATA"] = thread_local_data
     _set_up_tenant_specific_fields_as_list_of_strings(app)
+    _set_up_connector_proxy_idempotent_commands_as_list_of_strings(app)
@@ -31,6 +31,64 @@ SPIFFWORKFLOW_BACKEND_URL = environ.get(
 SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL = environ.get(
     "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL", default="http://localhost:7004"
 )
+# connections to the connector proxy are pooled per process. a request that cannot connect is always retried,
+# other failures are only retried for the comma separated idempotent commands like "http/GetRequest".
+# a command is not called for a while after failing too many times in a row. a threshold of 0 disables that.
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_POOL_SIZE = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_POOL_SIZE", default="10")
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CONNECT_TIMEOUT_SECONDS = float(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CONNECT_TIMEOUT_SECONDS", default="5"
+    )
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_READ_TIMEOUT_SECONDS = float(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_READ_TIMEOUT_SECONDS", default="60"
+    )
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_MAX_RETRIES = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_MAX_RETRIES", default="2")
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_RETRY_BACKOFF_SECONDS = float(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_RETRY_BACKOFF_SECONDS", default="0.5"
+    )
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS = environ.get(
+    "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS", default=""
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_FAILURE_THRESHOLD",
+        default="5",
+    )
+)
+SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_RESET_SECONDS = float(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_RESET_SECONDS",
+        default="30",
+    )
+)
+
+# number of threads per web or background process that send the connector requests of service tasks that are
+# ready at the same time, like those on the branches of a parallel gateway, concurrently. 0 sends them one by one.
+# only the requests of SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS are sent concurrently.
+SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS", default="0")
+)
+
+# successful connector responses are kept in memory in each web or background process for service tasks that
+# set the connectorResponseCacheSeconds property. this bounds the total size of those responses.
+SPIFFWORKFLOW_BACKEND_CONNECTOR_RESPONSE_CACHE_MAX_BYTES = int(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONNECTOR_RESPONSE_CACHE_MAX_BYTES", default="10000000"
+    )
+)
+# how long the lists of connector commands and authentications the editor asks for are cached. 0 disables it.
+SPIFFWORKFLOW_BACKEND_CONNECTOR_LIST_CACHE_SECONDS = float(
+    environ.get("SPIFFWORKFLOW_BACKEND_CONNECTOR_LIST_CACHE_SECONDS", default="60")
+)
 
 # Open ID server
 # use "http://localhost:7000/openid" for running with simple openid
@@ -131,6 +189,53 @@ SPIFFWORKFLOW_BACKEND_ALLOW_CONFISCATING_LOCK_AFTER_SECONDS = int(
         "SPIFFWORKFLOW_BACKEND_ALLOW_CONFISCATING_LOCK_AFTER_SECONDS", default="600"
     )
 )
+# the most due waiting process instances the background processor locks, and then loads, per run.
+SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_BATCH_SIZE = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_BATCH_SIZE", default="100")
+)
+# number of "thread" or "process" workers the background processor runs waiting process instances on. with 0 they
+# run one at a time on the scheduler thread. at most MAX_IN_FLIGHT process instances, which defaults to the number
+# of workers, are locked for the workers of one background processor at a time.
+SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS", default="0")
+)
+SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKER_TYPE = environ.get(
+    "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKER_TYPE", default="thread"
+)
+SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_MAX_IN_FLIGHT = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_MAX_IN_FLIGHT", default="0")
+)
+# seconds between runs of the background processor, both in the scheduler and in bin/start_background_worker.py.
+SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_INTERVAL_SECONDS = int(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_INTERVAL_SECONDS", default="10"
+    )
+)
+# where newly committed message instances are announced so a background processor correlates them right away
+# instead of on its next run. database reaches the background processors of every node, memory only the ones
+# in the same process and none leaves correlating them to the runs of the background processor. only set it
+# to database if a background processor runs somewhere, since nothing else takes the notifications off it.
+SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE = environ.get(
+    "SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE", default="none"
+)
+# seconds a background processor waits for a message notification from its own process before it checks the
+# queue for the ones from other processes.
+SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS", default="1")
+)
+# seconds between renewals of the locks held by a process running the background processor. keep it well below
+# ALLOW_CONFISCATING_LOCK_AFTER_SECONDS, which can then be lowered so the locks of a worker that died expire
+# sooner. 0 turns the heartbeat off.
+SPIFFWORKFLOW_BACKEND_LOCK_HEARTBEAT_SECONDS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_LOCK_HEARTBEAT_SECONDS", default="60")
+)
+# seconds between queue depth and lag log lines of bin/start_background_worker.py. 0 turns them off.
+SPIFFWORKFLOW_BACKEND_BACKGROUND_WORKER_METRICS_INTERVAL_SECONDS = int(
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_BACKGROUND_WORKER_METRICS_INTERVAL_SECONDS",
+        default="60",
+    )
+)
 
 SPIFFWORKFLOW_BACKEND_DEFAULT_USER_GROUP = environ.get(
     "SPIFFWORKFLOW_BACKEND_DEFAULT_USER_GROUP", default="everybody"
@@ -140,3 +245,84 @@ SPIFFWORKFLOW_BACKEND_DEFAULT_USER_GROUP = environ.get(
 SPIFFWORKFLOW_BACKEND_DATABASE_PASSWORD = environ.get(
     "SPIFFWORKFLOW_BACKEND_DATABASE_PASSWORD", default=None
 )
+
+# number of parsed process model specs (BpmnProcessSpec plus subprocess specs) to keep per worker.
+# entries are keyed by the content of the bpmn/dmn files so edits are picked up automatically. 0 disables it.
+SPIFFWORKFLOW_BACKEND_SPEC_CACHE_MAX_SIZE = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_SPEC_CACHE_MAX_SIZE", default="100")
+)
+
+# opt in cache of deserialized workflows for read only endpoints like task_show and process_data_show.
+# this is the approximate number of bytes of bpmn_json to keep per worker. 0 disables it.
+SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES", default="0")
+)
+
+# store spec and subprocess_specs once in serialized_bpmn_spec keyed by their hash instead of in every
+# process_instance.bpmn_json. instances saved before this was turned on are still read as is.
+SPIFFWORKFLOW_BACKEND_NORMALIZE_SERIALIZED_SPECS = (
+    environ.get("SPIFFWORKFLOW_BACKEND_NORMALIZE_SERIALIZED_SPECS", default="false")
+    == "true"
+)
+
+# store each spiff task in its own serialized_task row instead of in process_instance.bpmn_json
+# so saving a large process instance only writes the tasks that changed.
+SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY = (
+    environ.get("SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY", default="false")
+    == "true"
+)
+
+# how process_instance.bpmn_json and spiff_step_details.task_json are compressed when written: none, zlib or zstd.
+# zstd needs the zstandard package, which the zstd extra installs. rows are always read with the codec they
+# were written with.
+SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC = environ.get(
+    "SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC", default="zlib"
+)
+
+# store the task_json of every nth spiff step in full and json patches against the previous step in between.
+# 0 or 1 stores every step in full.
+SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL", default="0")
+)
+
+# limits how long running a process instance or submitting a task keeps running engine tasks in the web request.
+# when either is hit the instance is saved as waiting and the background processor runs the rest. 0 means no limit.
+SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS", default="0")
+)
+SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_SECONDS = float(
+    environ.get("SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_SECONDS", default="0")
+)
+
+# when true, submitting a human task only completes that task and returns. the engine tasks after it are run
+# on a background thread of the web process, or by the background processor if that thread never gets to it.
+SPIFFWORKFLOW_BACKEND_CONTINUE_AFTER_TASK_SUBMIT_IN_BACKGROUND = (
+    environ.get(
+        "SPIFFWORKFLOW_BACKEND_CONTINUE_AFTER_TASK_SUBMIT_IN_BACKGROUND",
+        default="false",
+    )
+    == "true"
+)
+SPIFFWORKFLOW_BACKEND_TASK_SUBMIT_CONTINUATION_THREADS = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_TASK_SUBMIT_CONTINUATION_THREADS", default="2")
+)
+
+# number of compiled script task scripts, gateway conditions and other expressions to keep per worker.
+# entries are keyed by the source text so they never go stale. 0 disables it.
+SPIFFWORKFLOW_BACKEND_COMPILED_CODE_CACHE_MAX_SIZE = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_COMPILED_CODE_CACHE_MAX_SIZE", default="1000")
+)
+
+# number of worker processes per web or background process to run script tasks in instead of the thread running
+# the engine. scripts that call scripts from the scripts directory still run in the engine thread. 0 disables it.
+SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES", default="0")
+)
+# limits for scripts run in those processes. 0 means no limit. the memory limit is on the address space of each
+# script task process.
+SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS = float(
+    environ.get("SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS", default="0")
+)
+SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_MAX_MEMORY_MB = int(
+    environ.get("SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_MAX_MEMORY_MB", default="0")
+)
@@ -16,6 +16,7 @@ SPIFFWORKFLOW_BACKEND_LOG_LEVEL = environ.get(
     "SPIFFWORKFLOW_BACKEND_LOG_LEVEL", default="debug"
 )
 SPIFFWORKFLOW_BACKEND_GIT_COMMIT_ON_SAVE = False
+SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE = "memory"
 
 # NOTE: set this here since nox shoves tests and src code to
 # different places and this allows us to know exactly where we are at the start
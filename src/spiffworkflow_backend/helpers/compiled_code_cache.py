@@ -0,0 +1,67 @@
+"""Compiled_code_cache."""
+from dataclasses import dataclass
+from types import CodeType
+from typing import Optional
+
+from flask import current_app
+
+from spiffworkflow_backend.helpers.lru_cache import LruCache
+
+
+@dataclass(frozen=True)
+class CompiledCode:
+    """CompiledCode.
+
+    names holds every global name the code or any function, class or comprehension in it can refer to.
+    """
+
+    code: CodeType
+    names: frozenset[str]
+
+
+def referenced_names(code: CodeType) -> set[str]:
+    """Referenced_names."""
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            names |= referenced_names(constant)
+    return names
+
+
+class CompiledCodeCache:
+    """Compiles python source for eval and exec and keeps the code objects in an LruCache.
+
+    Code objects are keyed by mode and source text so the same expression is only compiled
+    once per worker. They are compiled with the same "<string>" file name eval and exec use
+    so line numbers in tracebacks still point at the script.
+    """
+
+    _cache: Optional[LruCache] = None
+
+    @classmethod
+    def cache(cls) -> LruCache:
+        """Cache."""
+        if cls._cache is None:
+            cls._cache = LruCache(
+                current_app.config["SPIFFWORKFLOW_BACKEND_COMPILED_CODE_CACHE_MAX_SIZE"]
+            )
+        return cls._cache
+
+    @classmethod
+    def compile(cls, source: str, mode: str) -> CompiledCode:
+        """Mode is either eval or exec. Syntax errors are raised every time and never cached."""
+        cache = cls.cache()
+        cache_key = (mode, source)
+        compiled_code = cache.get(cache_key)
+        if compiled_code is None:
+            code = compile(source, "<string>", mode)
+            compiled_code = CompiledCode(
+                code=code, names=frozenset(referenced_names(code))
+            )
+            cache.put(cache_key, compiled_code)
+        return compiled_code
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Stats."""
+        return cls.cache().stats()
@@ -0,0 +1,118 @@
+"""Json_codec."""
+import json
+import zlib
+from dataclasses import dataclass
+from typing import Any
+from typing import Callable
+
+
+class JsonCodecError(Exception):
+    """JsonCodecError."""
+
+
+@dataclass
+class Codec:
+    """Codec."""
+
+    name: str
+    header: int
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    """_zstd_compress."""
+    return _zstandard().ZstdCompressor().compress(data)  # type: ignore
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    """_zstd_decompress."""
+    return _zstandard().ZstdDecompressor().decompress(data)  # type: ignore
+
+
+def _zstandard() -> Any:
+    """Zstandard is optional so it is only imported when a zstd codec is actually used."""
+    try:
+        import zstandard  # type: ignore
+    except ImportError as exception:
+        raise JsonCodecError(
+            "The zstd json codec requires the zstandard package to be installed"
+        ) from exception
+    return zstandard
+
+
+class JsonCodec:
+    """Encodes json values as bytes with a one byte header naming the codec that compressed them.
+
+    Values stored before there was a codec are plain json text without a header. Json text never
+    starts with one of the header bytes so those are still decoded as plain json.
+    """
+
+    # plain json text without a header, which is how rows were stored before there was a codec
+    LEGACY_CODEC_NAME = "legacy"
+
+    _codecs_by_name: dict[str, Codec] = {}
+    _codecs_by_header: dict[int, Codec] = {}
+
+    @classmethod
+    def register_codec(cls, codec: Codec) -> None:
+        """Register_codec."""
+        if codec.header >= 0x20:
+            raise JsonCodecError(
+                f"Codec header for {codec.name} must be below 0x20 so it cannot be"
+                f" confused with json text: {codec.header}"
+            )
+        cls._codecs_by_name[codec.name] = codec
+        cls._codecs_by_header[codec.header] = codec
+
+    @classmethod
+    def codec_for_name(cls, codec_name: str) -> Codec:
+        """Codec_for_name."""
+        if codec_name not in cls._codecs_by_name:
+            raise JsonCodecError(
+                f"Unknown json codec: {codec_name}. Expected one of:"
+                f" {', '.join(cls._codecs_by_name)}"
+            )
+        return cls._codecs_by_name[codec_name]
+
+    @classmethod
+    def check_codec(cls, codec_name: str) -> None:
+        """Raises a JsonCodecError unless values can be encoded with the codec, for example if zstandard is missing."""
+        cls.encode({}, codec_name)
+
+    @classmethod
+    def codec_name_of(cls, data: bytes) -> str:
+        """Codec_name_of."""
+        if data and data[0] in cls._codecs_by_header:
+            return cls._codecs_by_header[data[0]].name
+        return cls.LEGACY_CODEC_NAME
+
+    @classmethod
+    def encode(cls, value: Any, codec_name: str) -> bytes:
+        """Encode."""
+        json_bytes = json.dumps(value).encode("utf-8")
+        if codec_name == cls.LEGACY_CODEC_NAME:
+            return json_bytes
+        codec = cls.codec_for_name(codec_name)
+        return bytes([codec.header]) + codec.compress(json_bytes)
+
+    @classmethod
+    def decode(cls, data: bytes) -> Any:
+        """Decode."""
+        if data and data[0] in cls._codecs_by_header:
+            codec = cls._codecs_by_header[data[0]]
+            return json.loads(codec.decompress(data[1:]))
+        return json.loads(data)
+
+
+JsonCodec.register_codec(
+    Codec(name="none", header=0x00, compress=bytes, decompress=bytes)
+)
+JsonCodec.register_codec(
+    Codec(name="zlib", header=0x01, compress=zlib.compress, decompress=zlib.decompress)
+)
+JsonCodec.register_codec(
+    Codec(
+        name="zstd", header=0x02, compress=_zstd_compress, decompress=_zstd_decompress
+    )
+)
@@ -0,0 +1,67 @@
+"""Json_patch.
+
+A small subset of RFC 6902 json patch. make_patch only produces add, remove and replace operations
+and replaces lists as a whole, which is all apply_patch needs to support.
+"""
+import copy
+import json
+from typing import Any
+
+
+def _escape(key: str) -> str:
+    """_escape."""
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(key: str) -> str:
+    """_unescape."""
+    return key.replace("~1", "/").replace("~0", "~")
+
+
+def _canonical_json(value: Any) -> str:
+    """_canonical_json."""
+    return json.dumps(value, sort_keys=True)
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> list[dict[str, Any]]:
+    """Returns the operations that turn old into new. Both must be json compatible."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        operations: list[dict[str, Any]] = []
+        for key in old:
+            if key not in new:
+                operations.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            key_path = f"{path}/{_escape(key)}"
+            if key not in old:
+                operations.append({"op": "add", "path": key_path, "value": value})
+            else:
+                operations.extend(make_patch(old[key], value, key_path))
+        return operations
+
+    # compare the json itself so things like 1 and True or 1 and 1.0 are not considered equal
+    if type(old) is not type(new) or _canonical_json(old) != _canonical_json(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def apply_patch(document: Any, operations: list[dict[str, Any]]) -> Any:
+    """Applies the operations to document in place and returns it.
+
+    The document is returned because replacing the root replaces the document itself.
+    Values are copied out of the operations so they can be applied more than once.
+    """
+    for operation in operations:
+        value = copy.deepcopy(operation.get("value"))
+        if operation["path"] == "":
+            document = value
+            continue
+
+        keys = [_unescape(key) for key in operation["path"].split("/")[1:]]
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[key]
+        if operation["op"] == "remove":
+            del parent[keys[-1]]
+        else:
+            parent[keys[-1]] = value
+    return document
@@ -0,0 +1,100 @@
+"""Lru_cache."""
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+
+
+class LruCache:
+    """A small thread-safe least-recently-used cache that keeps hit and miss counters.
+
+    These caches are per worker process. Each entry has a weight (1 unless given) and
+    max_size bounds the total weight, so a cache can be bounded by entry count or by
+    something like bytes. A max_size of 0 disables caching entirely so callers do not
+    need to special case a disabled cache.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """__init__."""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.total_weight = 0
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._weights: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: Hashable, is_valid: Optional[Callable[[Any], bool]] = None
+    ) -> Optional[Any]:
+        """Returns the cached value or None, and counts the lookup as a hit or a miss.
+
+        If is_valid is given and returns False for the cached value then the entry is
+        evicted and the lookup counts as a miss.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None and is_valid is not None and not is_valid(value):
+                self._remove(key)
+                value = None
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, weight: int = 1) -> None:
+        """Put."""
+        if self.max_size <= 0 or weight > self.max_size:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = value
+            self._weights[key] = weight
+            self.total_weight += weight
+            while self.total_weight > self.max_size:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Pop."""
+        with self._lock:
+            return self._remove(key)
+
+    def keys(self) -> list[Hashable]:
+        """Returns a snapshot of the keys from least to most recently used."""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self) -> None:
+        """Clear."""
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.total_weight = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _remove(self, key: Hashable) -> Optional[Any]:
+        """Must be called with the lock held."""
+        self.total_weight -= self._weights.pop(key, 0)
+        return self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        """__len__."""
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Stats."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "total_weight": self.total_weight,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -24,6 +24,15 @@ from spiffworkflow_backend.models.spec_reference import (
 from spiffworkflow_backend.models.message_instance import (
     MessageInstanceModel,
 )  # noqa: F401
+from spiffworkflow_backend.models.message_instance_correlation import (
+    MessageInstanceCorrelationRuleModel,
+)  # noqa: F401
+from spiffworkflow_backend.models.message_instance_correlation import (
+    MessageInstanceCorrelationValueModel,
+)  # noqa: F401
+from spiffworkflow_backend.models.message_notification import (
+    MessageNotificationModel,
+)  # noqa: F401
 from spiffworkflow_backend.models.message_triggerable_process_model import (
     MessageTriggerableProcessModel,
 )  # noqa: F401
@@ -41,6 +50,12 @@ from spiffworkflow_backend.models.process_instance_report import (
 )  # noqa: F401
 from spiffworkflow_backend.models.refresh_token import RefreshTokenModel  # noqa: F401
 from spiffworkflow_backend.models.secret_model import SecretModel  # noqa: F401
+from spiffworkflow_backend.models.serialized_bpmn_spec import (
+    SerializedBpmnSpecModel,
+)  # noqa: F401
+from spiffworkflow_backend.models.serialized_task import (
+    SerializedTaskModel,
+)  # noqa: F401
 from spiffworkflow_backend.models.spiff_logging import SpiffLoggingModel  # noqa: F401
 from spiffworkflow_backend.models.spiff_step_details import (
     SpiffStepDetailsModel,
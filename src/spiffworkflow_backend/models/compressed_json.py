@@ -0,0 +1,50 @@
+"""Compressed_json."""
+from typing import Any
+from typing import Optional
+
+from flask import current_app
+from flask import has_app_context
+from sqlalchemy.dialects.mysql import LONGBLOB
+from sqlalchemy.engine.interfaces import Dialect
+from sqlalchemy.types import LargeBinary
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.types import TypeEngine
+
+from spiffworkflow_backend.helpers.json_codec import JsonCodec
+
+
+class CompressedJSON(TypeDecorator):
+    """A drop in replacement for db.JSON that stores the json compressed in a binary column.
+
+    Values are written with the codec named by SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC and read
+    with whatever codec they were written with, so changing it only affects new writes.
+    Use it with deferred columns so rows are only decompressed when the attribute is accessed.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect: Dialect) -> TypeEngine:
+        """Load_dialect_impl."""
+        if dialect.name == "mysql":
+            return dialect.type_descriptor(LONGBLOB())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Optional[bytes]:
+        """Process_bind_param."""
+        if value is None:
+            return None
+        return JsonCodec.encode(value, self.codec_name())
+
+    def process_result_value(self, value: Any, dialect: Dialect) -> Any:
+        """Process_result_value."""
+        if value is None:
+            return None
+        return JsonCodec.decode(bytes(value))
+
+    @staticmethod
+    def codec_name() -> str:
+        """Codec_name."""
+        if has_app_context():
+            return str(current_app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"])
+        return "zlib"
@@ -2,12 +2,20 @@
 from __future__ import annotations
 
 import enum
+import sqlite3
 import time
 from typing import Any
 
 from flask_migrate import Migrate  # type: ignore
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import and_
+from sqlalchemy import bindparam
 from sqlalchemy import event
+from sqlalchemy import select
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.engine.base import Connection
 from sqlalchemy.orm.mapper import Mapper
 
@@ -56,6 +64,102 @@ class SpiffworkflowBaseDBModel(db.Model):  # type: ignore
         return m_type.value
 
 
+def supports_skip_locked() -> bool:
+    """True if the database can skip the rows other transactions locked with select for update."""
+    dialect = db.session.get_bind().dialect
+    if dialect.name == "postgresql":
+        return True
+    if dialect.name == "mysql":
+        server_version = dialect.server_version_info or ()
+        if getattr(dialect, "is_mariadb", False):
+            return server_version >= (10, 6)
+        return server_version >= (8, 0, 1)
+    return False
+
+
+def upsert(
+    model: type[SpiffworkflowBaseDBModel],
+    rows: list[dict[str, Any]],
+    index_elements: list[str],
+    update_columns: list[str],
+) -> None:
+    """Inserts the rows and updates update_columns of the ones that already exist.
+
+    index_elements must be the columns of a unique constraint. This is a single statement on mysql,
+    postgres and sqlite 3.24+ and one select plus an insert and an update otherwise. Like any core
+    statement it skips the orm listeners, so rows need to include their own timestamps.
+    Instances of the model that are already loaded are expired.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    dialect_name = db.session.get_bind().dialect.name
+
+    # loaded instances would otherwise keep the values from before the statement.
+    # flush first so expiring them does not throw away pending changes.
+    db.session.flush()
+    for instance in list(db.session.identity_map.values()):
+        if isinstance(instance, model):
+            db.session.expire(instance)
+
+    if dialect_name == "mysql":
+        mysql_statement = mysql.insert(table).values(rows)
+        db.session.execute(
+            mysql_statement.on_duplicate_key_update(
+                {column: mysql_statement.inserted[column] for column in update_columns}
+            )
+        )
+        return
+
+    if dialect_name == "postgresql" or (
+        dialect_name == "sqlite" and sqlite3.sqlite_version_info >= (3, 24, 0)
+    ):
+        insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+        statement = insert(table).values(rows)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={column: statement.excluded[column] for column in update_columns},
+            )
+        )
+        return
+
+    index_columns = [table.c[column] for column in index_elements]
+    existing_keys = set(
+        tuple(row)
+        for row in db.session.execute(
+            select(*index_columns).where(
+                tuple_(*index_columns).in_(
+                    [tuple(row[column] for column in index_elements) for row in rows]
+                )
+            )
+        )
+    )
+    rows_to_update = []
+    rows_to_insert = []
+    for row in rows:
+        if tuple(row[column] for column in index_elements) in existing_keys:
+            rows_to_update.append({f"_{key}": value for key, value in row.items()})
+        else:
+            rows_to_insert.append(row)
+    if rows_to_insert:
+        db.session.execute(table.insert(), rows_to_insert)
+    if rows_to_update:
+        db.session.execute(
+            table.update()
+            .where(
+                and_(
+                    *[
+                        table.c[column] == bindparam(f"_{column}")
+                        for column in index_elements
+                    ]
+                )
+            )
+            .values({column: bindparam(f"_{column}") for column in update_columns}),
+            rows_to_update,
+        )
+
+
 def update_created_modified_on_create_listener(
     mapper: Mapper, _connection: Connection, target: SpiffworkflowBaseDBModel
 ) -> None:
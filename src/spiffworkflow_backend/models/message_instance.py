@@ -1,11 +1,12 @@
 """Message_instance."""
 import enum
+import hashlib
+import json
 from dataclasses import dataclass
 from typing import Any
 from typing import Optional
 from typing import TYPE_CHECKING
 
-from SpiffWorkflow.bpmn.PythonScriptEngine import PythonScriptEngine  # type: ignore
 from sqlalchemy import ForeignKey
 from sqlalchemy.event import listens_for
 from sqlalchemy.orm import relationship
@@ -21,6 +22,9 @@ if TYPE_CHECKING:
     from spiffworkflow_backend.models.message_instance_correlation import (  # noqa: F401
         MessageInstanceCorrelationRuleModel,
     )
+    from spiffworkflow_backend.models.message_instance_correlation import (  # noqa: F401
+        MessageInstanceCorrelationValueModel,
+    )
 
 
 class MessageTypes(enum.Enum):
@@ -53,6 +57,8 @@ class MessageInstanceModel(SpiffworkflowBaseDBModel):
     payload: dict = db.Column(db.JSON)
     # The correlation keys of the process at the time the message was created.
     correlation_keys: dict = db.Column(db.JSON)
+    # sha256 of the correlation keys so messages with the same ones can be found without comparing json
+    correlation_keys_hash: Optional[str] = db.Column(db.String(64), index=True)
     status: str = db.Column(db.String(20), nullable=False, default="ready")
     user_id: int = db.Column(ForeignKey(UserModel.id), nullable=False)  # type: ignore
     user = relationship("UserModel")
@@ -65,6 +71,11 @@ class MessageInstanceModel(SpiffworkflowBaseDBModel):
     correlation_rules = relationship(
         "MessageInstanceCorrelationRuleModel", back_populates="message_instance"
     )
+    correlation_values = relationship(
+        "MessageInstanceCorrelationValueModel",
+        back_populates="message_instance",
+        cascade="all, delete-orphan",
+    )
 
     @validates("message_type")
     def validate_message_type(self, key: str, value: Any) -> Any:
@@ -76,41 +87,20 @@ class MessageInstanceModel(SpiffworkflowBaseDBModel):
         """Validate_status."""
         return self.validate_enum_field(key, value, MessageStatuses)
 
-    def correlates(self, other: Any, expression_engine: PythonScriptEngine) -> bool:
-        """Returns true if the this Message correlates with the given message.
-
-        This must be a 'receive' message, and the other must be a 'send' or vice/versa.
-        If both messages have identical correlation_keys, they are a match.  Otherwise
-        we check through this messages correlation properties and use the retrieval expressions
-        to extract the correlation keys from the send's payload, and verify that these
-        match up with correlation keys on this message.
-        """
-        if self.is_send() and other.is_receive():
-            # Flip the call.
-            return other.correlates(self, expression_engine)  # type: ignore
-
-        if self.name != other.name:
-            return False
-        if not self.is_receive():
-            return False
-        if (
-            isinstance(self.correlation_keys, dict)
-            and self.correlation_keys == other.correlation_keys
-        ):
-            # We know we have a match, and we can just return if we don't have to figure out the key
-            return True
-
-        if self.correlation_keys == {}:
-            # Then there is nothing more to match on -- we accept any message with the given name.
-            return True
-
-        # Loop over the receives' correlation keys - if any of the keys fully match, then we match.
-        for expected_values in self.correlation_keys.values():
-            if self.payload_matches_expected_values(
-                other.payload, expected_values, expression_engine
-            ):
-                return True
-        return False
+    @validates("correlation_keys")
+    def validate_correlation_keys(self, key: str, value: Any) -> Any:
+        """Keeps correlation_keys_hash in line with the correlation keys."""
+        self.correlation_keys_hash = self.hash_correlation_keys(value)
+        return value
+
+    @staticmethod
+    def hash_correlation_keys(correlation_keys: Any) -> Optional[str]:
+        """Hash_correlation_keys."""
+        if not isinstance(correlation_keys, dict) or correlation_keys == {}:
+            return None
+        return hashlib.sha256(
+            json.dumps(correlation_keys, sort_keys=True, default=str).encode("utf8")
+        ).hexdigest()
 
     def is_receive(self) -> bool:
         return self.message_type == MessageTypes.receive.value
@@ -118,32 +108,6 @@ class MessageInstanceModel(SpiffworkflowBaseDBModel):
     def is_send(self) -> bool:
         return self.message_type == MessageTypes.send.value
 
-    def payload_matches_expected_values(
-        self,
-        payload: dict,
-        expected_values: dict,
-        expression_engine: PythonScriptEngine,
-    ) -> bool:
-        """Compares the payload of a 'send' message against a single correlation key's expected values."""
-        for correlation_key in self.correlation_rules:
-            expected_value = expected_values.get(correlation_key.name, None)
-            if (
-                expected_value is None
-            ):  # This key is not required for this instance to match.
-                continue
-            try:
-                result = expression_engine._evaluate(
-                    correlation_key.retrieval_expression, payload
-                )
-            except Exception:
-                # the failure of a payload evaluation may not mean that matches for these
-                # message instances can't happen with other messages.  So don't error up.
-                # fixme:  Perhaps log some sort of error.
-                return False
-            if result != expected_value:
-                return False
-        return True
-
 
 # This runs for ALL db flushes for ANY model, not just this one even if it's in the MessageInstanceModel class
 # so this may not be worth it or there may be a better way to do it
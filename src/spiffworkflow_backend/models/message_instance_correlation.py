@@ -1,6 +1,13 @@
 """Message_correlation."""
+from __future__ import annotations
+
+import hashlib
+import json
 from dataclasses import dataclass
+from typing import Any
+from typing import Iterable
 
+from SpiffWorkflow.bpmn.PythonScriptEngine import PythonScriptEngine  # type: ignore
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import relationship
 
@@ -39,3 +46,97 @@ class MessageInstanceCorrelationRuleModel(SpiffworkflowBaseDBModel):
     message_instance = relationship(
         "MessageInstanceModel", back_populates="correlation_rules"
     )
+
+
+@dataclass
+class MessageInstanceCorrelationValueModel(SpiffworkflowBaseDBModel):
+    """The correlation values of a message instance so send and receive messages can be matched with a join.
+
+    For a send message each row is what a retrieval expression gives for its payload, with a null
+    value_hash if the expression could not be evaluated. For a receive message each row is a value the
+    payload of a send message has to give for one of its correlation keys. A receive message matches a
+    send message if all of the rows of one of its correlation keys do. A row without a name is a
+    correlation key that accepts any payload.
+    """
+
+    __tablename__ = "message_instance_correlation_value"
+
+    id = db.Column(db.Integer, primary_key=True)
+    message_instance_id = db.Column(
+        ForeignKey(MessageInstanceModel.id), nullable=False, index=True  # type: ignore
+    )
+    correlation_key_name: str | None = db.Column(db.String(50))
+    name: str | None = db.Column(db.String(50))
+    retrieval_expression: str | None = db.Column(db.String(255))
+    value_hash: str | None = db.Column(db.String(64), index=True)
+    message_instance = relationship(
+        "MessageInstanceModel", back_populates="correlation_values"
+    )
+
+    @staticmethod
+    def hash_value(value: Any) -> str:
+        """Hash_value."""
+        # the expressions are compared with == which does not tell 1 and 1.0 apart
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return hashlib.sha256(
+            json.dumps(value, sort_keys=True, default=str).encode("utf8")
+        ).hexdigest()
+
+    @classmethod
+    def for_send(
+        cls,
+        payload: Any,
+        retrieval_expressions: Iterable[tuple[str, str]],
+        expression_engine: PythonScriptEngine,
+    ) -> list[MessageInstanceCorrelationValueModel]:
+        """Evaluates the given correlation property names and retrieval expressions against a send payload."""
+        correlation_values = []
+        for name, retrieval_expression in retrieval_expressions:
+            value_hash = None
+            try:
+                value_hash = cls.hash_value(
+                    expression_engine._evaluate(retrieval_expression, payload)
+                )
+            except Exception:
+                # the payload not having what this expression looks for only means it cannot be
+                # matched on it. keep the row so it is not evaluated again.
+                pass
+            correlation_values.append(
+                cls(
+                    name=name,
+                    retrieval_expression=retrieval_expression,
+                    value_hash=value_hash,
+                )
+            )
+        return correlation_values
+
+    @classmethod
+    def for_receive(
+        cls, message_instance: MessageInstanceModel
+    ) -> list[MessageInstanceCorrelationValueModel]:
+        """The values a send payload has to give to match the correlation keys of a receive message."""
+        correlation_keys = message_instance.correlation_keys
+        if not isinstance(correlation_keys, dict) or correlation_keys == {}:
+            return [cls()]
+
+        correlation_values = []
+        for correlation_key_name, expected_values in correlation_keys.items():
+            key_values = []
+            for correlation_rule in message_instance.correlation_rules:
+                expected_value = expected_values.get(correlation_rule.name)
+                # this key is not required for this instance to match
+                if expected_value is None:
+                    continue
+                key_values.append(
+                    cls(
+                        correlation_key_name=correlation_key_name,
+                        name=correlation_rule.name,
+                        retrieval_expression=correlation_rule.retrieval_expression,
+                        value_hash=cls.hash_value(expected_value),
+                    )
+                )
+            correlation_values.extend(
+                key_values or [cls(correlation_key_name=correlation_key_name)]
+            )
+        return correlation_values
@@ -0,0 +1,20 @@
+"""Message_notification."""
+from dataclasses import dataclass
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import SpiffworkflowBaseDBModel
+
+
+@dataclass
+class MessageNotificationModel(SpiffworkflowBaseDBModel):
+    """A message instance that was just committed and that a background processor on any node should correlate.
+
+    Rows are deleted by the background processor that takes them. There is no foreign key so deleting a
+    message instance does not have to wait for its notification to be taken.
+    """
+
+    __tablename__ = "message_notification"
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    message_instance_id: int = db.Column(db.Integer, nullable=False)
+    created_at_in_seconds: int = db.Column(db.Integer, index=True)
@@ -15,6 +15,7 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.orm import validates
 
 from spiffworkflow_backend.helpers.spiff_enum import SpiffEnum
+from spiffworkflow_backend.models.compressed_json import CompressedJSON
 from spiffworkflow_backend.models.db import db
 from spiffworkflow_backend.models.db import SpiffworkflowBaseDBModel
 from spiffworkflow_backend.models.task import Task
@@ -79,7 +80,10 @@ class ProcessInstanceModel(SpiffworkflowBaseDBModel):
         cascade="delete",
     )  # type: ignore
 
-    bpmn_json: str | None = deferred(db.Column(db.JSON))  # type: ignore
+    bpmn_json: str | None = deferred(db.Column(CompressedJSON))  # type: ignore
+
+    # when set, bpmn_json does not include spec and subprocess_specs. they live in serialized_bpmn_spec instead.
+    serialized_bpmn_spec_hash: str | None = db.Column(db.String(255), index=True)
     start_in_seconds: int | None = db.Column(db.Integer)
     end_in_seconds: int | None = db.Column(db.Integer)
     updated_at_in_seconds: int = db.Column(db.Integer)
@@ -90,7 +94,17 @@ class ProcessInstanceModel(SpiffworkflowBaseDBModel):
     bpmn_version_control_identifier: str = db.Column(db.String(255))
     spiff_step: int = db.Column(db.Integer)
 
-    locked_by: str | None = db.Column(db.String(80))
+    # sha256 of the metadata extracted on the last save so unchanged metadata is not written again
+    metadata_extraction_hash: str | None = db.Column(db.String(64))
+
+    # json size in bytes of the data of all finished tasks as of the last save
+    task_data_size: int | None = db.Column(db.Integer)
+
+    # earliest time a waiting process instance can make progress without a message or signal.
+    # null if nothing but one of those can move it along.
+    next_run_at_in_seconds: int | None = db.Column(db.Integer, index=True)
+
+    locked_by: str | None = db.Column(db.String(80), index=True)
     locked_at_in_seconds: int | None = db.Column(db.Integer)
 
     bpmn_xml_file_contents: str | None = None
@@ -0,0 +1,22 @@
+"""Serialized_bpmn_spec."""
+from dataclasses import dataclass
+
+from sqlalchemy.orm import deferred
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import SpiffworkflowBaseDBModel
+
+
+@dataclass
+class SerializedBpmnSpecModel(SpiffworkflowBaseDBModel):
+    """Serialized spec and subprocess_specs shared by every process instance that uses them.
+
+    Rows are content addressed by the sha256 of spec_json so they are never updated.
+    """
+
+    __tablename__ = "serialized_bpmn_spec"
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    hash: str = db.Column(db.String(255), nullable=False, index=True, unique=True)
+    spec_json: str = deferred(db.Column(db.JSON, nullable=False))  # type: ignore
+    created_at_in_seconds: int = db.Column(db.Integer)
@@ -0,0 +1,42 @@
+"""Serialized_task."""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import ForeignKey
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.orm import deferred
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import SpiffworkflowBaseDBModel
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+
+
+@dataclass
+class SerializedTaskModel(SpiffworkflowBaseDBModel):
+    """One serialized spiff task of a process instance.
+
+    Used instead of the tasks in process_instance.bpmn_json when
+    SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY is on so a save only writes the tasks that changed.
+    """
+
+    __tablename__ = "serialized_task"
+    __table_args__ = (
+        UniqueConstraint(
+            "process_instance_id", "guid", name="serialized_task_process_instance_guid"
+        ),
+    )
+
+    id: int = db.Column(db.Integer, primary_key=True)
+    process_instance_id: int = db.Column(
+        ForeignKey(ProcessInstanceModel.id), nullable=False  # type: ignore
+    )
+    guid: str = db.Column(db.String(36), nullable=False)
+
+    # the guid of the subprocess task this task belongs to or None for the top level workflow
+    bpmn_process_guid: Optional[str] = db.Column(db.String(36))
+    parent_guid: Optional[str] = db.Column(db.String(36))
+    state: int = db.Column(db.Integer, nullable=False)
+
+    # sha256 of task_json so changed tasks can be found without loading task_json
+    data_hash: str = db.Column(db.String(255), nullable=False)
+    task_json: str = deferred(db.Column(db.JSON, nullable=False))  # type: ignore
@@ -6,6 +6,7 @@ from sqlalchemy import ForeignKey
 from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import deferred
 
+from spiffworkflow_backend.models.compressed_json import CompressedJSON
 from spiffworkflow_backend.models.db import db
 from spiffworkflow_backend.models.db import SpiffworkflowBaseDBModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
@@ -27,7 +28,11 @@ class SpiffStepDetailsModel(SpiffworkflowBaseDBModel):
         ForeignKey(ProcessInstanceModel.id), nullable=False  # type: ignore
     )
     spiff_step: int = db.Column(db.Integer, nullable=False)
-    task_json: dict = deferred(db.Column(db.JSON, nullable=False))  # type: ignore
+    task_json: dict = deferred(db.Column(CompressedJSON, nullable=False))  # type: ignore
+
+    # when set, task_json is a json patch against the task_json of this earlier spiff_step.
+    # use ProcessInstanceProcessor.step_snapshot to get the full task_json of any step.
+    base_spiff_step: Union[int, None] = db.Column(db.Integer)
     task_id: str = db.Column(db.String(50), nullable=False)
     task_state: str = db.Column(db.String(50), nullable=False)
     bpmn_task_identifier: str = db.Column(db.String(255), nullable=False)
@@ -92,7 +92,7 @@ def _process_data_fetcher(
 ) -> flask.wrappers.Response:
     """Process_data_show."""
     process_instance = _find_process_instance_by_id_or_raise(process_instance_id)
-    processor = ProcessInstanceProcessor(process_instance)
+    processor = ProcessInstanceProcessor(process_instance, read_only=True)
     all_process_data = processor.get_data()
     process_data_value = all_process_data.get(process_data_identifier)
 
@@ -194,16 +194,12 @@ def task_data_update(
                 f" It is currently: {process_instance.status}"
             )
 
-        process_instance_bpmn_json_dict = json.loads(process_instance.bpmn_json)
         if "new_task_data" in body:
             new_task_data_str: str = body["new_task_data"]
             new_task_data_dict = json.loads(new_task_data_str)
-            if task_id in process_instance_bpmn_json_dict["tasks"]:
-                process_instance_bpmn_json_dict["tasks"][task_id][
-                    "data"
-                ] = new_task_data_dict
-                process_instance.bpmn_json = json.dumps(process_instance_bpmn_json_dict)
-                db.session.add(process_instance)
+            # stored through the processor so normalized specs and serialized tasks stay in sync
+            processor = ProcessInstanceProcessor(process_instance)
+            if processor.update_task_data(task_id, new_task_data_dict):
                 try:
                     db.session.commit()
                 except Exception as e:
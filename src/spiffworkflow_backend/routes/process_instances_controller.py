@@ -32,6 +32,7 @@ from spiffworkflow_backend.models.process_instance_report import (
     ProcessInstanceReportModel,
 )
 from spiffworkflow_backend.models.process_model import ProcessModelInfo
+from spiffworkflow_backend.models.serialized_task import SerializedTaskModel
 from spiffworkflow_backend.models.spec_reference import SpecReferenceCache
 from spiffworkflow_backend.models.spec_reference import SpecReferenceNotFoundError
 from spiffworkflow_backend.models.spiff_logging import SpiffLoggingModel
@@ -119,7 +120,7 @@ def process_instance_run(
 
     if do_engine_steps:
         try:
-            processor.do_engine_steps(save=True)
+            processor.do_engine_steps(save=True, budgeted=True)
         except ApiError as e:
             ErrorHandlingService().handle_error(processor, e)
             raise e
@@ -395,6 +396,9 @@ def process_instance_delete(
     db.session.query(SpiffStepDetailsModel).filter_by(
         process_instance_id=process_instance.id
     ).delete()
+    db.session.query(SerializedTaskModel).filter_by(
+        process_instance_id=process_instance.id
+    ).delete()
     db.session.delete(process_instance)
     db.session.commit()
     return Response(json.dumps({"ok": True}), status=200, mimetype="application/json")
@@ -550,7 +554,7 @@ def process_instance_task_list(
         )
 
     step_details = step_detail_query.all()
-    bpmn_json = json.loads(process_instance.bpmn_json or "{}")
+    bpmn_json = ProcessInstanceProcessor.bpmn_json_dict(process_instance)
     tasks = bpmn_json["tasks"]
     subprocesses = bpmn_json["subprocesses"]
 
@@ -584,14 +588,16 @@ def process_instance_task_list(
                 spiff_task_id, TaskState.FUTURE
             )
 
-    process_instance.bpmn_json = json.dumps(bpmn_json)
-
-    processor = ProcessInstanceProcessor(process_instance)
-    spiff_task = processor.__class__.get_task_by_bpmn_identifier(
-        step_details[-1].bpmn_task_identifier, processor.bpmn_process_instance
-    )
+    # the processor is built from the states recorded up to the step, which must never be stored.
+    # without autoflush nothing is written before expiring bpmn_json throws the change away again.
+    with db.session.no_autoflush:
+        process_instance.bpmn_json = json.dumps(bpmn_json)
+        processor = ProcessInstanceProcessor(process_instance)
+        db.session.expire(process_instance, ["bpmn_json"])
+    spiff_task = processor.get_task_by_spec_name(step_details[-1].bpmn_task_identifier)
     if spiff_task is not None and spiff_task.state != TaskState.READY:
         spiff_task.complete()
+        processor.invalidate_task_index()
 
     spiff_tasks = None
     if all_tasks:
@@ -35,6 +35,7 @@ from spiffworkflow_backend.models.human_task import HumanTaskModel
 from spiffworkflow_backend.models.human_task_user import HumanTaskUserModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.models.principal import PrincipalModel
 from spiffworkflow_backend.models.process_model import ProcessModelInfo
 from spiffworkflow_backend.models.spiff_step_details import SpiffStepDetailsModel
 from spiffworkflow_backend.models.task import Task
@@ -47,6 +48,9 @@ from spiffworkflow_backend.routes.process_api_blueprint import (
 )
 from spiffworkflow_backend.routes.process_api_blueprint import _get_process_model
 from spiffworkflow_backend.services.authorization_service import AuthorizationService
+from spiffworkflow_backend.services.background_processing_service import (
+    BackgroundProcessingService,
+)
 from spiffworkflow_backend.services.file_system_service import FileSystemService
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
@@ -200,11 +204,10 @@ def task_data_show(
             status_code=400,
         )
 
-    processor = ProcessInstanceProcessor(process_instance)
-    spiff_task = processor.__class__.get_task_by_bpmn_identifier(
-        step_detail.bpmn_task_identifier, processor.bpmn_process_instance
-    )
-    task_data = step_detail.task_json["task_data"] | step_detail.task_json["python_env"]
+    processor = ProcessInstanceProcessor(process_instance, read_only=True)
+    spiff_task = processor.get_task_by_spec_name(step_detail.bpmn_task_identifier)
+    task_json = ProcessInstanceProcessor.step_snapshot(step_detail).task_json
+    task_data = task_json["task_data"] | task_json["python_env"]
     task = ProcessInstanceService.spiff_task_to_api_task(
         processor,
         spiff_task,
@@ -253,7 +256,10 @@ def task_show(process_instance_id: int, task_id: str) -> flask.wrappers.Response
 
     form_schema_file_name = ""
     form_ui_schema_file_name = ""
-    spiff_task = _get_spiff_task_from_process_instance(task_id, process_instance)
+    processor = ProcessInstanceProcessor(process_instance, read_only=True)
+    spiff_task = _get_spiff_task_from_process_instance(
+        task_id, process_instance, processor=processor
+    )
     extensions = spiff_task.task_spec.extensions
 
     if "properties" in extensions:
@@ -262,7 +268,6 @@ def task_show(process_instance_id: int, task_id: str) -> flask.wrappers.Response
             form_schema_file_name = properties["formJsonSchemaFilename"]
         if "formUiSchemaFilename" in properties:
             form_ui_schema_file_name = properties["formUiSchemaFilename"]
-    processor = ProcessInstanceProcessor(process_instance)
     task = ProcessInstanceService.spiff_task_to_api_task(processor, spiff_task)
     task.data = spiff_task.data
     task.process_model_display_name = process_model.display_name
@@ -348,7 +353,7 @@ def process_data_show(
 ) -> flask.wrappers.Response:
     """Process_data_show."""
     process_instance = _find_process_instance_by_id_or_raise(process_instance_id)
-    processor = ProcessInstanceProcessor(process_instance)
+    processor = ProcessInstanceProcessor(process_instance, read_only=True)
     all_process_data = processor.get_data()
     process_data_value = None
     if process_data_identifier in all_process_data:
@@ -409,16 +414,29 @@ def task_submit_shared(
         only_tasks_that_can_be_completed=True,
     )
 
+    continue_in_background = current_app.config[
+        "SPIFFWORKFLOW_BACKEND_CONTINUE_AFTER_TASK_SUBMIT_IN_BACKGROUND"
+    ]
     with sentry_sdk.start_span(op="task", description="complete_form_task"):
         processor.lock_process_instance("Web")
-        ProcessInstanceService.complete_form_task(
-            processor=processor,
-            spiff_task=spiff_task,
-            data=body,
-            user=g.user,
-            human_task=human_task,
+        try:
+            ProcessInstanceService.complete_form_task(
+                processor=processor,
+                spiff_task=spiff_task,
+                data=body,
+                user=g.user,
+                human_task=human_task,
+                continue_in_background=continue_in_background,
+            )
+        finally:
+            processor.unlock_process_instance("Web")
+
+    # a parallel user task that is already ready makes the instance user_input_required, but the engine
+    # tasks after the submitted one still need to run
+    if continue_in_background and processor.has_ready_engine_tasks():
+        BackgroundProcessingService.continue_process_instance_in_background(
+            process_instance.id
         )
-        processor.unlock_process_instance("Web")
 
     # If we need to update all tasks, then get the next ready task and if it a multi-instance with the same
     # task spec, complete that form as well.
@@ -430,9 +448,27 @@ def task_submit_shared(
     #         last_index = next_task.task_info()["mi_index"]
     #         next_task = processor.next_task()
 
+    return _next_human_task_assigned_to_me_response(process_instance, principal)
+
+
+def task_next_human_task_show(process_instance_id: int) -> flask.wrappers.Response:
+    """Lets clients poll for their next task while a submitted task continues in the background."""
+    principal = _find_principal_or_raise()
+    process_instance = _find_process_instance_by_id_or_raise(process_instance_id)
+    return _next_human_task_assigned_to_me_response(process_instance, principal)
+
+
+def _next_human_task_assigned_to_me_response(
+    process_instance: ProcessInstanceModel, principal: PrincipalModel
+) -> flask.wrappers.Response:
+    """Returns the next human task or, if there is none yet, where the process instance is at.
+
+    The process instance is still running engine tasks while its status is waiting, so clients
+    can keep polling task_next_human_task_show until it changes.
+    """
     next_human_task_assigned_to_me = (
         HumanTaskModel.query.filter_by(
-            process_instance_id=process_instance_id, completed=False
+            process_instance_id=process_instance.id, completed=False
         )
         .order_by(asc(HumanTaskModel.id))  # type: ignore
         .join(HumanTaskUserModel)
@@ -444,7 +480,17 @@ def task_submit_shared(
             jsonify(HumanTaskModel.to_task(next_human_task_assigned_to_me)), 200
         )
 
-    return Response(json.dumps({"ok": True}), status=202, mimetype="application/json")
+    return Response(
+        json.dumps(
+            {
+                "ok": True,
+                "process_instance_id": process_instance.id,
+                "process_instance_status": process_instance.status,
+            }
+        ),
+        status=202,
+        mimetype="application/json",
+    )
 
 
 def task_submit(
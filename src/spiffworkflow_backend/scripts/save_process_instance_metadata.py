@@ -1,7 +1,10 @@
 """Save process instance metadata."""
+import time
 from typing import Any
 
 from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import upsert
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.process_instance_metadata import (
     ProcessInstanceMetadataModel,
 )
@@ -26,16 +29,28 @@ class SaveProcessInstanceMetadata(Script):
     ) -> Any:
         """Run."""
         metadata_dict = args[0]
-        for key, value in metadata_dict.items():
-            pim = ProcessInstanceMetadataModel.query.filter_by(
-                process_instance_id=script_attributes_context.process_instance_id,
-                key=key,
-            ).first()
-            if pim is None:
-                pim = ProcessInstanceMetadataModel(
-                    process_instance_id=script_attributes_context.process_instance_id,
-                    key=key,
-                )
-            pim.value = value
-            db.session.add(pim)
-            db.session.commit()
+        current_time_in_seconds = round(time.time())
+        upsert(
+            ProcessInstanceMetadataModel,
+            [
+                {
+                    "process_instance_id": script_attributes_context.process_instance_id,
+                    "key": key,
+                    "value": value,
+                    "created_at_in_seconds": current_time_in_seconds,
+                    "updated_at_in_seconds": current_time_in_seconds,
+                }
+                for key, value in metadata_dict.items()
+            ],
+            index_elements=["process_instance_id", "key"],
+            update_columns=["value", "updated_at_in_seconds"],
+        )
+
+        # the next save has to extract the metadata again in case this overwrote an extracted key
+        process_instance = ProcessInstanceModel.query.filter_by(
+            id=script_attributes_context.process_instance_id
+        ).first()
+        if process_instance is not None:
+            process_instance.metadata_extraction_hash = None
+            db.session.add(process_instance)
+        db.session.commit()
@@ -4,9 +4,13 @@ from __future__ import annotations
 import importlib
 import os
 import pkgutil
+import threading
 from abc import abstractmethod
 from typing import Any
 from typing import Callable
+from typing import Optional
+
+from SpiffWorkflow.task import Task as SpiffTask  # type: ignore
 
 from spiffworkflow_backend.exceptions.api_error import ApiError
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
@@ -71,11 +75,22 @@ class Script:
         We may be able to remove the task for each of these calls if we are not using it other than potentially
         updating the task data.
         """
+        return Script.generate_lazily_bound_augmented_list(
+            lambda: script_attributes_context
+        )
+
+    @staticmethod
+    def generate_lazily_bound_augmented_list(
+        get_script_attributes_context: Callable[[], ScriptAttributesContext],
+        permitted_script_function_names: Optional[set[str]] = None,
+    ) -> dict[str, Callable]:
+        """Like generate_augmented_list but the context is only asked for when a script is called.
+
+        Privileged scripts that pass the permission check are added to permitted_script_function_names
+        if it is given and are not checked again.
+        """
 
-        def make_closure(
-            subclass: type[Script],
-            script_attributes_context: ScriptAttributesContext,
-        ) -> Callable:
+        def make_closure(subclass: type[Script]) -> Callable:
             """Yes - this is black magic.
 
             Essentially, we want to build a list of all of the submodules (i.e. email, user_data_get, etc)
@@ -87,10 +102,17 @@ class Script:
             """
             instance = subclass()
 
-            def check_script_permission() -> None:
+            def check_script_permission(
+                script_attributes_context: ScriptAttributesContext,
+            ) -> None:
                 """Check_script_permission."""
                 if subclass.requires_privileged_permissions():
                     script_function_name = get_script_function_name(subclass)
+                    if (
+                        permitted_script_function_names is not None
+                        and script_function_name in permitted_script_function_names
+                    ):
+                        return
                     uri = f"/can-run-privileged-script/{script_function_name}"
                     process_instance = ProcessInstanceModel.query.filter_by(
                         id=script_attributes_context.process_instance_id
@@ -110,10 +132,13 @@ class Script:
                             f"User {user.username} does not have access to run"
                             f" privileged script '{script_function_name}'"
                         )
+                    if permitted_script_function_names is not None:
+                        permitted_script_function_names.add(script_function_name)
 
             def run_script_if_allowed(*ar: Any, **kw: Any) -> Any:
                 """Run_script_if_allowed."""
-                check_script_permission()
+                script_attributes_context = get_script_attributes_context()
+                check_script_permission(script_attributes_context)
                 return subclass.run(
                     instance,
                     script_attributes_context,
@@ -131,9 +156,7 @@ class Script:
         subclasses = Script.get_all_subclasses()
         for x in range(len(subclasses)):
             subclass = subclasses[x]
-            execlist[get_script_function_name(subclass)] = make_closure(
-                subclass, script_attributes_context=script_attributes_context
-            )
+            execlist[get_script_function_name(subclass)] = make_closure(subclass)
         return execlist
 
     @classmethod
@@ -161,3 +184,42 @@ class Script:
             all_subclasses.extend(Script._get_all_subclasses(subclass))
 
         return all_subclasses
+
+
+class AugmentedScriptMethods:
+    """The augmented script functions of one process instance.
+
+    The functions are built once and bound to the task that is being run when they are called,
+    so one table can be used by every evaluate and execute of an engine run. The task is per thread
+    since the script engine is shared. Privileged script permission checks are remembered for as
+    long as the table is kept.
+    """
+
+    def __init__(
+        self,
+        environment_identifier: str,
+        process_instance_id: Optional[int],
+        process_model_identifier: str,
+    ) -> None:
+        """__init__."""
+        self.environment_identifier = environment_identifier
+        self.process_instance_id = process_instance_id
+        self.process_model_identifier = process_model_identifier
+        self._current = threading.local()
+        self._permitted_script_function_names: set[str] = set()
+        self.methods = Script.generate_lazily_bound_augmented_list(
+            self.script_attributes_context, self._permitted_script_function_names
+        )
+
+    def bind_task(self, task: SpiffTask) -> None:
+        """Bind_task."""
+        self._current.task = task
+
+    def script_attributes_context(self) -> ScriptAttributesContext:
+        """Script_attributes_context."""
+        return ScriptAttributesContext(
+            task=getattr(self._current, "task", None),
+            environment_identifier=self.environment_identifier,
+            process_instance_id=self.process_instance_id,  # type: ignore
+            process_model_identifier=self.process_model_identifier,
+        )
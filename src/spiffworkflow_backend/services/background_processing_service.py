@@ -1,25 +1,384 @@
 """Background_processing_service."""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Optional
+
 import flask
+from flask import current_app
+from sqlalchemy import func
 
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.message_instance import MessageInstanceModel
+from spiffworkflow_backend.models.message_instance import MessageStatuses
+from spiffworkflow_backend.models.message_instance import MessageTypes
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.services.message_notification_service import (
+    MessageNotificationService,
+)
 from spiffworkflow_backend.services.message_service import MessageService
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessor,
+)
 from spiffworkflow_backend.services.process_instance_service import (
     ProcessInstanceService,
 )
+from spiffworkflow_backend.services.process_instance_service import (
+    WaitingProcessInstanceCounts,
+)
 
 
 class BackgroundProcessingService:
     """Used to facilitate doing work outside of an HTTP request/response."""
 
-    def __init__(self, app: flask.app.Flask):
+    _continuation_executor: Optional[ThreadPoolExecutor] = None
+    _waiting_process_instance_executor: Optional[Executor] = None
+    _waiting_process_instance_futures: set[Future] = set()
+    _waiting_process_instance_lock = threading.Lock()
+
+    # the prefixes process instances are locked with. the heartbeat renews the locks of all of them.
+    LOCK_PREFIXES = ["Background", "Web"]
+
+    def __init__(
+        self, app: flask.app.Flask, stopping: Optional[threading.Event] = None
+    ):
         """__init__."""
         self.app = app
+        self.stopping = stopping
+
+    def should_stop(self) -> bool:
+        """True once whatever runs this asked it to stop picking up new work."""
+        return self.stopping is not None and self.stopping.is_set()
 
     def process_waiting_process_instances(self) -> None:
         """Since this runs in a scheduler, we need to specify the app context as well."""
         with self.app.app_context():
-            ProcessInstanceService.do_waiting()
+            if current_app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS"]:
+                self.process_waiting_process_instances_with_workers()
+            else:
+                ProcessInstanceService.do_waiting(should_stop=self.should_stop)
+
+    def renew_locks_with_app_context(self) -> None:
+        """Since this runs in a scheduler, we need to specify the app context as well."""
+        with self.app.app_context():
+            ProcessInstanceProcessor.renew_locks_held_by_this_process(
+                self.LOCK_PREFIXES
+            )
+
+    @classmethod
+    def queue_metrics(cls) -> dict[str, int]:
+        """How much work is waiting for the background processor and how long the oldest of it has waited."""
+        current_time_in_seconds = round(time.time())
+        due_count, oldest_next_run_at_in_seconds = (
+            db.session.query(
+                func.count(ProcessInstanceModel.id),
+                func.min(ProcessInstanceModel.next_run_at_in_seconds),
+            )
+            .filter(
+                ProcessInstanceService.is_due_for_background_processing(
+                    current_time_in_seconds
+                )
+            )
+            .one()
+        )
+        locked_count = ProcessInstanceModel.query.filter(
+            ProcessInstanceModel.locked_by.isnot(None)  # type: ignore
+        ).count()
+        message_count, oldest_message_created_at_in_seconds = (
+            db.session.query(
+                func.count(MessageInstanceModel.id),
+                func.min(MessageInstanceModel.created_at_in_seconds),
+            )
+            .filter(
+                MessageInstanceModel.message_type == MessageTypes.send.value,
+                MessageInstanceModel.status == MessageStatuses.ready.value,
+            )
+            .one()
+        )
+        return {
+            "due_waiting_process_instances": due_count,
+            "due_waiting_process_instances_lag_seconds": (
+                current_time_in_seconds - oldest_next_run_at_in_seconds
+                if oldest_next_run_at_in_seconds is not None
+                else 0
+            ),
+            "locked_process_instances": locked_count,
+            "ready_message_instances": message_count,
+            "ready_message_instances_lag_seconds": (
+                current_time_in_seconds - oldest_message_created_at_in_seconds
+                if oldest_message_created_at_in_seconds is not None
+                else 0
+            ),
+        }
+
+    def process_waiting_process_instances_with_workers(
+        self,
+    ) -> WaitingProcessInstanceCounts:
+        """Keeps the workers busy with waiting process instances until there are none left to claim.
+
+        A process instance is only locked once a worker is about to be free for it, so at most
+        SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_MAX_IN_FLIGHT process instances are locked by this
+        processor at a time and the others stay available to other background processors.
+        """
+        lock_prefix = "Background"
+        batch_size = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_BATCH_SIZE"
+        ]
+        max_in_flight = (
+            current_app.config[
+                "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_MAX_IN_FLIGHT"
+            ]
+            or current_app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS"]
+        )
+        executor = self.waiting_process_instance_executor()
+        counts = WaitingProcessInstanceCounts()
+        futures = self._waiting_process_instance_futures
+
+        while not self.should_stop():
+            for future in [future for future in futures if future.done()]:
+                futures.discard(future)
+                if future.exception() is not None or not future.result():
+                    counts.errors += 1
+
+            capacity = max_in_flight - len(futures)
+            if capacity > 0:
+                claim_count = min(capacity, batch_size)
+                (
+                    claimed_ids,
+                    skipped_count,
+                ) = ProcessInstanceService.claim_waiting_process_instances(
+                    lock_prefix, claim_count
+                )
+                counts.claimed += len(claimed_ids)
+                counts.skipped = skipped_count
+                for process_instance_id in claimed_ids:
+                    futures.add(
+                        self.submit_waiting_process_instance(
+                            executor, process_instance_id, lock_prefix
+                        )
+                    )
+                if len(claimed_ids) < claim_count:
+                    break
+            else:
+                wait(futures, return_when=FIRST_COMPLETED)
+
+        if counts.claimed or counts.skipped or counts.errors:
+            current_app.logger.info(
+                f"Waiting process instances: claimed {counts.claimed}, skipped"
+                f" {counts.skipped}, errors {counts.errors}, still running"
+                f" {len(futures)}"
+            )
+        return counts
+
+    def submit_waiting_process_instance(
+        self, executor: Executor, process_instance_id: int, lock_prefix: str
+    ) -> Future:
+        """Submit_waiting_process_instance."""
+        if isinstance(executor, ProcessPoolExecutor):
+            future = executor.submit(
+                _run_waiting_process_instance_in_process,
+                process_instance_id,
+                lock_prefix,
+            )
+            # the worker process lets go of the lock in its own registry so the heartbeat here stops
+            # renewing it once the worker is done with it, or died.
+            locked_by = ProcessInstanceProcessor.lock_owner(lock_prefix)
+            future.add_done_callback(
+                lambda _future: ProcessInstanceProcessor.let_go_of_lock(
+                    process_instance_id, locked_by
+                )
+            )
+            return future
+        return executor.submit(
+            _run_waiting_process_instance, self.app, process_instance_id, lock_prefix
+        )
+
+    @classmethod
+    def waiting_process_instance_executor(cls) -> Executor:
+        """Waiting_process_instance_executor."""
+        with cls._waiting_process_instance_lock:
+            if cls._waiting_process_instance_executor is None:
+                workers = current_app.config[
+                    "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS"
+                ]
+                if (
+                    current_app.config[
+                        "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKER_TYPE"
+                    ]
+                    == "process"
+                ):
+                    # forkserver starts the workers from a clean process instead of forking this one
+                    # with its scheduler threads and database connections.
+                    cls._waiting_process_instance_executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=_initialize_waiting_process_instance_worker,
+                        initargs=(current_app.config["PROCESS_UUID"],),
+                    )
+                else:
+                    cls._waiting_process_instance_executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="background_processor",
+                    )
+            return cls._waiting_process_instance_executor
+
+    @classmethod
+    def shutdown_waiting_process_instance_workers(
+        cls, wait_for_workers: bool = True
+    ) -> None:
+        """Stops the workers once the process instances they are running are done."""
+        with cls._waiting_process_instance_lock:
+            executor = cls._waiting_process_instance_executor
+            cls._waiting_process_instance_executor = None
+            cls._waiting_process_instance_futures = set()
+        if executor is not None:
+            executor.shutdown(wait=wait_for_workers)
 
     def process_message_instances_with_app_context(self) -> None:
         """Since this runs in a scheduler, we need to specify the app context as well."""
         with self.app.app_context():
+            # this run correlates whatever the older notifications are about. the second of slack
+            # covers created_at_in_seconds being rounded.
+            MessageNotificationService.discard_notifications_older_than(
+                round(time.time()) - 1
+            )
             MessageService.correlate_all_message_instances()
+
+    def process_message_notifications_with_app_context(self) -> None:
+        """Correlates the message instances of the message notifications that are queued."""
+        with self.app.app_context():
+            batch_size = current_app.config[
+                "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_BATCH_SIZE"
+            ]
+            while not self.should_stop():
+                message_instance_ids = (
+                    MessageNotificationService.take_notified_message_instance_ids(
+                        batch_size
+                    )
+                )
+                if message_instance_ids:
+                    MessageService.correlate_notified_message_instances(
+                        message_instance_ids
+                    )
+                if len(message_instance_ids) < batch_size:
+                    break
+
+    def process_message_notifications_until_stopped(self) -> None:
+        """Correlates newly committed message instances as their notifications come in.
+
+        A notification from this process wakes this up right away. The queue is checked for the ones from
+        other processes every SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS.
+        """
+        poll_seconds = self.app.config[
+            "SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS"
+        ]
+        while not self.should_stop():
+            try:
+                self.process_message_notifications_with_app_context()
+            except Exception:
+                self.app.logger.exception("Processing message notifications failed")
+            MessageNotificationService.wait_for_notification(poll_seconds)
+
+    @classmethod
+    def start_processing_message_notifications(
+        cls, app: flask.app.Flask, stopping: Optional[threading.Event] = None
+    ) -> Optional[threading.Thread]:
+        """Starts a thread running process_message_notifications_until_stopped unless notifications are off."""
+        if app.config["SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE"] == "none":
+            return None
+        thread = threading.Thread(
+            target=cls(app, stopping).process_message_notifications_until_stopped,
+            name="background_processor_message_notifications",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def continue_process_instance_with_app_context(
+        self, process_instance_id: int
+    ) -> None:
+        """Since this runs on a continuation thread, we need to specify the app context as well."""
+        with self.app.app_context():
+            process_instance = ProcessInstanceModel.query.filter_by(
+                id=process_instance_id
+            ).first()
+            if process_instance is None or process_instance.status not in [
+                ProcessInstanceStatus.waiting.value,
+                ProcessInstanceStatus.user_input_required.value,
+            ]:
+                return
+            ProcessInstanceService.run_waiting_process_instance(process_instance)
+
+    @classmethod
+    def continue_process_instance_in_background(cls, process_instance_id: int) -> None:
+        """Runs the waiting engine steps of the process instance on a thread of this process right away.
+
+        The instance is already saved as waiting, so if this process dies before the thread gets to it
+        the background processor still picks it up.
+        """
+        if cls._continuation_executor is None:
+            cls._continuation_executor = ThreadPoolExecutor(
+                max_workers=current_app.config[
+                    "SPIFFWORKFLOW_BACKEND_TASK_SUBMIT_CONTINUATION_THREADS"
+                ],
+                thread_name_prefix="task_submit_continuation",
+            )
+        background_processing_service = cls(current_app._get_current_object())  # type: ignore
+        cls._continuation_executor.submit(
+            background_processing_service.continue_process_instance_with_app_context,
+            process_instance_id,
+        )
+
+
+def _run_waiting_process_instance(
+    app: flask.app.Flask, process_instance_id: int, lock_prefix: str
+) -> bool:
+    """Runs a waiting process instance the background processor already locked."""
+    with app.app_context():
+        process_instance = ProcessInstanceModel.query.filter_by(
+            id=process_instance_id
+        ).first()
+        if process_instance is None:
+            ProcessInstanceProcessor.let_go_of_lock(
+                process_instance_id, ProcessInstanceProcessor.lock_owner(lock_prefix)
+            )
+            return True
+        return ProcessInstanceService.run_waiting_process_instance(
+            process_instance, lock_prefix, lock_already_held=True
+        )
+
+
+# everything below runs in the worker processes
+
+_worker_app: Optional[flask.app.Flask] = None
+
+
+def _initialize_waiting_process_instance_worker(process_uuid: uuid.UUID) -> None:
+    """Creates the app of a worker process without a scheduler of its own."""
+    global _worker_app
+    os.environ["SPIFFWORKFLOW_BACKEND_RUN_BACKGROUND_SCHEDULER"] = "false"
+
+    # imported here since the app imports this module
+    from spiffworkflow_backend import create_app
+
+    _worker_app = create_app()
+    # the locks were taken out in the name of the parent process
+    _worker_app.config["PROCESS_UUID"] = process_uuid
+
+
+def _run_waiting_process_instance_in_process(
+    process_instance_id: int, lock_prefix: str
+) -> bool:
+    """_run_waiting_process_instance_in_process."""
+    if _worker_app is None:
+        raise RuntimeError("The background processor worker was not initialized")
+    return _run_waiting_process_instance(_worker_app, process_instance_id, lock_prefix)
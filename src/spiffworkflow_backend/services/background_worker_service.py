@@ -0,0 +1,153 @@
+"""Background_worker_service."""
+import signal
+import threading
+from types import FrameType
+from typing import Callable
+from typing import Optional
+
+import flask
+
+from spiffworkflow_backend.services.background_processing_service import (
+    BackgroundProcessingService,
+)
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessor,
+)
+
+
+class BackgroundWorkerService:
+    """Runs the background processor in a process of its own so it can be scaled apart from the web processes.
+
+    Waiting process instances, messages, message notifications, the lock heartbeat and the queue metrics
+    each run on a thread of their own. Once asked to stop, for example with SIGTERM, the worker stops
+    picking up new work, waits for the process instances it is running while it keeps renewing their
+    locks and then releases every lock it still holds.
+    """
+
+    def __init__(self, app: flask.app.Flask) -> None:
+        """__init__."""
+        self.app = app
+        self.stopping = threading.Event()
+        self.heartbeat_stopping = threading.Event()
+        self.background_processing_service = BackgroundProcessingService(
+            app, self.stopping
+        )
+
+    def stop(
+        self, _signum: Optional[int] = None, _frame: Optional[FrameType] = None
+    ) -> None:
+        """Stop."""
+        self.stopping.set()
+
+    def run(self) -> None:
+        """Runs until stop is called. SIGTERM and SIGINT call it when this runs on the main thread."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+
+        interval_seconds = self.app.config[
+            "SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_INTERVAL_SECONDS"
+        ]
+        heartbeat_seconds = self.app.config[
+            "SPIFFWORKFLOW_BACKEND_LOCK_HEARTBEAT_SECONDS"
+        ]
+        metrics_interval_seconds = self.app.config[
+            "SPIFFWORKFLOW_BACKEND_BACKGROUND_WORKER_METRICS_INTERVAL_SECONDS"
+        ]
+
+        work_threads = [
+            self.start_periodically(
+                self.background_processing_service.process_waiting_process_instances,
+                interval_seconds,
+                self.stopping,
+            ),
+            self.start_periodically(
+                self.background_processing_service.process_message_instances_with_app_context,
+                interval_seconds,
+                self.stopping,
+            ),
+        ]
+        message_notification_thread = (
+            BackgroundProcessingService.start_processing_message_notifications(
+                self.app, self.stopping
+            )
+        )
+        if message_notification_thread is not None:
+            work_threads.append(message_notification_thread)
+        if metrics_interval_seconds > 0:
+            work_threads.append(
+                self.start_periodically(
+                    self.log_queue_metrics, metrics_interval_seconds, self.stopping
+                )
+            )
+        # the heartbeat keeps going until the process instances that are still running are done
+        heartbeat_threads = []
+        if heartbeat_seconds > 0:
+            heartbeat_threads.append(
+                self.start_periodically(
+                    self.background_processing_service.renew_locks_with_app_context,
+                    heartbeat_seconds,
+                    self.heartbeat_stopping,
+                )
+            )
+        self.app.logger.info("Background worker started")
+
+        try:
+            # waiting with a timeout lets the signal handlers run promptly
+            while not self.stopping.wait(timeout=1):
+                pass
+            self.app.logger.info(
+                "Background worker stopping once the running process instances are done"
+            )
+            for thread in work_threads:
+                thread.join()
+            BackgroundProcessingService.shutdown_waiting_process_instance_workers()
+        finally:
+            self.stopping.set()
+            self.heartbeat_stopping.set()
+            for thread in heartbeat_threads:
+                thread.join()
+            with self.app.app_context():
+                released_count = (
+                    ProcessInstanceProcessor.release_locks_held_by_this_process(
+                        BackgroundProcessingService.LOCK_PREFIXES
+                    )
+                )
+            self.app.logger.info(
+                f"Background worker stopped and released {released_count} locks"
+            )
+
+    def start_periodically(
+        self,
+        job: Callable[[], None],
+        interval_seconds: int,
+        stopping: threading.Event,
+    ) -> threading.Thread:
+        """Starts a thread that runs job every interval_seconds until stopping is set."""
+
+        def run_job_periodically() -> None:
+            while not stopping.is_set():
+                try:
+                    job()
+                except Exception:
+                    self.app.logger.exception(
+                        f"Background worker job {job.__name__} failed"
+                    )
+                stopping.wait(interval_seconds)
+
+        thread = threading.Thread(
+            target=run_job_periodically,
+            name=f"background_worker_{job.__name__}",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def log_queue_metrics(self) -> None:
+        """Log_queue_metrics."""
+        with self.app.app_context():
+            queue_metrics = BackgroundProcessingService.queue_metrics()
+        self.app.logger.info(
+            "Background worker queue metrics: "
+            + " ".join(f"{name}={value}" for name, value in queue_metrics.items())
+        )
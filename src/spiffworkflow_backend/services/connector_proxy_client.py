@@ -0,0 +1,268 @@
+"""Connector_proxy_client."""
+import bisect
+import random
+import threading
+import time
+from typing import Any
+from typing import Optional
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+
+class ConnectorCircuitOpenError(Exception):
+    """ConnectorCircuitOpenError."""
+
+
+class LatencyHistogram:
+    """Counts request latencies in fixed buckets so the distribution can be looked at cheaply."""
+
+    BUCKET_UPPER_BOUNDS_IN_SECONDS = [
+        0.005,
+        0.01,
+        0.025,
+        0.05,
+        0.1,
+        0.25,
+        0.5,
+        1,
+        2.5,
+        5,
+        10,
+        30,
+    ]
+
+    def __init__(self) -> None:
+        """__init__."""
+        # the last bucket counts everything slower than the last upper bound
+        self.bucket_counts = [0] * (len(self.BUCKET_UPPER_BOUNDS_IN_SECONDS) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record."""
+        bucket_index = bisect.bisect_left(self.BUCKET_UPPER_BOUNDS_IN_SECONDS, seconds)
+        with self._lock:
+            self.bucket_counts[bucket_index] += 1
+            self.count += 1
+            self.total_seconds += seconds
+
+    def stats(self) -> dict[str, Any]:
+        """Stats."""
+        with self._lock:
+            labels = [f"<={bound}s" for bound in self.BUCKET_UPPER_BOUNDS_IN_SECONDS]
+            labels.append(f">{self.BUCKET_UPPER_BOUNDS_IN_SECONDS[-1]}s")
+            average_seconds = 0.0
+            if self.count:
+                average_seconds = self.total_seconds / self.count
+            return {
+                "count": self.count,
+                "average_seconds": average_seconds,
+                "buckets": dict(zip(labels, self.bucket_counts)),
+            }
+
+
+class CircuitBreaker:
+    """Stops calling something after failure_threshold failures in a row until reset_seconds have passed.
+
+    After that one call is let through. If it succeeds calls go through again, otherwise the
+    circuit stays open for another reset_seconds. A failure_threshold of 0 never opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        """__init__."""
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at_in_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Allow_request."""
+        with self._lock:
+            if self.opened_at_in_seconds is None:
+                return True
+            if time.time() - self.opened_at_in_seconds < self.reset_seconds:
+                return False
+            # let this one through and keep the others out until it is done
+            self.opened_at_in_seconds = time.time()
+            return True
+
+    def record_success(self) -> None:
+        """Record_success."""
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at_in_seconds = None
+
+    def record_failure(self) -> None:
+        """Record_failure."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if (
+                self.failure_threshold > 0
+                and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.opened_at_in_seconds = time.time()
+
+
+class ConnectorProxyClient:
+    """The one http client used to talk to the connector proxy from this process.
+
+    Connections are pooled and reused. Every request has a connect and a read timeout. A request
+    that could not connect is retried for any command since the connector never saw it, while timeouts,
+    dropped connections and 502, 503 and 504 responses are only retried for idempotent commands.
+    Retries wait an exponentially growing random time. Each command has its own circuit breaker
+    and latency histogram.
+    """
+
+    RETRYABLE_STATUS_CODES = {502, 503, 504}
+
+    _session: Optional[requests.Session] = None
+    _circuit_breakers: dict[str, CircuitBreaker] = {}
+    _latency_histograms: dict[str, LatencyHistogram] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Session."""
+        with cls._lock:
+            if cls._session is None:
+                pool_size = current_app.config[
+                    "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_POOL_SIZE"
+                ]
+                adapter = HTTPAdapter(
+                    pool_connections=pool_size, pool_maxsize=pool_size
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def reset(cls) -> None:
+        """Closes the pooled connections and forgets the circuit breakers and histograms."""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = None
+            cls._circuit_breakers = {}
+            cls._latency_histograms = {}
+
+    @classmethod
+    def circuit_breaker(cls, command: str) -> CircuitBreaker:
+        """Circuit_breaker."""
+        with cls._lock:
+            if command not in cls._circuit_breakers:
+                cls._circuit_breakers[command] = CircuitBreaker(
+                    current_app.config[
+                        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_FAILURE_THRESHOLD"
+                    ],
+                    current_app.config[
+                        "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_RESET_SECONDS"
+                    ],
+                )
+            return cls._circuit_breakers[command]
+
+    @classmethod
+    def latency_histogram(cls, command: str) -> LatencyHistogram:
+        """Latency_histogram."""
+        with cls._lock:
+            if command not in cls._latency_histograms:
+                cls._latency_histograms[command] = LatencyHistogram()
+            return cls._latency_histograms[command]
+
+    @classmethod
+    def latency_stats(cls) -> dict[str, dict[str, Any]]:
+        """Latency_stats."""
+        with cls._lock:
+            histograms = dict(cls._latency_histograms)
+        return {command: histogram.stats() for command, histogram in histograms.items()}
+
+    @classmethod
+    def is_idempotent_command(cls, command: str) -> bool:
+        """Is_idempotent_command."""
+        return (
+            command
+            in current_app.config[
+                "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"
+            ]
+        )
+
+    @staticmethod
+    def could_not_connect(exception: requests.RequestException) -> bool:
+        """True if the request never reached the connector proxy so sending it again is always safe."""
+        if isinstance(exception, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(exception.args[0], "reason", None) if exception.args else None
+        return isinstance(reason, NewConnectionError)
+
+    @classmethod
+    def request(
+        cls,
+        method: str,
+        path: str,
+        command: str,
+        idempotent: bool = False,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Sends the request to the connector proxy and returns the response.
+
+        Raises ConnectorCircuitOpenError without sending anything if the circuit of the command is
+        open, and the last requests exception once there are no retries left.
+        """
+        circuit_breaker = cls.circuit_breaker(command)
+        if not circuit_breaker.allow_request():
+            raise ConnectorCircuitOpenError(
+                f"Not calling '{command}' on the connector proxy for now since it failed"
+                f" {circuit_breaker.consecutive_failures} times in a row."
+            )
+
+        url = f"{current_app.config['SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL']}{path}"
+        timeout = (
+            current_app.config[
+                "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CONNECT_TIMEOUT_SECONDS"
+            ],
+            current_app.config[
+                "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_READ_TIMEOUT_SECONDS"
+            ],
+        )
+        max_retries = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_MAX_RETRIES"
+        ]
+        backoff_seconds = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_RETRY_BACKOFF_SECONDS"
+        ]
+        latency_histogram = cls.latency_histogram(command)
+        session = cls.session()
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as exception:
+                latency_histogram.record(time.perf_counter() - start)
+                circuit_breaker.record_failure()
+                retryable = idempotent or cls.could_not_connect(exception)
+                if not retryable or attempt >= max_retries:
+                    raise
+            else:
+                latency_histogram.record(time.perf_counter() - start)
+                if response.status_code < 500:
+                    circuit_breaker.record_success()
+                    return response
+                circuit_breaker.record_failure()
+                retryable = (
+                    idempotent and response.status_code in cls.RETRYABLE_STATUS_CODES
+                )
+                if not retryable or attempt >= max_retries:
+                    return response
+
+            # full jitter so callers that failed together do not retry together
+            backoff = random.uniform(0, backoff_seconds * (2**attempt))  # noqa: S311
+            time.sleep(backoff)
+            attempt += 1
@@ -0,0 +1,128 @@
+"""Json_column_compression_service."""
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam
+from sqlalchemy import Column
+from sqlalchemy import select
+from sqlalchemy import type_coerce
+from sqlalchemy.types import LargeBinary
+
+from spiffworkflow_backend.helpers.json_codec import JsonCodec
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.spiff_step_details import SpiffStepDetailsModel
+
+
+@dataclass
+class RecompressionStats:
+    """RecompressionStats."""
+
+    table_name: str
+    column_name: str
+    codec_name: str
+    rows_seen: int = 0
+    rows_recompressed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    decode_seconds: float = 0.0
+    encode_seconds: float = 0.0
+
+    @property
+    def compression_ratio(self) -> float:
+        """Compression_ratio."""
+        if self.bytes_after == 0:
+            return 1.0
+        return self.bytes_before / self.bytes_after
+
+    def report(self) -> str:
+        """Report."""
+        rows = max(self.rows_recompressed, 1)
+        return (
+            f"{self.table_name}.{self.column_name} ({self.codec_name}):"
+            f" {self.rows_recompressed} of {self.rows_seen} rows recompressed,"
+            f" {self.bytes_before} -> {self.bytes_after} bytes"
+            f" (ratio {self.compression_ratio:.2f}),"
+            f" decode {self.decode_seconds * 1000 / rows:.3f} ms/row,"
+            f" encode {self.encode_seconds * 1000 / rows:.3f} ms/row"
+        )
+
+
+class JsonColumnCompressionService:
+    """Rewrites the rows of CompressedJSON columns with a given codec."""
+
+    COMPRESSED_JSON_COLUMNS: list[Column] = [
+        ProcessInstanceModel.__table__.c.bpmn_json,
+        SpiffStepDetailsModel.__table__.c.task_json,
+    ]
+
+    @classmethod
+    def recompress_all(
+        cls, codec_name: str, batch_size: int = 500
+    ) -> list[RecompressionStats]:
+        """Recompress_all."""
+        return [
+            cls.recompress_column(column, codec_name, batch_size)
+            for column in cls.COMPRESSED_JSON_COLUMNS
+        ]
+
+    @classmethod
+    def recompress_column(
+        cls, column: Column, codec_name: str, batch_size: int = 500
+    ) -> RecompressionStats:
+        """Recompresses every row of the column that is not already using the codec, one batch per commit.
+
+        This reads and writes the raw bytes so it does not depend on the configured codec.
+        """
+        if codec_name != JsonCodec.LEGACY_CODEC_NAME:
+            JsonCodec.codec_for_name(codec_name)
+
+        table = column.table
+        id_column = table.c.id
+        stats = RecompressionStats(
+            table_name=table.name, column_name=column.name, codec_name=codec_name
+        )
+        update_statement = (
+            table.update()
+            .where(id_column == bindparam("row_id"))
+            .values({column.name: bindparam("data", type_=LargeBinary)})
+        )
+
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(id_column, type_coerce(column, LargeBinary))
+                .where(id_column > last_id, column.isnot(None))
+                .order_by(id_column)
+                .limit(batch_size)
+            ).all()
+            if len(rows) == 0:
+                break
+
+            updates = []
+            for row_id, raw_data in rows:
+                data = bytes(raw_data)
+                stats.rows_seen += 1
+                stats.bytes_before += len(data)
+                if JsonCodec.codec_name_of(data) == codec_name:
+                    stats.bytes_after += len(data)
+                    continue
+
+                start = time.perf_counter()
+                value = JsonCodec.decode(data)
+                stats.decode_seconds += time.perf_counter() - start
+
+                start = time.perf_counter()
+                new_data = JsonCodec.encode(value, codec_name)
+                stats.encode_seconds += time.perf_counter() - start
+
+                stats.bytes_after += len(new_data)
+                stats.rows_recompressed += 1
+                updates.append({"row_id": row_id, "data": new_data})
+
+            if updates:
+                db.session.execute(update_statement, updates)
+            db.session.commit()
+            last_id = rows[-1][0]
+
+        return stats
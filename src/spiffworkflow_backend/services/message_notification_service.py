@@ -0,0 +1,209 @@
+"""Message_notification_service."""
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+from typing import Optional
+
+from flask import current_app
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import supports_skip_locked
+from spiffworkflow_backend.models.message_notification import (
+    MessageNotificationModel,
+)
+
+
+class MessageNotificationQueue(ABC):
+    """Holds the ids of newly committed message instances until a background processor takes them."""
+
+    @abstractmethod
+    def publish(self, message_instance_ids: list[int]) -> None:
+        """Publish."""
+
+    @abstractmethod
+    def take(self, limit: int) -> list[int]:
+        """Removes up to limit of the oldest notifications and returns their message instance ids."""
+
+    @abstractmethod
+    def discard_older_than(self, created_at_in_seconds: int) -> int:
+        """Discard_older_than."""
+
+
+class DatabaseMessageNotificationQueue(MessageNotificationQueue):
+    """Keeps the notifications in the message_notification table so every node can take them."""
+
+    def publish(self, message_instance_ids: list[int]) -> None:
+        """Publish."""
+        db.session.add_all(
+            [
+                MessageNotificationModel(message_instance_id=message_instance_id)
+                for message_instance_id in message_instance_ids
+            ]
+        )
+        db.session.commit()
+
+    def take(self, limit: int) -> list[int]:
+        """Take."""
+        candidate_query = (
+            db.session.query(
+                MessageNotificationModel.id,
+                MessageNotificationModel.message_instance_id,
+            )
+            .order_by(MessageNotificationModel.id)
+            .limit(limit)
+        )
+
+        if supports_skip_locked():
+            rows = candidate_query.with_for_update(skip_locked=True).all()
+            if rows:
+                db.session.query(MessageNotificationModel).filter(
+                    MessageNotificationModel.id.in_([row.id for row in rows])  # type: ignore
+                ).delete(synchronize_session=False)
+            db.session.commit()
+            return [row.message_instance_id for row in rows]
+
+        # whoever deletes a notification first gets to take it
+        message_instance_ids = []
+        for row in candidate_query.all():
+            deleted_count = (
+                db.session.query(MessageNotificationModel)
+                .filter(MessageNotificationModel.id == row.id)
+                .delete(synchronize_session=False)
+            )
+            if deleted_count > 0:
+                message_instance_ids.append(row.message_instance_id)
+        db.session.commit()
+        return message_instance_ids
+
+    def discard_older_than(self, created_at_in_seconds: int) -> int:
+        """Discard_older_than."""
+        discarded_count = (
+            db.session.query(MessageNotificationModel)
+            .filter(
+                MessageNotificationModel.created_at_in_seconds < created_at_in_seconds  # type: ignore
+            )
+            .delete(synchronize_session=False)
+        )
+        db.session.commit()
+        return int(discarded_count)
+
+
+class InMemoryMessageNotificationQueue(MessageNotificationQueue):
+    """Keeps the notifications in this process, so only background processors running in it see them.
+
+    Good enough for a single process and for tests.
+    """
+
+    def __init__(self) -> None:
+        """__init__."""
+        self.lock = threading.Lock()
+        self.notifications: deque[tuple[int, int]] = deque()
+
+    def publish(self, message_instance_ids: list[int]) -> None:
+        """Publish."""
+        created_at_in_seconds = round(time.time())
+        with self.lock:
+            self.notifications.extend(
+                (created_at_in_seconds, message_instance_id)
+                for message_instance_id in message_instance_ids
+            )
+
+    def take(self, limit: int) -> list[int]:
+        """Take."""
+        with self.lock:
+            count = min(limit, len(self.notifications))
+            return [self.notifications.popleft()[1] for _ in range(count)]
+
+    def discard_older_than(self, created_at_in_seconds: int) -> int:
+        """Discard_older_than."""
+        discarded_count = 0
+        with self.lock:
+            while (
+                self.notifications and self.notifications[0][0] < created_at_in_seconds
+            ):
+                self.notifications.popleft()
+                discarded_count += 1
+        return discarded_count
+
+
+class MessageNotificationService:
+    """Lets background processors correlate newly committed message instances right away.
+
+    A notification wakes up the background processor of this process at once. The others find it on the
+    queue, which they check every SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_POLL_SECONDS. A notification
+    that gets lost is harmless since the periodic runs of the background processor still correlate every
+    ready message instance.
+    """
+
+    QUEUE_CLASSES: dict[str, type[MessageNotificationQueue]] = {
+        "database": DatabaseMessageNotificationQueue,
+        "memory": InMemoryMessageNotificationQueue,
+    }
+
+    _queue: Optional[MessageNotificationQueue] = None
+    _queue_lock = threading.Lock()
+    _notified = threading.Event()
+
+    @classmethod
+    def queue(cls) -> Optional[MessageNotificationQueue]:
+        """The queue SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE asks for or None if notifications are off."""
+        queue_type = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_MESSAGE_NOTIFICATION_QUEUE"
+        ]
+        if queue_type not in cls.QUEUE_CLASSES:
+            return None
+        with cls._queue_lock:
+            if cls._queue is None:
+                cls._queue = cls.QUEUE_CLASSES[queue_type]()
+            return cls._queue
+
+    @classmethod
+    def set_queue(cls, queue: Optional[MessageNotificationQueue]) -> None:
+        """Replaces the queue, for example with an InMemoryMessageNotificationQueue in tests."""
+        with cls._queue_lock:
+            cls._queue = queue
+
+    @classmethod
+    def notify(cls, message_instance_ids: list[int]) -> None:
+        """Announces message instances that were committed. Errors are logged instead of raised."""
+        if not message_instance_ids:
+            return
+        queue = cls.queue()
+        if queue is None:
+            return
+        try:
+            queue.publish(message_instance_ids)
+        except Exception:
+            db.session.rollback()
+            current_app.logger.exception(
+                "Could not publish message notifications for message instances"
+                f" {message_instance_ids}. They will be correlated on the next run of"
+                " the background processor."
+            )
+            return
+        cls._notified.set()
+
+    @classmethod
+    def wait_for_notification(cls, timeout: float) -> bool:
+        """Waits up to timeout seconds for a notification from this process and returns whether one came."""
+        notified = cls._notified.wait(timeout)
+        cls._notified.clear()
+        return notified
+
+    @classmethod
+    def take_notified_message_instance_ids(cls, limit: int) -> list[int]:
+        """Take_notified_message_instance_ids."""
+        queue = cls.queue()
+        if queue is None:
+            return []
+        return queue.take(limit)
+
+    @classmethod
+    def discard_notifications_older_than(cls, created_at_in_seconds: int) -> int:
+        """Discard_notifications_older_than."""
+        queue = cls.queue()
+        if queue is None:
+            return 0
+        return queue.discard_older_than(created_at_in_seconds)
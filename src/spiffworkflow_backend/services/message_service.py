@@ -1,8 +1,19 @@
 """Message_service."""
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import and_
+from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy.orm import aliased
+
 from spiffworkflow_backend.models.db import db
 from spiffworkflow_backend.models.message_instance import MessageInstanceModel
 from spiffworkflow_backend.models.message_instance import MessageStatuses
 from spiffworkflow_backend.models.message_instance import MessageTypes
+from spiffworkflow_backend.models.message_instance_correlation import (
+    MessageInstanceCorrelationValueModel,
+)
 from spiffworkflow_backend.models.message_triggerable_process_model import (
     MessageTriggerableProcessModel,
 )
@@ -34,26 +45,30 @@ class MessageService:
         :param message_instance_send:
         :return: the message instance that received this message.
         """
-        # Thread safe via db locking - don't try to progress the same send message over multiple instances
+        # Thread safe via db locking - don't try to progress the same send message over multiple instances.
+        # only whoever moves it from ready to running gets to correlate it.
         if message_instance_send.status != MessageStatuses.ready.value:
             return None
-        message_instance_send.status = MessageStatuses.running.value
-        db.session.add(message_instance_send)
+        claimed_count = (
+            db.session.query(MessageInstanceModel)
+            .filter(
+                MessageInstanceModel.id == message_instance_send.id,
+                MessageInstanceModel.status == MessageStatuses.ready.value,
+            )
+            .update(
+                {MessageInstanceModel.status: MessageStatuses.running.value},
+                synchronize_session=False,
+            )
+        )
         db.session.commit()
+        if claimed_count < 1:
+            return None
 
-        # Find available messages that might match
-        available_receive_messages = MessageInstanceModel.query.filter_by(
-            name=message_instance_send.name,
-            status=MessageStatuses.ready.value,
-            message_type=MessageTypes.receive.value,
-        ).all()
         message_instance_receive: MessageInstanceModel | None = None
         try:
-            for message_instance in available_receive_messages:
-                if message_instance.correlates(
-                    message_instance_send, CustomBpmnScriptEngine()
-                ):
-                    message_instance_receive = message_instance
+            message_instance_receive = cls.find_correlating_receive_message(
+                message_instance_send
+            )
 
             if message_instance_receive is None:
                 # Check for a message triggerable process and start that to create a new message_instance_receive
@@ -119,6 +134,126 @@ class MessageService:
             db.session.commit()
             raise exception
 
+    @classmethod
+    def find_correlating_receive_message(
+        cls, message_instance_send: MessageInstanceModel
+    ) -> MessageInstanceModel | None:
+        """Finds the oldest ready receive message the send message correlates with.
+
+        A receive message correlates if it has the same correlation keys as the send message, or if the
+        correlation values of the send message match all of the correlation values of one of its
+        correlation keys. That is worked out by the database from the stored correlation values.
+        """
+        ready_receive_ids = (
+            db.session.query(MessageInstanceModel.id)
+            .filter_by(
+                name=message_instance_send.name,
+                status=MessageStatuses.ready.value,
+                message_type=MessageTypes.receive.value,
+            )
+            .scalar_subquery()
+        )
+        cls.add_missing_correlation_values(message_instance_send, ready_receive_ids)
+
+        receive_value = aliased(MessageInstanceCorrelationValueModel)
+        send_value = aliased(MessageInstanceCorrelationValueModel)
+        correlating_receive_ids = (
+            db.session.query(receive_value.message_instance_id)
+            .outerjoin(
+                send_value,
+                and_(
+                    send_value.message_instance_id == message_instance_send.id,
+                    send_value.name == receive_value.name,
+                    send_value.retrieval_expression
+                    == receive_value.retrieval_expression,
+                    send_value.value_hash == receive_value.value_hash,
+                ),
+            )
+            .filter(receive_value.message_instance_id.in_(ready_receive_ids))  # type: ignore
+            .group_by(
+                receive_value.message_instance_id, receive_value.correlation_key_name
+            )
+            # rows without a name are not counted so a correlation key without values always matches
+            .having(func.count(receive_value.name) == func.count(send_value.id))
+        )
+        correlates = MessageInstanceModel.id.in_(correlating_receive_ids)  # type: ignore
+        if message_instance_send.correlation_keys_hash is not None:
+            correlates = or_(
+                correlates,
+                MessageInstanceModel.correlation_keys_hash
+                == message_instance_send.correlation_keys_hash,
+            )
+        return (
+            MessageInstanceModel.query.filter_by(
+                name=message_instance_send.name,
+                status=MessageStatuses.ready.value,
+                message_type=MessageTypes.receive.value,
+            )
+            .filter(correlates)
+            .order_by(MessageInstanceModel.id)
+            .first()
+        )
+
+    @classmethod
+    def add_missing_correlation_values(
+        cls, message_instance_send: MessageInstanceModel, ready_receive_ids: Any
+    ) -> None:
+        """Stores the correlation values the matching needs that are not there yet.
+
+        Receive messages queued before correlation values were stored get theirs, and the send message
+        gets values for the retrieval expressions of the receive messages it was not evaluated against,
+        for example since it came in through the api.
+        """
+        receive_messages_without_values = (
+            MessageInstanceModel.query.filter(
+                MessageInstanceModel.id.in_(ready_receive_ids),  # type: ignore
+                ~MessageInstanceModel.correlation_values.any(),
+            )
+        ).all()
+        for message_instance_receive in receive_messages_without_values:
+            message_instance_receive.correlation_keys_hash = (
+                MessageInstanceModel.hash_correlation_keys(
+                    message_instance_receive.correlation_keys
+                )
+            )
+            message_instance_receive.correlation_values = (
+                MessageInstanceCorrelationValueModel.for_receive(
+                    message_instance_receive
+                )
+            )
+            db.session.add(message_instance_receive)
+
+        send_retrieval_expressions = {
+            (correlation_value.name, correlation_value.retrieval_expression)
+            for correlation_value in message_instance_send.correlation_values
+        }
+        missing_retrieval_expressions = [
+            (name, retrieval_expression)
+            for name, retrieval_expression in db.session.query(
+                MessageInstanceCorrelationValueModel.name,
+                MessageInstanceCorrelationValueModel.retrieval_expression,
+            )
+            .filter(
+                MessageInstanceCorrelationValueModel.message_instance_id.in_(  # type: ignore
+                    ready_receive_ids
+                ),
+                MessageInstanceCorrelationValueModel.name.isnot(None),  # type: ignore
+            )
+            .distinct()
+            if (name, retrieval_expression) not in send_retrieval_expressions
+        ]
+        if missing_retrieval_expressions:
+            message_instance_send.correlation_values.extend(
+                MessageInstanceCorrelationValueModel.for_send(
+                    message_instance_send.payload,
+                    missing_retrieval_expressions,
+                    CustomBpmnScriptEngine(),
+                )
+            )
+            db.session.add(message_instance_send)
+        if receive_messages_without_values or missing_retrieval_expressions:
+            db.session.commit()
+
     @classmethod
     def correlate_all_message_instances(cls) -> None:
         """Look at ALL the Send and Receive Messages and attempt to find correlations."""
@@ -129,6 +264,52 @@ class MessageService:
         for message_instance_send in message_instances_send:
             cls.correlate_send_message(message_instance_send)
 
+    @classmethod
+    def correlate_notified_message_instances(
+        cls, message_instance_ids: list[int]
+    ) -> None:
+        """Attempts to correlate what newly committed message instances could correlate with.
+
+        That is the notified send messages and, for notified receive messages, the ready send messages
+        with the same name. A send message that fails is marked as failed and does not stop the others.
+        """
+        notified_message_instances = MessageInstanceModel.query.filter(
+            MessageInstanceModel.id.in_(message_instance_ids),  # type: ignore
+            MessageInstanceModel.status == MessageStatuses.ready.value,
+        ).all()
+        notified_send_ids = [
+            message_instance.id
+            for message_instance in notified_message_instances
+            if message_instance.message_type == MessageTypes.send.value
+        ]
+        notified_receive_names = {
+            message_instance.name
+            for message_instance in notified_message_instances
+            if message_instance.message_type == MessageTypes.receive.value
+        }
+        if not notified_send_ids and not notified_receive_names:
+            return
+
+        message_instances_send = (
+            MessageInstanceModel.query.filter(
+                MessageInstanceModel.message_type == MessageTypes.send.value,
+                MessageInstanceModel.status == MessageStatuses.ready.value,
+                or_(
+                    MessageInstanceModel.id.in_(notified_send_ids),  # type: ignore
+                    MessageInstanceModel.name.in_(notified_receive_names),  # type: ignore
+                ),
+            )
+            .order_by(MessageInstanceModel.id)
+            .all()
+        )
+        for message_instance_send in message_instances_send:
+            try:
+                cls.correlate_send_message(message_instance_send)
+            except Exception:
+                current_app.logger.exception(
+                    f"Could not correlate message instance {message_instance_send.id}"
+                )
+
     @staticmethod
     def start_process_with_message(
         message_triggerable_process_model: MessageTriggerableProcessModel,
@@ -1,11 +1,19 @@
 """Process_instance_processor."""
 import _strptime  # type: ignore
+import copy
 import decimal
+import glob
+import hashlib
 import json
 import logging
+import math
 import os
 import re
+import threading
 import time
+import weakref
+from collections import ChainMap
+from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from typing import Any
@@ -38,6 +46,7 @@ from SpiffWorkflow.bpmn.serializer.workflow import BpmnWorkflowSerializer  # typ
 from SpiffWorkflow.bpmn.specs.BpmnProcessSpec import BpmnProcessSpec  # type: ignore
 from SpiffWorkflow.bpmn.specs.events.EndEvent import EndEvent  # type: ignore
 from SpiffWorkflow.bpmn.specs.events.event_definitions import CancelEventDefinition  # type: ignore
+from SpiffWorkflow.bpmn.specs.events.event_definitions import TimerEventDefinition
 from SpiffWorkflow.bpmn.specs.events.StartEvent import StartEvent  # type: ignore
 from SpiffWorkflow.bpmn.specs.SubWorkflowTask import SubWorkflowTask  # type: ignore
 from SpiffWorkflow.bpmn.workflow import BpmnWorkflow  # type: ignore
@@ -52,9 +61,18 @@ from SpiffWorkflow.task import Task as SpiffTask  # type: ignore
 from SpiffWorkflow.task import TaskState
 from SpiffWorkflow.util.deep_merge import DeepMerge  # type: ignore
 from sqlalchemy import text
+from sqlalchemy.event import listens_for
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
 from spiffworkflow_backend.exceptions.api_error import ApiError
+from spiffworkflow_backend.helpers.compiled_code_cache import CompiledCode
+from spiffworkflow_backend.helpers.compiled_code_cache import CompiledCodeCache
+from spiffworkflow_backend.helpers.json_patch import apply_patch
+from spiffworkflow_backend.helpers.json_patch import make_patch
+from spiffworkflow_backend.helpers.lru_cache import LruCache
 from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.db import upsert
 from spiffworkflow_backend.models.file import File
 from spiffworkflow_backend.models.file import FileType
 from spiffworkflow_backend.models.group import GroupModel
@@ -64,28 +82,47 @@ from spiffworkflow_backend.models.message_instance import MessageInstanceModel
 from spiffworkflow_backend.models.message_instance_correlation import (
     MessageInstanceCorrelationRuleModel,
 )
+from spiffworkflow_backend.models.message_instance_correlation import (
+    MessageInstanceCorrelationValueModel,
+)
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
 from spiffworkflow_backend.models.process_instance_metadata import (
     ProcessInstanceMetadataModel,
 )
 from spiffworkflow_backend.models.process_model import ProcessModelInfo
-from spiffworkflow_backend.models.script_attributes_context import (
-    ScriptAttributesContext,
-)
+from spiffworkflow_backend.models.serialized_bpmn_spec import SerializedBpmnSpecModel
+from spiffworkflow_backend.models.serialized_task import SerializedTaskModel
 from spiffworkflow_backend.models.spec_reference import SpecReferenceCache
 from spiffworkflow_backend.models.spiff_step_details import SpiffStepDetailsModel
 from spiffworkflow_backend.models.user import UserModel
-from spiffworkflow_backend.scripts.script import Script
+from spiffworkflow_backend.models.user_group_assignment import UserGroupAssignmentModel
+from spiffworkflow_backend.scripts.script import AugmentedScriptMethods
 from spiffworkflow_backend.services.custom_parser import MyCustomParser
 from spiffworkflow_backend.services.file_system_service import FileSystemService
+from spiffworkflow_backend.services.message_notification_service import (
+    MessageNotificationService,
+)
 from spiffworkflow_backend.services.process_model_service import ProcessModelService
+from spiffworkflow_backend.services.script_task_executor_service import ScriptChanges
+from spiffworkflow_backend.services.script_task_executor_service import (
+    ScriptTaskExecutionError,
+)
+from spiffworkflow_backend.services.script_task_executor_service import (
+    ScriptTaskExecutorService,
+)
 from spiffworkflow_backend.services.service_task_service import ServiceTaskDelegate
+from spiffworkflow_backend.services.service_task_service import ServiceTaskDispatcher
 from spiffworkflow_backend.services.spec_file_service import SpecFileService
 from spiffworkflow_backend.services.user_service import UserService
 
 SPIFF_SPEC_CONFIG["task_specs"].append(BusinessRuleTaskConverter)
 
+# key in the session info of the specs to cache once the session commits
+SERIALIZED_SPECS_TO_CACHE_KEY = "serialized_specs_to_cache"
+# key in the session info of the processors whose last step snapshot may be of a step that is not committed yet
+STEP_SNAPSHOT_PROCESSORS_KEY = "step_snapshot_processors"
+
 
 # Sorry about all this crap.  I wanted to move this thing to another file, but
 # importing a bunch of types causes circular imports.
@@ -132,6 +169,10 @@ class SpiffStepDetailIsMissingError(Exception):
     pass
 
 
+class EngineStepBudgetExhaustedError(Exception):
+    """Raised before starting an engine task once do_engine_steps has used up its budget."""
+
+
 class BoxedTaskDataBasedScriptEngineEnvironment(BoxedTaskDataEnvironment):  # type: ignore
     def __init__(self, environment_globals: Dict[str, Any]):
         """BoxedTaskDataBasedScriptEngineEnvironment."""
@@ -161,7 +202,9 @@ class BoxedTaskDataBasedScriptEngineEnvironment(BoxedTaskDataEnvironment):  # ty
     def preserve_state(self, bpmn_process_instance: BpmnWorkflow) -> None:
         pass
 
-    def restore_state(self, bpmn_process_instance: BpmnWorkflow) -> None:
+    def restore_state(
+        self, bpmn_process_instance: BpmnWorkflow, copy_state: bool = False
+    ) -> None:
         pass
 
     def finalize_result(self, bpmn_process_instance: BpmnWorkflow) -> None:
@@ -175,13 +218,48 @@ class NonTaskDataBasedScriptEngineEnvironment(BasePythonScriptEngineEnvironment)
     PYTHON_ENVIRONMENT_STATE_KEY = "spiff__python_env_state"
 
     def __init__(self, environment_globals: Dict[str, Any]):
-        """NonTaskDataBasedScriptEngineEnvironment."""
-        self.state: Dict[str, Any] = {}
+        """NonTaskDataBasedScriptEngineEnvironment.
+
+        self.state holds what the scripts that ran defined and is changed in place. It is per thread
+        since the script engine is shared by the processors of every thread in this process.
+        """
+        self._current = threading.local()
         self.non_user_defined_keys = set(
             [*environment_globals.keys()] + ["__builtins__"]
         )
         super().__init__(environment_globals)
 
+    @property
+    def state(self) -> Dict[str, Any]:
+        """The state of the workflow whose state this thread restored last."""
+        if not hasattr(self._current, "state"):
+            self._current.state = {}
+        return self._current.state  # type: ignore
+
+    @state.setter
+    def state(self, state: Dict[str, Any]) -> None:
+        self._current.state = state
+
+    def namespace_for(
+        self,
+        compiled_code: CompiledCode,
+        context: Dict[str, Any],
+        external_methods: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Builds the globals for eval and exec out of only the names the code can refer to.
+
+        Names are looked up in the task data, then the python environment, then the external methods
+        and then the engine globals, the same precedence merging all of them into one dict used to give.
+        Restricted scripts cannot look names up dynamically with globals() or eval so this is all they see.
+        """
+        layers = ChainMap(context, self.state, external_methods or {}, self.globals)
+        namespace = {
+            name: layers[name] for name in compiled_code.names if name in layers
+        }
+        if "__builtins__" in self.globals:
+            namespace["__builtins__"] = self.globals["__builtins__"]
+        return namespace
+
     def evaluate(
         self,
         expression: str,
@@ -190,12 +268,9 @@ class NonTaskDataBasedScriptEngineEnvironment(BasePythonScriptEngineEnvironment)
     ) -> Any:
         # TODO: once integrated look at the tests that fail without Box
         Box.convert_to_box(context)
-        state = {}
-        state.update(self.globals)
-        state.update(external_methods or {})
-        state.update(self.state)
-        state.update(context)
-        return eval(expression, state)  # noqa
+        compiled_code = CompiledCodeCache.compile(expression, "eval")
+        state = self.namespace_for(compiled_code, context, external_methods)
+        return eval(compiled_code.code, state)  # noqa
 
     def execute(
         self,
@@ -205,31 +280,84 @@ class NonTaskDataBasedScriptEngineEnvironment(BasePythonScriptEngineEnvironment)
     ) -> None:
         # TODO: once integrated look at the tests that fail without Box
         Box.convert_to_box(context)
-        self.state.update(self.globals)
-        self.state.update(external_methods or {})
-        self.state.update(context)
+        compiled_code = CompiledCodeCache.compile(script, "exec")
+        namespace = self.namespace_for(compiled_code, context, external_methods)
+        keys_to_filter = self.non_user_defined_keys_for(external_methods)
+
+        # scripts that call augmented or external methods need this process so they always run here
+        if ScriptTaskExecutorService.is_enabled() and compiled_code.names.isdisjoint(
+            external_methods or {}
+        ):
+            user_values = {
+                name: value
+                for name, value in namespace.items()
+                if name in context or name in self.state
+            }
+            try:
+                script_changes = ScriptTaskExecutorService.execute(
+                    script, user_values, keys_to_filter
+                )
+            except ScriptTaskExecutionError as exception:
+                if exception.script_changes is not None:
+                    self.apply_script_changes(
+                        exception.script_changes, context, keys_to_filter
+                    )
+                raise
+            if script_changes is not None:
+                self.apply_script_changes(script_changes, context, keys_to_filter)
+                return
+
+        original_namespace = dict(namespace)
         try:
-            exec(script, self.state)  # noqa
+            exec(compiled_code.code, namespace)  # noqa
         finally:
-            # since the task data is not directly mutated when the script executes, need to determine which keys
-            # have been deleted from the environment and remove them from task data if present.
-            context_keys_to_drop = context.keys() - self.state.keys()
+            self.apply_script_changes(
+                ScriptChanges.between(original_namespace, namespace, keys_to_filter),
+                context,
+                keys_to_filter,
+            )
 
-            for key_to_drop in context_keys_to_drop:
-                context.pop(key_to_drop)
+    def apply_script_changes(
+        self,
+        script_changes: ScriptChanges,
+        context: Dict[str, Any],
+        keys_to_filter: set[str],
+    ) -> None:
+        """Applies the names a script deleted, rebound or added to the state and the task data.
+
+        The state ends up with the user defined task data and script variables and the task data
+        with the state, as before.
+        """
+        # since the task data is not directly mutated when the script executes, need to determine which keys
+        # have been deleted from the environment and remove them from task data if present.
+        for key in script_changes.deleted_keys:
+            context.pop(key, None)
+            self.state.pop(key, None)
 
-            self.state = self.user_defined_state(external_methods)
+        self.state.update(context)
+        for key in keys_to_filter:
+            self.state.pop(key, None)
+        for key in script_changes.dropped_keys:
+            self.state.pop(key, None)
+        self.state.update(script_changes.values)
 
-            # the task data needs to be updated with the current state so data references can be resolved properly.
-            # the state will be removed later once the task is completed.
-            context.update(self.state)
+        # the task data needs to be updated with the current state so data references can be resolved properly.
+        # the state will be removed later once the task is completed.
+        context.update(self.state)
 
-    def user_defined_state(
+    def non_user_defined_keys_for(
         self, external_methods: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        keys_to_filter = self.non_user_defined_keys
+    ) -> set[str]:
+        """Non_user_defined_keys_for."""
+        keys_to_filter = set(self.non_user_defined_keys)
         if external_methods is not None:
             keys_to_filter |= set(external_methods.keys())
+        return keys_to_filter
+
+    def user_defined_state(
+        self, external_methods: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        keys_to_filter = self.non_user_defined_keys_for(external_methods)
 
         return {
             k: v
@@ -248,23 +376,23 @@ class NonTaskDataBasedScriptEngineEnvironment(BasePythonScriptEngineEnvironment)
         state = self.user_defined_state()
         bpmn_process_instance.data[key] = state
 
-    def restore_state(self, bpmn_process_instance: BpmnWorkflow) -> None:
+    def restore_state(
+        self, bpmn_process_instance: BpmnWorkflow, copy_state: bool = False
+    ) -> None:
         key = self.PYTHON_ENVIRONMENT_STATE_KEY
-        self.state = bpmn_process_instance.data.get(key, {})
+        state = bpmn_process_instance.data.get(key, {})
+        # with copy_state running scripts leaves the state stored in the workflow alone
+        self.state = copy.deepcopy(state) if copy_state else state
 
     def finalize_result(self, bpmn_process_instance: BpmnWorkflow) -> None:
         bpmn_process_instance.data.update(self.user_defined_state())
 
     def revise_state_with_task_data(self, task: SpiffTask) -> None:
-        state_keys = set(self.state.keys())
-        task_data_keys = set(task.data.keys())
-        state_keys_to_remove = state_keys - task_data_keys
-        task_data_keys_to_keep = task_data_keys - state_keys
-
-        self.state = {
-            k: v for k, v in self.state.items() if k not in state_keys_to_remove
-        }
-        task.data = {k: v for k, v in task.data.items() if k in task_data_keys_to_keep}
+        state_keys_to_remove = [k for k in self.state if k not in task.data]
+        for key in state_keys_to_remove:
+            del self.state[key]
+        for key in self.state:
+            del task.data[key]
 
         if hasattr(task.task_spec, "_result_variable"):
             result_variable = task.task_spec._result_variable(task)
@@ -283,6 +411,8 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
     scripts directory available for execution.
     """
 
+    AUGMENTED_SCRIPT_METHODS_CACHE_MAX_SIZE = 100
+
     def __init__(self) -> None:
         """__init__."""
         default_globals = {
@@ -308,10 +438,18 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
 
         environment = CustomScriptEngineEnvironment(default_globals)
 
+        # one entry per process instance that ran scripts recently
+        self._augmented_script_methods_cache = LruCache(
+            self.AUGMENTED_SCRIPT_METHODS_CACHE_MAX_SIZE
+        )
+
         super().__init__(environment=environment)
 
     def __get_augment_methods(self, task: SpiffTask) -> Dict[str, Callable]:
-        """__get_augment_methods."""
+        """Returns the shared augmented methods of the current process instance bound to the given task.
+
+        Callers must not change the returned dict.
+        """
         tld = current_app.config["THREAD_LOCAL_DATA"]
 
         if not hasattr(tld, "process_model_identifier"):
@@ -323,15 +461,25 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
                 "Could not find process_instance_id from app config"
             )
 
-        process_model_identifier = tld.process_model_identifier
-        process_instance_id = tld.process_instance_id
-        script_attributes_context = ScriptAttributesContext(
-            task=task,
-            environment_identifier=current_app.config["ENV_IDENTIFIER"],
-            process_instance_id=process_instance_id,
-            process_model_identifier=process_model_identifier,
+        cache_key = (
+            current_app.config["ENV_IDENTIFIER"],
+            tld.process_instance_id,
+            tld.process_model_identifier,
         )
-        return Script.generate_augmented_list(script_attributes_context)
+        augmented_script_methods = self._augmented_script_methods_cache.get(cache_key)
+        if augmented_script_methods is None:
+            augmented_script_methods = AugmentedScriptMethods(*cache_key)
+            self._augmented_script_methods_cache.put(
+                cache_key, augmented_script_methods
+            )
+        augmented_script_methods.bind_task(task)
+        return augmented_script_methods.methods
+
+    def forget_augmented_methods(self, process_instance_id: Optional[int]) -> None:
+        """Drops the augmented methods of the process instance so privileged script permissions are checked again."""
+        for cache_key in self._augmented_script_methods_cache.keys():
+            if cache_key[1] == process_instance_id:
+                self._augmented_script_methods_cache.pop(cache_key)
 
     def evaluate(
         self,
@@ -340,7 +488,11 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
         external_methods: Optional[dict[str, Any]] = None,
     ) -> Any:
         """Evaluate."""
-        return self._evaluate(expression, task.data, task, external_methods)
+        context = task.data
+        # boxing the task data of a workflow read only processors share would change it under them
+        if ProcessInstanceProcessor.is_shared_workflow(task.workflow):
+            context = copy.deepcopy(context)
+        return self._evaluate(expression, context, task, external_methods)
 
     def _evaluate(
         self,
@@ -352,7 +504,7 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
         """_evaluate."""
         methods = self.__get_augment_methods(task)
         if external_methods:
-            methods.update(external_methods)
+            methods = {**methods, **external_methods}
 
         """Evaluate the given expression, within the context of the given task and return the result."""
         try:
@@ -378,13 +530,28 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
         try:
             methods = self.__get_augment_methods(task)
             if external_methods:
-                methods.update(external_methods)
+                methods = {**methods, **external_methods}
             super().execute(task, script, methods)
         except WorkflowException as e:
             raise e
         except Exception as e:
             raise self.create_task_exec_exception(task, script, e) from e
 
+    def create_task_exec_exception(
+        self, task: SpiffTask, script: str, err: Exception
+    ) -> WorkflowTaskException:
+        """Errors from script task processes come with their line number instead of a traceback."""
+        if not isinstance(err, ScriptTaskExecutionError):
+            return super().create_task_exec_exception(task, script, err)
+
+        wte = WorkflowTaskException(
+            f"{err.error_type}:{err.message}", task=task, exception=err
+        )
+        if err.line_number:
+            wte.line_number = err.line_number
+            wte.error_line = script.splitlines()[err.line_number - 1]
+        return wte
+
     def call_service(
         self,
         operation_name: str,
@@ -392,6 +559,13 @@ class CustomBpmnScriptEngine(PythonScriptEngine):  # type: ignore
         task_data: Dict[str, Any],
     ) -> Any:
         """CallService."""
+        service_task_dispatcher = getattr(
+            current_app.config["THREAD_LOCAL_DATA"], "service_task_dispatcher", None
+        )
+        if service_task_dispatcher is not None:
+            return service_task_dispatcher.call_connector(
+                operation_name, operation_params, task_data
+            )
         return ServiceTaskDelegate.call_connector(
             operation_name, operation_params, task_data
         )
@@ -402,6 +576,83 @@ IdToBpmnProcessSpecMapping = NewType(
 )
 
 
+@dataclass
+class SpecCacheEntry:
+    """A parsed process model plus what we need to tell if its call activity dependencies changed."""
+
+    bpmn_process_spec: BpmnProcessSpec
+    subprocesses: IdToBpmnProcessSpecMapping
+    dependency_bpmn_file_paths: set[str]
+    dependency_dmn_file_globs: set[str]
+    dependency_fingerprint: str
+
+
+@dataclass
+class StepSnapshot:
+    """The full task_json of a spiff step and how many deltas were applied to get it from a keyframe."""
+
+    spiff_step: int
+    task_json: dict
+    deltas_since_keyframe: int
+
+
+class SpiffTaskIndex:
+    """The tasks of a workflow grouped by state, by spec name and by whether they are human tasks.
+
+    Built from a single walk of the task tree. Every list keeps the order of BpmnWorkflow.get_tasks.
+    It does not notice changes to the workflow so it has to be thrown away whenever tasks change state.
+    """
+
+    def __init__(self, bpmn_process_instance: BpmnWorkflow) -> None:
+        """__init__."""
+        self.tasks: list[SpiffTask] = bpmn_process_instance.get_tasks(
+            TaskState.ANY_MASK
+        )
+        self.human_tasks: list[SpiffTask] = []
+        self._positions: dict[int, int] = {}
+        self._tasks_by_state: dict[int, list[SpiffTask]] = {}
+        self._human_tasks_by_state: dict[int, list[SpiffTask]] = {}
+        self._tasks_by_spec_name: dict[str, list[SpiffTask]] = {}
+        for position, task in enumerate(self.tasks):
+            self._positions[id(task)] = position
+            self._tasks_by_state.setdefault(task.state, []).append(task)
+            self._tasks_by_spec_name.setdefault(task.task_spec.name, []).append(task)
+            if not bpmn_process_instance._is_engine_task(task.task_spec):
+                self.human_tasks.append(task)
+                self._human_tasks_by_state.setdefault(task.state, []).append(task)
+
+    def tasks_in_state(
+        self, state: int, human_tasks_only: bool = False
+    ) -> list[SpiffTask]:
+        """Returns the tasks in any of the states in the state mask."""
+        tasks_by_state = self._tasks_by_state
+        if human_tasks_only:
+            tasks_by_state = self._human_tasks_by_state
+        matching_lists = [
+            tasks
+            for (task_state, tasks) in tasks_by_state.items()
+            if task_state & state
+        ]
+        if len(matching_lists) == 1:
+            return list(matching_lists[0])
+        return sorted(
+            (task for tasks in matching_lists for task in tasks),
+            key=lambda task: self._positions[id(task)],
+        )
+
+    def tasks_with_spec_name(self, spec_name: str) -> list[SpiffTask]:
+        """Tasks_with_spec_name."""
+        return list(self._tasks_by_spec_name.get(spec_name, []))
+
+
+@dataclass
+class WorkflowCacheEntry:
+    """A deserialized workflow along with the bpmn_json it came from."""
+
+    bpmn_json: str
+    bpmn_process_instance: BpmnWorkflow
+
+
 class ProcessInstanceProcessor:
     """ProcessInstanceProcessor."""
 
@@ -417,13 +668,45 @@ class ProcessInstanceProcessor:
     PROCESS_INSTANCE_ID_KEY = "process_instance_id"
     VALIDATION_PROCESS_KEY = "validate_only"
 
+    # set in bpmn_json when its tasks are stored in serialized_task. changes whenever any task row changes.
+    SERIALIZED_TASK_DIGEST_KEY = "serialized_task_digest"
+
+    # set in bpmn_json to the last_state_change and json size of the data of each finished task with data
+    # so saves only measure the tasks that changed state since.
+    TASK_DATA_SIZES_KEY = "task_data_sizes"
+
+    # Not sure what the number here should be but this now matches the mysql
+    # max_allowed_packet variable on dev - 1073741824
+    TASK_DATA_SIZE_LIMIT = 1024**3
+
+    # per worker caches of parsed specs and of deserialized workflows for read only processors.
+    # created on first use so they can be sized from the app config.
+    _spec_cache: Optional[LruCache] = None
+    _workflow_cache: Optional[LruCache] = None
+    _serialized_spec_cache: Optional[LruCache] = None
+    # the workflows in _workflow_cache, which read only processors share
+    _shared_workflows: weakref.WeakSet = weakref.WeakSet()
+
+    # the process instance locks engine runs in this process are holding, counted by (id, locked_by).
+    # only these are renewed by renew_locks_held_by_this_process so a lock nothing will release still expires.
+    _held_locks: dict[tuple[int, str], int] = {}
+    _held_locks_lock = threading.Lock()
+
     # __init__ calls these helpers:
     #   * get_spec, which returns a spec and any subprocesses (as IdToBpmnProcessSpecMapping dict)
     #   * __get_bpmn_process_instance, which takes spec and subprocesses and instantiates and returns a BpmnWorkflow
     def __init__(
-        self, process_instance_model: ProcessInstanceModel, validate_only: bool = False
+        self,
+        process_instance_model: ProcessInstanceModel,
+        validate_only: bool = False,
+        read_only: bool = False,
     ) -> None:
-        """Create a Workflow Processor based on the serialized information available in the process_instance model."""
+        """Create a Workflow Processor based on the serialized information available in the process_instance model.
+
+        A read_only processor may share its bpmn_process_instance with other read only processors
+        in this worker (see SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES) so it cannot be saved
+        and its workflow must not be modified.
+        """
         tld = current_app.config["THREAD_LOCAL_DATA"]
         tld.process_instance_id = process_instance_model.id
         tld.spiff_step = process_instance_model.spiff_step
@@ -435,6 +718,14 @@ class ProcessInstanceProcessor:
 
         self.process_instance_model = process_instance_model
         self.process_model_service = ProcessModelService()
+        self.read_only = read_only
+        self._last_step_snapshot: Optional[StepSnapshot] = None
+        self.engine_steps_budget_exhausted = False
+        self._task_data_sizes: dict[str, list] = {}
+        self._task_index: Optional[SpiffTaskIndex] = None
+        # announced once save commits this process instance so nothing correlates them with a stale one
+        self._message_instance_ids_to_notify: list[int] = []
+        self.task_data_size = process_instance_model.task_data_size or 0
         bpmn_process_spec = None
         subprocesses: Optional[IdToBpmnProcessSpecMapping] = None
         if process_instance_model.bpmn_json is None:
@@ -451,13 +742,19 @@ class ProcessInstanceProcessor:
         )
 
         try:
-            self.bpmn_process_instance = self.__get_bpmn_process_instance(
-                process_instance_model,
-                bpmn_process_spec,
-                validate_only,
-                subprocesses=subprocesses,
-            )
-            self.set_script_engine(self.bpmn_process_instance)
+            if read_only and process_instance_model.bpmn_json:
+                self.bpmn_process_instance = self.__get_cached_bpmn_process_instance(
+                    process_instance_model
+                )
+            else:
+                self.bpmn_process_instance = self.__get_bpmn_process_instance(
+                    process_instance_model,
+                    bpmn_process_spec,
+                    validate_only,
+                    subprocesses=subprocesses,
+                    task_data_sizes=self._task_data_sizes,
+                )
+            self.set_script_engine(self.bpmn_process_instance, read_only=read_only)
 
         except MissingSpecError as ke:
             raise ApiError(
@@ -503,13 +800,17 @@ class ProcessInstanceProcessor:
         )
 
     @staticmethod
-    def set_script_engine(bpmn_process_instance: BpmnWorkflow) -> None:
+    def set_script_engine(
+        bpmn_process_instance: BpmnWorkflow, read_only: bool = False
+    ) -> None:
+        # the workflow of a read only processor may be shared so it gets a copy of the script engine state
         ProcessInstanceProcessor._script_engine.environment.restore_state(
-            bpmn_process_instance
+            bpmn_process_instance, copy_state=read_only
         )
         bpmn_process_instance.script_engine = ProcessInstanceProcessor._script_engine
 
     def preserve_script_engine_state(self) -> None:
+        self.raise_if_read_only("preserve the script engine state of")
         ProcessInstanceProcessor._script_engine.environment.preserve_state(
             self.bpmn_process_instance
         )
@@ -547,8 +848,12 @@ class ProcessInstanceProcessor:
         spec: Optional[BpmnProcessSpec] = None,
         validate_only: bool = False,
         subprocesses: Optional[IdToBpmnProcessSpecMapping] = None,
+        task_data_sizes: Optional[dict[str, list]] = None,
     ) -> BpmnWorkflow:
-        """__get_bpmn_process_instance."""
+        """__get_bpmn_process_instance.
+
+        If given, task_data_sizes is filled in with the task data sizes stored in the bpmn_json.
+        """
         if process_instance_model.bpmn_json:
             # turn off logging to avoid duplicated spiff logs
             spiff_logger = logging.getLogger("spiff")
@@ -556,9 +861,17 @@ class ProcessInstanceProcessor:
             spiff_logger.setLevel(logging.WARNING)
 
             try:
+                bpmn_json_dict = ProcessInstanceProcessor.bpmn_json_dict(
+                    process_instance_model
+                )
+                stored_task_data_sizes = bpmn_json_dict.pop(
+                    ProcessInstanceProcessor.TASK_DATA_SIZES_KEY, {}
+                )
+                if task_data_sizes is not None:
+                    task_data_sizes.update(stored_task_data_sizes)
                 bpmn_process_instance = (
-                    ProcessInstanceProcessor._serializer.deserialize_json(
-                        process_instance_model.bpmn_json
+                    ProcessInstanceProcessor._serializer.workflow_from_dict(
+                        bpmn_json_dict
                     )
                 )
             except Exception as err:
@@ -578,8 +891,173 @@ class ProcessInstanceProcessor:
             ] = validate_only
         return bpmn_process_instance
 
+    @classmethod
+    def workflow_cache(cls) -> LruCache:
+        """Workflow_cache."""
+        if cls._workflow_cache is None:
+            cls._workflow_cache = LruCache(
+                current_app.config["SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES"]
+            )
+        return cls._workflow_cache
+
+    @classmethod
+    def __get_cached_bpmn_process_instance(
+        cls, process_instance_model: ProcessInstanceModel
+    ) -> BpmnWorkflow:
+        """Returns a shared deserialized workflow for read only processors.
+
+        Entries are keyed by id, spiff_step and updated_at_in_seconds but are only used if
+        the bpmn_json they came from is still the same. Otherwise we deserialize it again.
+        """
+        workflow_cache = cls.workflow_cache()
+        if workflow_cache.max_size <= 0:
+            return cls.__get_bpmn_process_instance(process_instance_model)
+
+        bpmn_json = process_instance_model.bpmn_json
+        cache_key = (
+            process_instance_model.id,
+            process_instance_model.spiff_step,
+            process_instance_model.updated_at_in_seconds,
+            process_instance_model.serialized_bpmn_spec_hash,
+        )
+        cache_entry = workflow_cache.get(
+            cache_key, is_valid=lambda entry: entry.bpmn_json == bpmn_json
+        )
+        if cache_entry is not None:
+            return cache_entry.bpmn_process_instance
+
+        bpmn_process_instance = cls.__get_bpmn_process_instance(process_instance_model)
+        cls._shared_workflows.add(bpmn_process_instance)
+        workflow_cache.put(
+            cache_key,
+            WorkflowCacheEntry(
+                bpmn_json=bpmn_json, bpmn_process_instance=bpmn_process_instance
+            ),
+            weight=len(bpmn_json),
+        )
+        return bpmn_process_instance
+
+    @classmethod
+    def is_shared_workflow(cls, bpmn_process_instance: BpmnWorkflow) -> bool:
+        """Whether the workflow, or the one it is a subprocess of, may be shared by read only processors."""
+        return bpmn_process_instance._get_outermost_workflow() in cls._shared_workflows
+
+    @classmethod
+    def serialized_spec_cache(cls) -> LruCache:
+        """Serialized_spec_cache."""
+        if cls._serialized_spec_cache is None:
+            cls._serialized_spec_cache = LruCache(
+                current_app.config["SPIFFWORKFLOW_BACKEND_SPEC_CACHE_MAX_SIZE"]
+            )
+        return cls._serialized_spec_cache
+
+    @classmethod
+    def get_serialized_spec_dict(cls, spec_hash: str) -> dict:
+        """Returns the spec and subprocess_specs stored under the given hash.
+
+        Rows in serialized_bpmn_spec never change so the parsed dict is cached without any validation.
+        """
+        serialized_spec_cache = cls.serialized_spec_cache()
+        spec_dict = serialized_spec_cache.get(spec_hash)
+        if spec_dict is None:
+            serialized_bpmn_spec = SerializedBpmnSpecModel.query.filter_by(
+                hash=spec_hash
+            ).first()
+            if serialized_bpmn_spec is None:
+                raise ProcessInstanceProcessorError(
+                    f"Could not find serialized bpmn spec with hash: {spec_hash}"
+                )
+            spec_dict = json.loads(
+                serialized_bpmn_spec.spec_json, cls=cls._serializer.json_decoder_cls
+            )
+            serialized_spec_cache.put(spec_hash, spec_dict)
+        return spec_dict
+
+    @classmethod
+    def store_serialized_spec(cls, spec_hash: str, spec_json: str) -> None:
+        """Adds a serialized_bpmn_spec row for the given hash unless there already is one."""
+        serialized_spec_cache = cls.serialized_spec_cache()
+        if serialized_spec_cache.get(spec_hash) is not None:
+            return
+
+        if SerializedBpmnSpecModel.query.filter_by(hash=spec_hash).first() is None:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(
+                        SerializedBpmnSpecModel(hash=spec_hash, spec_json=spec_json)
+                    )
+            except IntegrityError:
+                # another worker stored the same spec first, which is all we wanted
+                pass
+        # only cached once the row is committed. if the transaction is rolled back the cache would
+        # otherwise claim a row that does not exist and the next save would not insert it.
+        specs_to_cache = db.session.info.setdefault(SERIALIZED_SPECS_TO_CACHE_KEY, {})
+        specs_to_cache[spec_hash] = json.loads(
+            spec_json, cls=cls._serializer.json_decoder_cls
+        )
+
+    @classmethod
+    def bpmn_json_dict(cls, process_instance_model: ProcessInstanceModel) -> dict:
+        """Returns the bpmn_json of the process instance as a dict including specs and tasks.
+
+        If the specs are stored in serialized_bpmn_spec or the tasks are stored in serialized_task
+        they are merged back in. The specs may be shared with other callers so they must not be modified.
+        """
+        bpmn_json_dict: dict = json.loads(
+            process_instance_model.bpmn_json or "{}",
+            cls=cls._serializer.json_decoder_cls,
+        )
+        if bpmn_json_dict and process_instance_model.serialized_bpmn_spec_hash:
+            bpmn_json_dict.update(
+                cls.get_serialized_spec_dict(
+                    process_instance_model.serialized_bpmn_spec_hash
+                )
+            )
+        if bpmn_json_dict.pop(cls.SERIALIZED_TASK_DIGEST_KEY, None) is not None:
+            cls.add_serialized_tasks_to_bpmn_json_dict(
+                process_instance_model, bpmn_json_dict
+            )
+        return bpmn_json_dict
+
+    @classmethod
+    def add_serialized_tasks_to_bpmn_json_dict(
+        cls, process_instance_model: ProcessInstanceModel, bpmn_json_dict: dict
+    ) -> None:
+        """Add_serialized_tasks_to_bpmn_json_dict."""
+        bpmn_json_dict["tasks"] = {}
+        for subprocess_dict in bpmn_json_dict["subprocesses"].values():
+            subprocess_dict["tasks"] = {}
+
+        serialized_tasks = (
+            db.session.query(
+                SerializedTaskModel.guid,
+                SerializedTaskModel.bpmn_process_guid,
+                SerializedTaskModel.task_json,
+            )
+            .filter(
+                SerializedTaskModel.process_instance_id == process_instance_model.id
+            )
+            .all()
+        )
+        for guid, bpmn_process_guid, task_json in serialized_tasks:
+            process_dict = bpmn_json_dict
+            if bpmn_process_guid is not None:
+                process_dict = bpmn_json_dict["subprocesses"][bpmn_process_guid]
+            process_dict["tasks"][guid] = json.loads(
+                task_json, cls=cls._serializer.json_decoder_cls
+            )
+
+    def raise_if_read_only(self, action: str) -> None:
+        """Raise_if_read_only."""
+        if self.read_only:
+            raise ProcessInstanceProcessorError(
+                f"Cannot {action} process instance {self.process_instance_model.id}"
+                " with a read only processor."
+            )
+
     def slam_in_data(self, data: dict) -> None:
         """Slam_in_data."""
+        self.raise_if_read_only("change the data of")
         self.bpmn_process_instance.data = DeepMerge.merge(
             self.bpmn_process_instance.data, data
         )
@@ -597,49 +1075,104 @@ class ProcessInstanceProcessor:
         self, task: SpiffTask
     ) -> PotentialOwnerIdList:
         """Get_potential_owner_ids_from_task."""
-        task_spec = task.task_spec
-        task_lane = "process_initiator"
-        if task_spec.lane is not None and task_spec.lane != "":
-            task_lane = task_spec.lane
-
-        potential_owner_ids = []
-        lane_assignment_id = None
-        if re.match(r"(process.?)initiator", task_lane, re.IGNORECASE):
-            potential_owner_ids = [self.process_instance_model.process_initiator_id]
-        elif "lane_owners" in task.data and task_lane in task.data["lane_owners"]:
-            for username in task.data["lane_owners"][task_lane]:
-                lane_owner_user = UserModel.query.filter_by(username=username).first()
-                if lane_owner_user is not None:
-                    potential_owner_ids.append(lane_owner_user.id)
-            self.raise_if_no_potential_owners(
-                potential_owner_ids,
-                (
-                    "No users found in task data lane owner list for lane:"
-                    f" {task_lane}. The user list used:"
-                    f" {task.data['lane_owners'][task_lane]}"
-                ),
+        return self.get_potential_owner_ids_from_tasks([task])[str(task.id)]
+
+    def get_potential_owner_ids_from_tasks(
+        self, tasks: list[SpiffTask]
+    ) -> dict[str, PotentialOwnerIdList]:
+        """Resolves the potential owners of the tasks, keyed by task id, with a fixed number of queries."""
+        lanes_by_task_id: dict[str, str] = {}
+        lane_owner_usernames: set[str] = set()
+        group_identifiers: set[str] = set()
+        for task in tasks:
+            task_spec = task.task_spec
+            task_lane = "process_initiator"
+            if task_spec.lane is not None and task_spec.lane != "":
+                task_lane = task_spec.lane
+            lanes_by_task_id[str(task.id)] = task_lane
+
+            if re.match(r"(process.?)initiator", task_lane, re.IGNORECASE):
+                continue
+            elif "lane_owners" in task.data and task_lane in task.data["lane_owners"]:
+                lane_owner_usernames.update(task.data["lane_owners"][task_lane])
+            else:
+                group_identifiers.add(task_lane)
+
+        user_ids_by_username: dict[str, int] = {}
+        if lane_owner_usernames:
+            user_ids_by_username = dict(
+                db.session.query(UserModel.username, UserModel.id)
+                .filter(UserModel.username.in_(lane_owner_usernames))  # type: ignore
+                .all()
             )
-        else:
-            group_model = GroupModel.query.filter_by(identifier=task_lane).first()
-            if group_model is None:
-                raise (
-                    NoPotentialOwnersForTaskError(
-                        f"Could not find a group with name matching lane: {task_lane}"
+
+        group_ids_by_identifier: dict[str, int] = {}
+        user_ids_by_group_id: dict[int, list[int]] = {}
+        if group_identifiers:
+            groups = (
+                db.session.query(GroupModel.id, GroupModel.identifier)
+                .filter(GroupModel.identifier.in_(group_identifiers))  # type: ignore
+                .order_by(GroupModel.id)
+                .all()
+            )
+            for group_id, group_identifier in groups:
+                group_ids_by_identifier.setdefault(group_identifier, group_id)
+            user_group_assignments = (
+                db.session.query(
+                    UserGroupAssignmentModel.group_id, UserGroupAssignmentModel.user_id
+                )
+                .filter(
+                    UserGroupAssignmentModel.group_id.in_(  # type: ignore
+                        group_ids_by_identifier.values()
                     )
                 )
-            potential_owner_ids = [
-                i.user_id for i in group_model.user_group_assignments
-            ]
-            lane_assignment_id = group_model.id
-            self.raise_if_no_potential_owners(
-                potential_owner_ids,
-                f"Could not find any users in group to assign to lane: {task_lane}",
+                .order_by(UserGroupAssignmentModel.id)
+                .all()
             )
+            for group_id, user_id in user_group_assignments:
+                user_ids_by_group_id.setdefault(group_id, []).append(user_id)
+
+        potential_owners_by_task_id: dict[str, PotentialOwnerIdList] = {}
+        for task in tasks:
+            task_lane = lanes_by_task_id[str(task.id)]
+            potential_owner_ids = []
+            lane_assignment_id = None
+            if re.match(r"(process.?)initiator", task_lane, re.IGNORECASE):
+                potential_owner_ids = [self.process_instance_model.process_initiator_id]
+            elif "lane_owners" in task.data and task_lane in task.data["lane_owners"]:
+                for username in task.data["lane_owners"][task_lane]:
+                    if username in user_ids_by_username:
+                        potential_owner_ids.append(user_ids_by_username[username])
+                self.raise_if_no_potential_owners(
+                    potential_owner_ids,
+                    (
+                        "No users found in task data lane owner list for lane:"
+                        f" {task_lane}. The user list used:"
+                        f" {task.data['lane_owners'][task_lane]}"
+                    ),
+                )
+            else:
+                if task_lane not in group_ids_by_identifier:
+                    raise (
+                        NoPotentialOwnersForTaskError(
+                            "Could not find a group with name matching lane:"
+                            f" {task_lane}"
+                        )
+                    )
+                lane_assignment_id = group_ids_by_identifier[task_lane]
+                potential_owner_ids = list(
+                    user_ids_by_group_id.get(lane_assignment_id, [])
+                )
+                self.raise_if_no_potential_owners(
+                    potential_owner_ids,
+                    f"Could not find any users in group to assign to lane: {task_lane}",
+                )
 
-        return {
-            "potential_owner_ids": potential_owner_ids,
-            "lane_assignment_id": lane_assignment_id,
-        }
+            potential_owners_by_task_id[str(task.id)] = {
+                "potential_owner_ids": potential_owner_ids,
+                "lane_assignment_id": lane_assignment_id,
+            }
+        return potential_owners_by_task_id
 
     def spiff_step_details_mapping(
         self,
@@ -659,12 +1192,16 @@ class ProcessInstanceProcessor:
         if start_in_seconds is None:
             start_in_seconds = time.time()
 
-        task_json = self.get_task_json_from_spiff_task(spiff_task)
+        spiff_step = self.process_instance_model.spiff_step or 1
+        (task_json, base_spiff_step) = self.delta_encode_step_task_json(
+            spiff_step, self.get_task_json_from_spiff_task(spiff_task)
+        )
 
         return {
             "process_instance_id": self.process_instance_model.id,
-            "spiff_step": self.process_instance_model.spiff_step or 1,
+            "spiff_step": spiff_step,
             "task_json": task_json,
+            "base_spiff_step": base_spiff_step,
             "task_id": str(spiff_task.id),
             "task_state": spiff_task.get_state_name(),
             "bpmn_task_identifier": spiff_task.task_spec.name,
@@ -672,6 +1209,122 @@ class ProcessInstanceProcessor:
             "end_in_seconds": end_in_seconds,
         }
 
+    def delta_encode_step_task_json(
+        self, spiff_step: int, task_json: dict
+    ) -> Tuple[Union[dict, list], Optional[int]]:
+        """Returns what to store as the task_json of a step and the step it is a delta against if any.
+
+        Every SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL steps the full task_json is stored as a
+        keyframe. The steps in between store a json patch against the step before them.
+        """
+        keyframe_interval = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL"
+        ]
+        if keyframe_interval <= 1:
+            return (task_json, None)
+
+        # diff what will actually be stored so reconstructing gives back exactly the same json
+        task_json = json.loads(json.dumps(task_json))
+        previous_snapshot = self.previous_step_snapshot(spiff_step)
+        self._last_step_snapshot = StepSnapshot(
+            spiff_step=spiff_step, task_json=task_json, deltas_since_keyframe=0
+        )
+        # the step is only stored once the session commits. if it rolls back instead the snapshot goes too
+        # so the next step is not stored as a delta against a step that does not exist.
+        db.session.info.setdefault(STEP_SNAPSHOT_PROCESSORS_KEY, weakref.WeakSet()).add(
+            self
+        )
+        if (
+            previous_snapshot is None
+            or previous_snapshot.deltas_since_keyframe + 1 >= keyframe_interval
+        ):
+            return (task_json, None)
+
+        patch = make_patch(previous_snapshot.task_json, task_json)
+        if len(json.dumps(patch)) >= len(json.dumps(task_json)):
+            return (task_json, None)
+        self._last_step_snapshot.deltas_since_keyframe = (
+            previous_snapshot.deltas_since_keyframe + 1
+        )
+        return (patch, previous_snapshot.spiff_step)
+
+    def previous_step_snapshot(self, spiff_step: int) -> Optional[StepSnapshot]:
+        """Previous_step_snapshot."""
+        if (
+            self._last_step_snapshot is not None
+            and self._last_step_snapshot.spiff_step < spiff_step
+        ):
+            return self._last_step_snapshot
+
+        step_detail = (
+            SpiffStepDetailsModel.query.filter(
+                SpiffStepDetailsModel.process_instance_id
+                == self.process_instance_model.id,
+                SpiffStepDetailsModel.spiff_step < spiff_step,
+            )
+            .order_by(SpiffStepDetailsModel.spiff_step.desc())  # type: ignore
+            .first()
+        )
+        if step_detail is None:
+            return None
+        return self.step_snapshot(step_detail)
+
+    @classmethod
+    def step_snapshot(cls, step_detail: SpiffStepDetailsModel) -> StepSnapshot:
+        """Returns the full task_json of a step by applying its deltas to the keyframe they start from."""
+        spiff_step = step_detail.spiff_step
+        patches = []
+        while step_detail.base_spiff_step is not None:
+            patches.append(step_detail.task_json)
+            base_step_detail = SpiffStepDetailsModel.query.filter_by(
+                process_instance_id=step_detail.process_instance_id,
+                spiff_step=step_detail.base_spiff_step,
+            ).first()
+            if base_step_detail is None:
+                raise SpiffStepDetailIsMissingError(
+                    f"Cannot find spiff step {step_detail.base_spiff_step} which spiff"
+                    f" step {step_detail.spiff_step} of process instance"
+                    f" {step_detail.process_instance_id} is based on"
+                )
+            step_detail = base_step_detail
+
+        task_json = step_detail.task_json
+        if patches:
+            task_json = copy.deepcopy(task_json)
+            for patch in reversed(patches):
+                task_json = apply_patch(task_json, patch)
+        return StepSnapshot(
+            spiff_step=spiff_step,
+            task_json=task_json,
+            deltas_since_keyframe=len(patches),
+        )
+
+    def replace_step_task_json(
+        self, step_detail: SpiffStepDetailsModel, task_json: dict
+    ) -> None:
+        """Stores task_json as a keyframe for an existing step.
+
+        Steps stored as deltas against it become keyframes first so they still reconstruct the same.
+        """
+        dependent_step_details = SpiffStepDetailsModel.query.filter_by(
+            process_instance_id=step_detail.process_instance_id,
+            base_spiff_step=step_detail.spiff_step,
+        ).all()
+        dependent_task_jsons = [
+            self.step_snapshot(dependent_step_detail).task_json
+            for dependent_step_detail in dependent_step_details
+        ]
+        for dependent_step_detail, dependent_task_json in zip(
+            dependent_step_details, dependent_task_jsons
+        ):
+            dependent_step_detail.task_json = dependent_task_json
+            dependent_step_detail.base_spiff_step = None
+            db.session.add(dependent_step_detail)
+
+        step_detail.task_json = task_json
+        step_detail.base_spiff_step = None
+        self._last_step_snapshot = None
+
     def spiff_step_details(
         self, spiff_task: Optional[SpiffTask] = None
     ) -> SpiffStepDetailsModel:
@@ -681,7 +1334,7 @@ class ProcessInstanceProcessor:
         return details_model
 
     def extract_metadata(self, process_model_info: ProcessModelInfo) -> None:
-        """Extract_metadata."""
+        """Upserts the extracted metadata in one statement, unless it is the same as on the last save."""
         metadata_extraction_paths = process_model_info.metadata_extraction_paths
         if metadata_extraction_paths is None:
             return
@@ -689,6 +1342,7 @@ class ProcessInstanceProcessor:
             return
 
         current_data = self.get_current_data()
+        extracted_metadata = {}
         for metadata_extraction_path in metadata_extraction_paths:
             key = metadata_extraction_path["key"]
             path = metadata_extraction_path["path"]
@@ -702,18 +1356,34 @@ class ProcessInstanceProcessor:
                     break
 
             if data_for_key is not None:
-                pim = ProcessInstanceMetadataModel.query.filter_by(
-                    process_instance_id=self.process_instance_model.id,
-                    key=key,
-                ).first()
-                if pim is None:
-                    pim = ProcessInstanceMetadataModel(
-                        process_instance_id=self.process_instance_model.id,
-                        key=key,
-                    )
-                pim.value = data_for_key
-                db.session.add(pim)
-                db.session.commit()
+                extracted_metadata[key] = data_for_key
+
+        metadata_extraction_hash = hashlib.sha256(
+            json.dumps(extracted_metadata, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        if (
+            metadata_extraction_hash
+            == self.process_instance_model.metadata_extraction_hash
+        ):
+            return
+
+        current_time_in_seconds = round(time.time())
+        upsert(
+            ProcessInstanceMetadataModel,
+            [
+                {
+                    "process_instance_id": self.process_instance_model.id,
+                    "key": key,
+                    "value": value,
+                    "created_at_in_seconds": current_time_in_seconds,
+                    "updated_at_in_seconds": current_time_in_seconds,
+                }
+                for key, value in extracted_metadata.items()
+            ],
+            index_elements=["process_instance_id", "key"],
+            update_columns=["value", "updated_at_in_seconds"],
+        )
+        self.process_instance_model.metadata_extraction_hash = metadata_extraction_hash
 
     # FIXME: Better to move to SpiffWorkflow and traverse the outer_workflows on the spiff_task
     # We may need to add whether a subprocess is a call activity or a subprocess in order to do it properly
@@ -724,7 +1394,7 @@ class ProcessInstanceProcessor:
 
         Rerturns: {process_name: [task_1, task_2, ...], ...}
         """
-        bpmn_json = json.loads(self.process_instance_model.bpmn_json or "{}")
+        bpmn_json = self.bpmn_json_dict(self.process_instance_model)
         processes: dict[str, list[str]] = {bpmn_json["spec"]["name"]: []}
         for task_name, _task_spec in bpmn_json["spec"]["task_specs"].items():
             processes[bpmn_json["spec"]["name"]].append(task_name)
@@ -796,7 +1466,7 @@ class ProcessInstanceProcessor:
         Also note that subprocess_task_id might in fact be a call activity, because spiff treats
         call activities like subprocesses in terms of the serialization.
         """
-        bpmn_json = json.loads(self.process_instance_model.bpmn_json or "{}")
+        bpmn_json = self.bpmn_json_dict(self.process_instance_model)
         spiff_task_json = self.get_all_task_specs(bpmn_json)
 
         subprocesses_by_child_task_ids = {}
@@ -839,13 +1509,69 @@ class ProcessInstanceProcessor:
                 )
         return subprocesses_by_child_task_ids
 
+    def store_bpmn_json(self) -> None:
+        """Sets the bpmn_json of the process instance model to the current state of the workflow.
+
+        Depending on the configuration the serialized_bpmn_spec and serialized_task rows it refers to
+        are added to the session as well. Nothing is committed.
+        """
+        self.raise_if_read_only("store the bpmn_json of")
+        normalize_specs = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_NORMALIZE_SERIALIZED_SPECS"
+        ]
+        persist_tasks_individually = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY"
+        ]
+        if normalize_specs or persist_tasks_individually:
+            (
+                self.process_instance_model.bpmn_json,
+                self.process_instance_model.serialized_bpmn_spec_hash,
+            ) = self.serialize_for_storage(normalize_specs, persist_tasks_individually)
+        else:
+            self.process_instance_model.bpmn_json = self.serialize()
+            self.process_instance_model.serialized_bpmn_spec_hash = None
+        db.session.add(self.process_instance_model)
+
+    def update_task_data(self, task_id: str, task_data: dict) -> bool:
+        """Replaces the data of a task and stores bpmn_json without changing anything else about the instance.
+
+        Returns False if the process instance has no task with the given id. Nothing is committed.
+        """
+        self.raise_if_read_only("update task data for")
+        try:
+            spiff_task = self.bpmn_process_instance.get_task(UUID(task_id))
+        except ValueError:
+            return False
+        if spiff_task is None:
+            return False
+        spiff_task.data = task_data
+        # the data changed without a state change so have the next save measure it again
+        self._task_data_sizes.pop(task_id, None)
+        self.store_bpmn_json()
+        return True
+
     def save(self) -> None:
         """Saves the current state of this processor to the database."""
-        self.process_instance_model.bpmn_json = self.serialize()
+        self.raise_if_read_only("save")
+        # tasks may have been changed directly since the index was built. rebuilding it once here
+        # still saves walking the task tree for every lookup below.
+        self.invalidate_task_index()
+        self.store_bpmn_json()
 
         complete_states = [TaskState.CANCELLED, TaskState.COMPLETED]
         user_tasks = list(self.get_all_user_tasks())
         self.process_instance_model.status = self.get_status().value
+        self.process_instance_model.next_run_at_in_seconds = None
+        if self.process_instance_model.status == ProcessInstanceStatus.waiting.value:
+            self.process_instance_model.next_run_at_in_seconds = (
+                self.next_run_at_in_seconds()
+            )
+        elif (
+            self.process_instance_model.status
+            == ProcessInstanceStatus.user_input_required.value
+            and self.has_ready_engine_tasks()
+        ):
+            self.process_instance_model.next_run_at_in_seconds = round(time.time())
         current_app.logger.debug(
             f"the_status: {self.process_instance_model.status} for instance"
             f" {self.process_instance_model.id}"
@@ -863,11 +1589,13 @@ class ProcessInstanceProcessor:
                 self.process_instance_model.end_in_seconds = round(time.time())
 
         db.session.add(self.process_instance_model)
-        db.session.commit()
 
-        human_tasks = HumanTaskModel.query.filter_by(
+        # everything below is written with the process instance in one transaction
+        human_tasks_by_task_id: dict[str, HumanTaskModel] = {}
+        for human_task in HumanTaskModel.query.filter_by(
             process_instance_id=self.process_instance_model.id, completed=False
-        ).all()
+        ).all():
+            human_tasks_by_task_id[human_task.task_id] = human_task
         ready_or_waiting_tasks = self.get_all_ready_or_waiting_tasks()
 
         process_model_display_name = ""
@@ -879,73 +1607,95 @@ class ProcessInstanceProcessor:
 
         self.extract_metadata(process_model_info)
 
+        new_human_spiff_tasks = []
         for ready_or_waiting_task in ready_or_waiting_tasks:
             # filter out non-usertasks
+            if not self.bpmn_process_instance._is_engine_task(
+                ready_or_waiting_task.task_spec
+            ):
+                if human_tasks_by_task_id.pop(str(ready_or_waiting_task.id), None):
+                    continue
+                new_human_spiff_tasks.append(ready_or_waiting_task)
+
+        try:
+            potential_owners_by_task_id = self.get_potential_owner_ids_from_tasks(
+                new_human_spiff_tasks
+            )
+        except NoPotentialOwnersForTaskError:
+            # nothing is committed yet so do not leave the changes above in the session either
+            db.session.rollback()
+            raise
+        new_human_tasks = []
+        step_details = []
+        for ready_or_waiting_task in new_human_spiff_tasks:
             task_spec = ready_or_waiting_task.task_spec
-            if not self.bpmn_process_instance._is_engine_task(task_spec):
-                potential_owner_hash = self.get_potential_owner_ids_from_task(
-                    ready_or_waiting_task
-                )
-                extensions = task_spec.extensions
-
-                # in the xml, it's the id attribute. this identifies the process where the activity lives.
-                # if it's in a subprocess, it's the inner process.
-                bpmn_process_identifier = ready_or_waiting_task.workflow.name
-
-                form_file_name = None
-                ui_form_file_name = None
-                if "properties" in extensions:
-                    properties = extensions["properties"]
-                    if "formJsonSchemaFilename" in properties:
-                        form_file_name = properties["formJsonSchemaFilename"]
-                    if "formUiSchemaFilename" in properties:
-                        ui_form_file_name = properties["formUiSchemaFilename"]
-
-                human_task = None
-                for at in human_tasks:
-                    if at.task_id == str(ready_or_waiting_task.id):
-                        human_task = at
-                        human_tasks.remove(at)
-
-                if human_task is None:
-                    human_task = HumanTaskModel(
+            extensions = task_spec.extensions
+
+            # in the xml, it's the id attribute. this identifies the process where the activity lives.
+            # if it's in a subprocess, it's the inner process.
+            bpmn_process_identifier = ready_or_waiting_task.workflow.name
+
+            form_file_name = None
+            ui_form_file_name = None
+            if "properties" in extensions:
+                properties = extensions["properties"]
+                if "formJsonSchemaFilename" in properties:
+                    form_file_name = properties["formJsonSchemaFilename"]
+                if "formUiSchemaFilename" in properties:
+                    ui_form_file_name = properties["formUiSchemaFilename"]
+
+            potential_owner_hash = potential_owners_by_task_id[
+                str(ready_or_waiting_task.id)
+            ]
+            new_human_tasks.append(
+                (
+                    HumanTaskModel(
                         process_instance_id=self.process_instance_model.id,
                         process_model_display_name=process_model_display_name,
                         bpmn_process_identifier=bpmn_process_identifier,
                         form_file_name=form_file_name,
                         ui_form_file_name=ui_form_file_name,
                         task_id=str(ready_or_waiting_task.id),
-                        task_name=ready_or_waiting_task.task_spec.name,
-                        task_title=ready_or_waiting_task.task_spec.description,
-                        task_type=ready_or_waiting_task.task_spec.__class__.__name__,
+                        task_name=task_spec.name,
+                        task_title=task_spec.description,
+                        task_type=task_spec.__class__.__name__,
                         task_status=ready_or_waiting_task.get_state_name(),
                         lane_assignment_id=potential_owner_hash["lane_assignment_id"],
-                    )
-                    db.session.add(human_task)
+                    ),
+                    potential_owner_hash["potential_owner_ids"],
+                )
+            )
 
-                    for potential_owner_id in potential_owner_hash[
-                        "potential_owner_ids"
-                    ]:
-                        human_task_user = HumanTaskUserModel(
-                            user_id=potential_owner_id, human_task=human_task
-                        )
-                        db.session.add(human_task_user)
+            self.increment_spiff_step()
+            step_details.append(
+                self.spiff_step_details_mapping(
+                    spiff_task=ready_or_waiting_task, start_in_seconds=time.time()
+                )
+            )
 
-                    self.increment_spiff_step()
-                    spiff_step_detail_mapping = self.spiff_step_details_mapping(
-                        spiff_task=ready_or_waiting_task, start_in_seconds=time.time()
-                    )
-                    spiff_step_detail = SpiffStepDetailsModel(
-                        **spiff_step_detail_mapping
-                    )
-                    db.session.add(spiff_step_detail)
-                    db.session.commit()
+        if new_human_tasks:
+            db.session.add_all([human_task for (human_task, _) in new_human_tasks])
+            # flush to get the human task ids the human task users point to
+            db.session.flush()
+            db.session.bulk_insert_mappings(
+                HumanTaskUserModel,
+                [
+                    {"human_task_id": human_task.id, "user_id": potential_owner_id}
+                    for (human_task, potential_owner_ids) in new_human_tasks
+                    for potential_owner_id in potential_owner_ids
+                ],
+            )
+            db.session.bulk_insert_mappings(SpiffStepDetailsModel, step_details)
 
-        if len(human_tasks) > 0:
-            for at in human_tasks:
-                at.completed = True
-                db.session.add(at)
-            db.session.commit()
+        # human tasks that are no longer ready or waiting were completed some other way
+        for human_task in human_tasks_by_task_id.values():
+            human_task.completed = True
+            db.session.add(human_task)
+        db.session.commit()
+
+        message_instance_ids = self._message_instance_ids_to_notify
+        self._message_instance_ids_to_notify = []
+        MessageNotificationService.notify(message_instance_ids)
 
     def serialize_task_spec(self, task_spec: SpiffTask) -> Any:
         """Get a serialized version of a task spec."""
@@ -955,6 +1705,7 @@ class ProcessInstanceProcessor:
 
     def send_bpmn_event(self, event_data: dict[str, Any]) -> None:
         """Send an event to the workflow."""
+        self.raise_if_read_only("send an event to")
         payload = event_data.pop("payload", None)
         event_definition = self._event_serializer.registry.restore(event_data)
         if payload is not None:
@@ -967,17 +1718,22 @@ class ProcessInstanceProcessor:
             self.bpmn_process_instance.catch(event_definition)
         except Exception as e:
             print(e)
+        self.invalidate_task_index()
         self.do_engine_steps(save=True)
 
     def add_step(self, step: Union[dict, None] = None) -> None:
         """Add a spiff step."""
         if step is None:
             step = self.spiff_step_details_mapping()
+        else:
+            # a step given to us is stored as is so it cannot be the base of the next delta
+            self._last_step_snapshot = None
         db.session.add(SpiffStepDetailsModel(**step))
         db.session.commit()
 
     def manual_complete_task(self, task_id: str, execute: bool) -> None:
         """Mark the task complete optionally executing it."""
+        self.raise_if_read_only("complete a task of")
         spiff_task = self.bpmn_process_instance.get_task(UUID(task_id))
         if execute:
             current_app.logger.info(
@@ -1024,6 +1780,7 @@ class ProcessInstanceProcessor:
 
     def reset_process(self, spiff_step: int) -> None:
         """Reset a process to an earlier state."""
+        self.raise_if_read_only("reset")
         spiff_logger = logging.getLogger("spiff")
         spiff_logger.info(
             f"Process reset from step {spiff_step}",
@@ -1040,20 +1797,22 @@ class ProcessInstanceProcessor:
             .first()
         )
         if step_detail is not None:
+            step_task_json = self.step_snapshot(step_detail).task_json
             self.increment_spiff_step()
             self.add_step(
                 {
                     "process_instance_id": self.process_instance_model.id,
                     "spiff_step": self.process_instance_model.spiff_step or 1,
-                    "task_json": step_detail.task_json,
+                    "task_json": step_task_json,
                     "timestamp": round(time.time()),
                 }
             )
 
             dct = self._serializer.workflow_to_dict(self.bpmn_process_instance)
-            dct["tasks"] = step_detail.task_json["tasks"]
-            dct["subprocesses"] = step_detail.task_json["subprocesses"]
+            dct["tasks"] = step_task_json["tasks"]
+            dct["subprocesses"] = step_task_json["subprocesses"]
             self.bpmn_process_instance = self._serializer.workflow_from_dict(dct)
+            self.invalidate_task_index()
 
             # Cascade does not seems to work on filters, only directly through the session
             tasks = self.bpmn_process_instance.get_tasks(TaskState.NOT_FINISHED_MASK)
@@ -1136,8 +1895,14 @@ class ProcessInstanceProcessor:
     def update_spiff_parser_with_all_process_dependency_files(
         parser: BpmnDmnParser,
         processed_identifiers: Optional[set[str]] = None,
+        dependency_bpmn_file_paths: Optional[set[str]] = None,
+        dependency_dmn_file_globs: Optional[set[str]] = None,
     ) -> None:
-        """Update_spiff_parser_with_all_process_dependency_files."""
+        """Update_spiff_parser_with_all_process_dependency_files.
+
+        If dependency_bpmn_file_paths and dependency_dmn_file_globs are given, they are filled in
+        with every file that was added to the parser so callers can tell when they change.
+        """
         if processed_identifiers is None:
             processed_identifiers = set()
         processor_dependencies = parser.get_process_dependencies()
@@ -1163,33 +1928,102 @@ class ProcessInstanceProcessor:
             )
             parser.add_dmn_files_by_glob(dmn_file_glob)
             processed_identifiers.add(bpmn_process_identifier)
+            if dependency_dmn_file_globs is not None:
+                dependency_dmn_file_globs.add(dmn_file_glob)
+
+        if dependency_bpmn_file_paths is not None:
+            dependency_bpmn_file_paths.update(new_bpmn_files)
 
         if new_bpmn_files:
             parser.add_bpmn_files(new_bpmn_files)
             ProcessInstanceProcessor.update_spiff_parser_with_all_process_dependency_files(
-                parser, processed_identifiers
+                parser,
+                processed_identifiers,
+                dependency_bpmn_file_paths,
+                dependency_dmn_file_globs,
             )
 
+    @classmethod
+    def spec_cache(cls) -> LruCache:
+        """Spec_cache."""
+        if cls._spec_cache is None:
+            cls._spec_cache = LruCache(
+                current_app.config["SPIFFWORKFLOW_BACKEND_SPEC_CACHE_MAX_SIZE"]
+            )
+        return cls._spec_cache
+
+    @staticmethod
+    def fingerprint_file_contents(file_contents_by_name: dict[str, bytes]) -> str:
+        """Returns a hash of the given file names and their contents."""
+        sha = hashlib.sha256()
+        for file_name in sorted(file_contents_by_name.keys()):
+            sha.update(file_name.encode())
+            sha.update(hashlib.sha256(file_contents_by_name[file_name]).digest())
+        return sha.hexdigest()
+
+    @classmethod
+    def dependency_fingerprint(
+        cls, bpmn_file_paths: set[str], dmn_file_globs: set[str]
+    ) -> str:
+        """Fingerprints the call activity dependency files of a process model as they are right now."""
+        file_paths = set(bpmn_file_paths)
+        for dmn_file_glob in dmn_file_globs:
+            file_paths.update(glob.glob(dmn_file_glob))
+
+        file_contents_by_name = {}
+        for file_path in file_paths:
+            # a missing file drops out of the fingerprint which makes it differ from the cached one
+            if os.path.isfile(file_path):
+                with open(file_path, "rb") as f_handle:
+                    file_contents_by_name[file_path] = f_handle.read()
+        return cls.fingerprint_file_contents(file_contents_by_name)
+
     @staticmethod
     def get_spec(
         files: List[File], process_model_info: ProcessModelInfo
     ) -> Tuple[BpmnProcessSpec, IdToBpmnProcessSpecMapping]:
-        """Returns a SpiffWorkflow specification for the given process_instance spec, using the files provided."""
-        parser = ProcessInstanceProcessor.get_parser()
+        """Returns a SpiffWorkflow specification for the given process_instance spec, using the files provided.
 
+        Parsed specs are cached per worker and keyed by the process model id and the contents of its
+        bpmn and dmn files. The files of any call activity dependencies are checked on every cache hit.
+        """
+        file_contents_by_name = {}
         for file in files:
-            data = SpecFileService.get_data(process_model_info, file.name)
+            if file.type in [FileType.bpmn.value, FileType.dmn.value]:
+                file_contents_by_name[file.name] = SpecFileService.get_data(
+                    process_model_info, file.name
+                )
+
+        spec_cache = ProcessInstanceProcessor.spec_cache()
+        cache_key = (
+            process_model_info.id,
+            process_model_info.primary_process_id,
+            ProcessInstanceProcessor.fingerprint_file_contents(file_contents_by_name),
+        )
+        cache_entry = spec_cache.get(
+            cache_key,
+            is_valid=lambda entry: entry.dependency_fingerprint
+            == ProcessInstanceProcessor.dependency_fingerprint(
+                entry.dependency_bpmn_file_paths, entry.dependency_dmn_file_globs
+            ),
+        )
+        if cache_entry is not None:
+            return (cache_entry.bpmn_process_spec, cache_entry.subprocesses)
+
+        parser = ProcessInstanceProcessor.get_parser()
+
+        for file_name, data in file_contents_by_name.items():
             try:
-                if file.type == FileType.bpmn.value:
+                if file_name.endswith(f".{FileType.bpmn.value}"):
                     bpmn: etree.Element = SpecFileService.get_etree_from_xml_bytes(data)
-                    parser.add_bpmn_xml(bpmn, filename=file.name)
-                elif file.type == FileType.dmn.value:
+                    parser.add_bpmn_xml(bpmn, filename=file_name)
+                else:
                     dmn: etree.Element = SpecFileService.get_etree_from_xml_bytes(data)
-                    parser.add_dmn_xml(dmn, filename=file.name)
+                    parser.add_dmn_xml(dmn, filename=file_name)
             except XMLSyntaxError as xse:
                 raise ApiError(
                     error_code="invalid_xml",
-                    message=f"'{file.name}' is not a valid xml file." + str(xse),
+                    message=f"'{file_name}' is not a valid xml file." + str(xse),
                 ) from xse
         if (
             process_model_info.primary_process_id is None
@@ -1205,8 +2039,12 @@ class ProcessInstanceProcessor:
                     % process_model_info.id,
                 )
             )
+        dependency_bpmn_file_paths: set[str] = set()
+        dependency_dmn_file_globs: set[str] = set()
         ProcessInstanceProcessor.update_spiff_parser_with_all_process_dependency_files(
-            parser
+            parser,
+            dependency_bpmn_file_paths=dependency_bpmn_file_paths,
+            dependency_dmn_file_globs=dependency_dmn_file_globs,
         )
 
         try:
@@ -1226,14 +2064,32 @@ class ProcessInstanceProcessor:
                 task_id=ve.id,
                 tag=ve.tag,
             ) from ve
+
+        spec_cache.put(
+            cache_key,
+            SpecCacheEntry(
+                bpmn_process_spec=bpmn_process_spec,
+                subprocesses=subprocesses,
+                dependency_bpmn_file_paths=dependency_bpmn_file_paths,
+                dependency_dmn_file_globs=dependency_dmn_file_globs,
+                dependency_fingerprint=ProcessInstanceProcessor.dependency_fingerprint(
+                    dependency_bpmn_file_paths, dependency_dmn_file_globs
+                ),
+            ),
+        )
         return (bpmn_process_spec, subprocesses)
 
     @staticmethod
-    def status_of(bpmn_process_instance: BpmnWorkflow) -> ProcessInstanceStatus:
+    def status_of(
+        bpmn_process_instance: BpmnWorkflow,
+        ready_user_tasks: Optional[list[SpiffTask]] = None,
+    ) -> ProcessInstanceStatus:
         """Status_of."""
         if bpmn_process_instance.is_completed():
             return ProcessInstanceStatus.complete
-        user_tasks = bpmn_process_instance.get_ready_user_tasks()
+        user_tasks = ready_user_tasks
+        if user_tasks is None:
+            user_tasks = bpmn_process_instance.get_ready_user_tasks()
 
         # if the process instance has status "waiting" it will get picked up
         # by background processing. when that happens it can potentially overwrite
@@ -1247,25 +2103,100 @@ class ProcessInstanceProcessor:
         else:
             return ProcessInstanceStatus.waiting
 
+    def has_ready_engine_tasks(self) -> bool:
+        """Has_ready_engine_tasks."""
+        return any(
+            self.bpmn_process_instance._is_engine_task(ready_task.task_spec)
+            for ready_task in self.task_index().tasks_in_state(TaskState.READY)
+        )
+
+    def next_run_at_in_seconds(self) -> Optional[int]:
+        """The earliest time running the engine steps again could make progress.
+
+        Ready engine tasks can run now and waiting timers can run once they are due. Tasks waiting on
+        messages or signals are moved along by whatever sends those, and other waiting tasks like joins
+        and call activities only wait on the tasks after them. Returns None if no time will do.
+        """
+        now_in_seconds = round(time.time())
+        if self.has_ready_engine_tasks():
+            return now_in_seconds
+
+        next_run_at_in_seconds = None
+        for waiting_task in self.task_index().tasks_in_state(TaskState.WAITING):
+            event_definition = getattr(waiting_task.task_spec, "event_definition", None)
+            if not isinstance(event_definition, TimerEventDefinition):
+                continue
+            due_at_in_seconds = self.timer_due_at_in_seconds(waiting_task)
+            if due_at_in_seconds is None:
+                return now_in_seconds
+            if (
+                next_run_at_in_seconds is None
+                or due_at_in_seconds < next_run_at_in_seconds
+            ):
+                next_run_at_in_seconds = due_at_in_seconds
+        return next_run_at_in_seconds
+
+    @staticmethod
+    def timer_due_at_in_seconds(spiff_task: SpiffTask) -> Optional[int]:
+        """When the timer a task is waiting on fires, from the value the timer stored when it started waiting.
+
+        Time date timers store the date, duration timers their end and cycle timers their next
+        time. Returns None if the value is missing or not understood so the timer is looked at right away.
+        """
+        event_value = spiff_task._get_internal_data("event_value")
+        if isinstance(event_value, dict):
+            event_value = event_value.get("next", event_value.get("end"))
+        if not isinstance(event_value, str):
+            return None
+        try:
+            due_at = datetime.fromisoformat(event_value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if due_at.tzinfo is None:
+            due_at = due_at.replace(tzinfo=pytz.utc)
+        # the timer only fires once its time has passed so rounding down would run it too early
+        return math.ceil(due_at.timestamp())
+
+    def task_index(self) -> SpiffTaskIndex:
+        """Returns the index of the tasks of bpmn_process_instance, building it if it was invalidated."""
+        if self._task_index is None:
+            self._task_index = SpiffTaskIndex(self.bpmn_process_instance)
+        return self._task_index
+
+    def invalidate_task_index(self) -> None:
+        """Needs to be called after anything changes the state of tasks without going through this processor."""
+        self._task_index = None
+
     def get_status(self) -> ProcessInstanceStatus:
         """Get_status."""
-        the_status = self.status_of(self.bpmn_process_instance)
+        the_status = self.status_of(
+            self.bpmn_process_instance, self.get_ready_user_tasks()
+        )
         # current_app.logger.debug(f"the_status: {the_status} for instance {self.process_instance_model.id}")
         return the_status
 
     # inspiration from https://github.com/collectiveidea/delayed_job_active_record/blob/master/lib/delayed/backend/active_record.rb
-    # could consider borrowing their "cleanup all my locks when the app quits" idea as well and
-    #   implement via https://docs.python.org/3/library/atexit.html
-    def lock_process_instance(self, lock_prefix: str) -> None:
-        locked_by = f"{lock_prefix}_{current_app.config['PROCESS_UUID']}"
-        current_time_in_seconds = round(time.time())
-        lock_expiry_in_seconds = (
-            current_time_in_seconds
-            - current_app.config[
+    # whatever runs the background processor renews the locks engine runs in its process hold with a heartbeat and the
+    #   background worker releases them when it stops. see renew_locks_held_by_this_process.
+    @staticmethod
+    def lock_owner(lock_prefix: str) -> str:
+        """What locked_by is set to when this process locks a process instance with the given prefix."""
+        return f"{lock_prefix}_{current_app.config['PROCESS_UUID']}"
+
+    @staticmethod
+    def lock_expiry_in_seconds(current_time_in_seconds: int) -> int:
+        """Locks taken before this time may be confiscated."""
+        return current_time_in_seconds - int(
+            current_app.config[
                 "SPIFFWORKFLOW_BACKEND_ALLOW_CONFISCATING_LOCK_AFTER_SECONDS"
             ]
         )
 
+    def lock_process_instance(self, lock_prefix: str) -> None:
+        locked_by = self.lock_owner(lock_prefix)
+        current_time_in_seconds = round(time.time())
+        lock_expiry_in_seconds = self.lock_expiry_in_seconds(current_time_in_seconds)
+
         query_text = text(
             "UPDATE process_instance SET locked_at_in_seconds ="
             " :current_time_in_seconds, locked_by = :locked_by where id = :id AND"
@@ -1287,9 +2218,11 @@ class ProcessInstanceProcessor:
                 f"Cannot lock process instance {self.process_instance_model.id}. "
                 "It has already been locked."
             )
+        self.hold_lock(self.process_instance_model.id, locked_by)
 
     def unlock_process_instance(self, lock_prefix: str) -> None:
-        locked_by = f"{lock_prefix}_{current_app.config['PROCESS_UUID']}"
+        locked_by = self.lock_owner(lock_prefix)
+        self.let_go_of_lock(self.process_instance_model.id, locked_by)
         if self.process_instance_model.locked_by != locked_by:
             raise ProcessInstanceLockedBySomethingElseError(
                 f"Cannot unlock process instance {self.process_instance_model.id}."
@@ -1301,8 +2234,108 @@ class ProcessInstanceProcessor:
         db.session.add(self.process_instance_model)
         db.session.commit()
 
+    @classmethod
+    def hold_lock(cls, process_instance_id: int, locked_by: str) -> None:
+        """Registers a lock an engine run in this process has taken so the heartbeat renews it."""
+        with cls._held_locks_lock:
+            key = (process_instance_id, locked_by)
+            cls._held_locks[key] = cls._held_locks.get(key, 0) + 1
+
+    @classmethod
+    def let_go_of_lock(cls, process_instance_id: int, locked_by: str) -> None:
+        """Undoes one hold_lock once the engine run is done with the lock, whether or not it still has it."""
+        with cls._held_locks_lock:
+            key = (process_instance_id, locked_by)
+            held_count = cls._held_locks.get(key, 0) - 1
+            if held_count > 0:
+                cls._held_locks[key] = held_count
+            else:
+                cls._held_locks.pop(key, None)
+
+    @classmethod
+    def renew_process_instance_lock(
+        cls, process_instance_id: int, lock_prefix: str
+    ) -> bool:
+        """Sets locked_at_in_seconds of a process instance this process has locked to now.
+
+        Returns False if the lock was confiscated since it was taken, in which case something else may be
+        running the process instance.
+        """
+        renewed_count = (
+            db.session.query(ProcessInstanceModel)
+            .filter(
+                ProcessInstanceModel.id == process_instance_id,
+                ProcessInstanceModel.locked_by == cls.lock_owner(lock_prefix),
+            )
+            .update(
+                {ProcessInstanceModel.locked_at_in_seconds: round(time.time())},
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        return renewed_count > 0
+
+    @classmethod
+    def renew_locks_held_by_this_process(cls, lock_prefixes: list[str]) -> int:
+        """Sets locked_at_in_seconds of the process instances engine runs in this process hold to now.
+
+        Run regularly this keeps long engine runs from having their process instance confiscated while
+        the locks of a process that died, or that were never released, still expire. Returns how many
+        locks were renewed.
+        """
+        renewed_count = 0
+        for lock_prefix in lock_prefixes:
+            locked_by = cls.lock_owner(lock_prefix)
+            with cls._held_locks_lock:
+                process_instance_ids = [
+                    process_instance_id
+                    for (process_instance_id, held_by) in cls._held_locks
+                    if held_by == locked_by
+                ]
+            if not process_instance_ids:
+                continue
+            renewed_count += (
+                db.session.query(ProcessInstanceModel)
+                .filter(
+                    ProcessInstanceModel.id.in_(process_instance_ids),  # type: ignore
+                    ProcessInstanceModel.locked_by == locked_by,
+                )
+                .update(
+                    {ProcessInstanceModel.locked_at_in_seconds: round(time.time())},
+                    synchronize_session=False,
+                )
+            )
+        db.session.commit()
+        return int(renewed_count)
+
+    @classmethod
+    def release_locks_held_by_this_process(cls, lock_prefixes: list[str]) -> int:
+        """Unlocks the process instances this process has locked. Only safe once nothing here is running them."""
+        locked_by_values = [
+            cls.lock_owner(lock_prefix) for lock_prefix in lock_prefixes
+        ]
+        with cls._held_locks_lock:
+            for key in [key for key in cls._held_locks if key[1] in locked_by_values]:
+                del cls._held_locks[key]
+        released_count = (
+            db.session.query(ProcessInstanceModel)
+            .filter(
+                ProcessInstanceModel.locked_by.in_(locked_by_values)  # type: ignore
+            )
+            .update(
+                {
+                    ProcessInstanceModel.locked_by: None,
+                    ProcessInstanceModel.locked_at_in_seconds: None,
+                },
+                synchronize_session=False,
+            )
+        )
+        db.session.commit()
+        return int(released_count)
+
     def process_bpmn_messages(self) -> None:
         """Process_bpmn_messages."""
+        self.raise_if_read_only("process the messages of")
         bpmn_messages = self.bpmn_process_instance.get_bpmn_messages()
         for bpmn_message in bpmn_messages:
             message_instance = MessageInstanceModel(
@@ -1313,11 +2346,29 @@ class ProcessInstanceProcessor:
                 payload=bpmn_message.payload,
                 correlation_keys=self.bpmn_process_instance.correlations,
             )
+            # evaluated once here so correlating the message is a lookup
+            message_instance.correlation_values = (
+                MessageInstanceCorrelationValueModel.for_send(
+                    bpmn_message.payload,
+                    [
+                        (
+                            correlation_property.name,
+                            correlation_property.retrieval_expression,
+                        )
+                        for correlation_property in getattr(
+                            bpmn_message, "correlation_properties", []
+                        )
+                    ],
+                    self._script_engine,
+                )
+            )
             db.session.add(message_instance)
             db.session.commit()
+            self._message_instance_ids_to_notify.append(message_instance.id)
 
     def queue_waiting_receive_messages(self) -> None:
         """Queue_waiting_receive_messages."""
+        self.raise_if_read_only("queue the receive messages of")
         waiting_events = self.bpmn_process_instance.waiting_events()
         waiting_message_events = filter(
             lambda e: e["event_type"] == "Message", waiting_events
@@ -1350,8 +2401,12 @@ class ProcessInstanceProcessor:
                     retrieval_expression=correlation_property.retrieval_expression,
                 )
                 message_instance.correlation_rules.append(message_correlation)
+            message_instance.correlation_values = (
+                MessageInstanceCorrelationValueModel.for_receive(message_instance)
+            )
             db.session.add(message_instance)
             db.session.commit()
+            self._message_instance_ids_to_notify.append(message_instance.id)
 
     def increment_spiff_step(self) -> None:
         """Spiff_step++."""
@@ -1372,9 +2427,39 @@ class ProcessInstanceProcessor:
             self._do_engine_steps(exit_at=exit_at, save=save)
         pr.print_stats(sort=SortKey.CUMULATIVE)
 
-    def do_engine_steps(self, exit_at: None = None, save: bool = False) -> None:
-        """Do_engine_steps."""
+    def do_engine_steps(
+        self, exit_at: None = None, save: bool = False, budgeted: bool = False
+    ) -> None:
+        """Do_engine_steps.
+
+        If budgeted, stops starting engine tasks once SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS tasks
+        have completed or SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_SECONDS have passed. Saving then
+        sets next_run_at_in_seconds so the background processor finishes the remaining engine tasks, and
+        the status stays user_input_required if a user task is ready.
+        Service tasks whose connector requests were already sent are always run.
+        """
+        self.raise_if_read_only("run engine steps for")
         step_details = []
+        self.engine_steps_budget_exhausted = False
+        # privileged script permissions are only remembered for the length of one engine run
+        self._script_engine.forget_augmented_methods(self.process_instance_model.id)
+
+        max_tasks = 0
+        max_seconds = 0.0
+        if budgeted:
+            max_tasks = current_app.config[
+                "SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS"
+            ]
+            max_seconds = current_app.config[
+                "SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_SECONDS"
+            ]
+        engine_steps_start_in_seconds = time.time()
+        completed_task_count = {"count": 0}
+
+        tld = current_app.config["THREAD_LOCAL_DATA"]
+        outer_service_task_dispatcher = getattr(tld, "service_task_dispatcher", None)
+        service_task_dispatcher = ServiceTaskDispatcher(self._script_engine)
+        tld.service_task_dispatcher = service_task_dispatcher
 
         tasks_to_log = {
             "BPMN Task",
@@ -1402,11 +2487,28 @@ class ProcessInstanceProcessor:
             return False
 
         def will_complete_task(task: SpiffTask) -> None:
+            # always complete at least one task so every call makes progress and never drop a
+            # connector response that already came back
+            if (
+                not service_task_dispatcher.has_dispatched(task)
+                and completed_task_count["count"] > 0
+                and (
+                    (max_tasks > 0 and completed_task_count["count"] >= max_tasks)
+                    or (
+                        max_seconds > 0
+                        and time.time() - engine_steps_start_in_seconds >= max_seconds
+                    )
+                )
+            ):
+                raise EngineStepBudgetExhaustedError()
+            service_task_dispatcher.will_run_task(task, self.bpmn_process_instance)
             if should_log(task):
                 current_task_start_in_seconds["time"] = time.time()
                 self.increment_spiff_step()
 
         def did_complete_task(task: SpiffTask) -> None:
+            completed_task_count["count"] += 1
+            self.invalidate_task_index()
             if should_log(task):
                 self._script_engine.environment.revise_state_with_task_data(task)
                 step_details.append(
@@ -1418,11 +2520,20 @@ class ProcessInstanceProcessor:
         try:
             self.bpmn_process_instance.refresh_waiting_tasks()
 
-            self.bpmn_process_instance.do_engine_steps(
-                exit_at=exit_at,
-                will_complete_task=will_complete_task,
-                did_complete_task=did_complete_task,
-            )
+            try:
+                self.bpmn_process_instance.do_engine_steps(
+                    exit_at=exit_at,
+                    will_complete_task=will_complete_task,
+                    did_complete_task=did_complete_task,
+                )
+            except EngineStepBudgetExhaustedError:
+                self.engine_steps_budget_exhausted = True
+                current_app.logger.info(
+                    "Engine step budget exhausted after"
+                    f" {completed_task_count['count']} tasks for process instance"
+                    f" {self.process_instance_model.id}. Leaving the rest to the"
+                    " background processor."
+                )
 
             if self.bpmn_process_instance.is_completed():
                 self._script_engine.environment.finalize_result(
@@ -1435,6 +2546,10 @@ class ProcessInstanceProcessor:
             raise ApiError.from_workflow_exception("task_error", str(swe), swe) from swe
 
         finally:
+            # waiting tasks may have been refreshed and messages caught without completing a task
+            self.invalidate_task_index()
+            self._script_engine.forget_augmented_methods(self.process_instance_model.id)
+            tld.service_task_dispatcher = outer_service_task_dispatcher
             db.session.bulk_insert_mappings(SpiffStepDetailsModel, step_details)
             spiff_logger = logging.getLogger("spiff")
             for handler in spiff_logger.handlers:
@@ -1447,7 +2562,9 @@ class ProcessInstanceProcessor:
 
     def cancel_notify(self) -> None:
         """Cancel_notify."""
+        self.raise_if_read_only("cancel")
         self.__cancel_notify(self.bpmn_process_instance)
+        self.invalidate_task_index()
 
     @staticmethod
     def __cancel_notify(bpmn_process_instance: BpmnWorkflow) -> None:
@@ -1492,19 +2609,55 @@ class ProcessInstanceProcessor:
         except Exception:
             return 0
 
+    @classmethod
+    def get_task_data_size_of_task(cls, task: SpiffTask) -> int:
+        """Get_task_data_size_of_task."""
+        try:
+            return len(json.dumps(task.data))
+        except Exception:
+            return 0
+
+    def update_task_data_sizes(self) -> int:
+        """Updates and returns task_data_size, the total json size of the data of all finished tasks.
+
+        Finished tasks do not change their data without also changing state, so only the tasks
+        whose last_state_change differs from when they were last measured are measured again.
+        """
+        task_data_sizes: dict[str, list] = {}
+        task_data_size = 0
+        for task in self.task_index().tasks_in_state(TaskState.FINISHED_MASK):
+            if len(task.data) == 0:
+                continue
+            task_id = str(task.id)
+            last_state_change_and_size = self._task_data_sizes.get(task_id)
+            if (
+                last_state_change_and_size is None
+                or last_state_change_and_size[0] != task.last_state_change
+            ):
+                last_state_change_and_size = [
+                    task.last_state_change,
+                    self.get_task_data_size_of_task(task),
+                ]
+            task_data_sizes[task_id] = last_state_change_and_size
+            task_data_size += last_state_change_and_size[1]
+
+        self._task_data_sizes = task_data_sizes
+        self.task_data_size = task_data_size
+        self.process_instance_model.task_data_size = task_data_size
+        return task_data_size
+
     def check_task_data_size(self) -> None:
         """CheckTaskDataSize."""
-        task_data_len = self.get_task_data_size(self.bpmn_process_instance)
-
-        # Not sure what the number here should be but this now matches the mysql
-        # max_allowed_packet variable on dev - 1073741824
-        task_data_limit = 1024**3
+        task_data_len = self.update_task_data_sizes()
 
-        if task_data_len > task_data_limit:
+        if task_data_len > self.TASK_DATA_SIZE_LIMIT:
             raise (
                 ApiError(
                     error_code="task_data_size_exceeded",
-                    message=f"Maximum task data size of {task_data_limit} exceeded.",
+                    message=(
+                        "Maximum task data size of"
+                        f" {self.TASK_DATA_SIZE_LIMIT} exceeded."
+                    ),
                 )
             )
 
@@ -1512,11 +2665,116 @@ class ProcessInstanceProcessor:
         """Serialize."""
         self.check_task_data_size()
         self.preserve_script_engine_state()
-        return self._serializer.serialize_json(self.bpmn_process_instance)  # type: ignore
+        bpmn_json_dict = self._serializer.workflow_to_dict(self.bpmn_process_instance)
+        bpmn_json_dict[self._serializer.VERSION_KEY] = self._serializer.VERSION
+        bpmn_json_dict[self.TASK_DATA_SIZES_KEY] = self._task_data_sizes
+        return json.dumps(bpmn_json_dict, cls=self._serializer.json_encoder_cls)
+
+    def serialize_for_storage(
+        self, normalize_specs: bool, persist_tasks_individually: bool
+    ) -> Tuple[str, Optional[str]]:
+        """Returns the bpmn_json to store and the hash of the serialized_bpmn_spec it uses if any.
+
+        With normalize_specs the spec and subprocess_specs are stored in serialized_bpmn_spec and with
+        persist_tasks_individually the tasks are stored in serialized_task, and either are left out of bpmn_json.
+        """
+        self.check_task_data_size()
+        self.preserve_script_engine_state()
+        bpmn_json_dict = self._serializer.workflow_to_dict(self.bpmn_process_instance)
+        bpmn_json_dict[self._serializer.VERSION_KEY] = self._serializer.VERSION
+        bpmn_json_dict[self.TASK_DATA_SIZES_KEY] = self._task_data_sizes
+
+        spec_hash = None
+        if normalize_specs:
+            spec_dict = {
+                "spec": bpmn_json_dict.pop("spec"),
+                "subprocess_specs": bpmn_json_dict.pop("subprocess_specs"),
+            }
+            spec_json = json.dumps(
+                spec_dict, cls=self._serializer.json_encoder_cls, sort_keys=True
+            )
+            spec_hash = hashlib.sha256(spec_json.encode("utf-8")).hexdigest()
+            self.store_serialized_spec(spec_hash, spec_json)
+
+        if persist_tasks_individually:
+            bpmn_json_dict[self.SERIALIZED_TASK_DIGEST_KEY] = (
+                self.persist_serialized_tasks(bpmn_json_dict)
+            )
+
+        bpmn_json = json.dumps(bpmn_json_dict, cls=self._serializer.json_encoder_cls)
+        return (bpmn_json, spec_hash)
+
+    def persist_serialized_tasks(self, bpmn_json_dict: dict) -> str:
+        """Moves the tasks out of bpmn_json_dict into serialized_task rows and returns a digest of all of them.
+
+        Only rows for tasks that were added, changed or removed since they were last stored are written.
+        The rows are added to the session but not committed so they go in with the process instance.
+        """
+        task_dicts_by_guid: dict[str, Tuple[Optional[str], dict]] = {}
+        for guid, task_dict in bpmn_json_dict.pop("tasks").items():
+            task_dicts_by_guid[guid] = (None, task_dict)
+        for bpmn_process_guid, subprocess_dict in bpmn_json_dict[
+            "subprocesses"
+        ].items():
+            for guid, task_dict in subprocess_dict.pop("tasks").items():
+                task_dicts_by_guid[guid] = (bpmn_process_guid, task_dict)
+
+        stored_tasks_by_guid = {
+            guid: (task_id, data_hash)
+            for task_id, guid, data_hash in db.session.query(
+                SerializedTaskModel.id,
+                SerializedTaskModel.guid,
+                SerializedTaskModel.data_hash,
+            )
+            .filter(
+                SerializedTaskModel.process_instance_id
+                == self.process_instance_model.id
+            )
+            .all()
+        }
+
+        new_task_mappings = []
+        changed_task_mappings = []
+        data_hashes = []
+        for guid, (bpmn_process_guid, task_dict) in task_dicts_by_guid.items():
+            task_json = json.dumps(
+                task_dict, cls=self._serializer.json_encoder_cls, sort_keys=True
+            )
+            data_hash = hashlib.sha256(task_json.encode("utf-8")).hexdigest()
+            data_hashes.append(f"{guid}:{data_hash}")
+            task_mapping = {
+                "process_instance_id": self.process_instance_model.id,
+                "guid": guid,
+                "bpmn_process_guid": bpmn_process_guid,
+                "parent_guid": task_dict["parent"],
+                "state": task_dict["state"],
+                "data_hash": data_hash,
+                "task_json": task_json,
+            }
+            stored_task = stored_tasks_by_guid.pop(guid, None)
+            if stored_task is None:
+                new_task_mappings.append(task_mapping)
+            elif stored_task[1] != data_hash:
+                task_mapping["id"] = stored_task[0]
+                changed_task_mappings.append(task_mapping)
+
+        if new_task_mappings:
+            db.session.bulk_insert_mappings(SerializedTaskModel, new_task_mappings)
+        if changed_task_mappings:
+            db.session.bulk_update_mappings(SerializedTaskModel, changed_task_mappings)
+        if stored_tasks_by_guid:
+            removed_task_ids = [task_id for task_id, _ in stored_tasks_by_guid.values()]
+            db.session.query(SerializedTaskModel).filter(
+                SerializedTaskModel.id.in_(removed_task_ids)  # type: ignore
+            ).delete(synchronize_session=False)
+
+        return hashlib.sha256(
+            "\n".join(sorted(data_hashes)).encode("utf-8")
+        ).hexdigest()
 
     def next_user_tasks(self) -> list[SpiffTask]:
         """Next_user_tasks."""
-        return self.bpmn_process_instance.get_ready_user_tasks()  # type: ignore
+        return self.get_ready_user_tasks()
 
     def next_task(self) -> SpiffTask:
         """Returns the next task that should be completed even if there are parallel tasks and multiple options are available.
@@ -1530,9 +2788,7 @@ class ProcessInstanceProcessor:
 
         endtasks = []
         if self.bpmn_process_instance.is_completed():
-            for task in SpiffTask.Iterator(
-                self.bpmn_process_instance.task_tree, TaskState.ANY_MASK
-            ):
+            for task in self.task_index().tasks:
                 # Assure that we find the end event for this process_instance, and not for any sub-process_instances.
                 if (
                     isinstance(task.task_spec, EndEvent)
@@ -1547,11 +2803,11 @@ class ProcessInstanceProcessor:
         # a parallel gateway with multiple tasks, so prefer ones that share a parent.
 
         # Get a list of all ready tasks
-        ready_tasks = self.bpmn_process_instance.get_tasks(TaskState.READY)
+        ready_tasks = self.task_index().tasks_in_state(TaskState.READY)
 
         if len(ready_tasks) == 0:
             # If no ready tasks exist, check for a waiting task.
-            waiting_tasks = self.bpmn_process_instance.get_tasks(TaskState.WAITING)
+            waiting_tasks = self.task_index().tasks_in_state(TaskState.WAITING)
             if len(waiting_tasks) > 0:
                 return waiting_tasks[0]
             else:
@@ -1590,17 +2846,11 @@ class ProcessInstanceProcessor:
 
     def completed_user_tasks(self) -> List[SpiffTask]:
         """Completed_user_tasks."""
-        user_tasks = self.bpmn_process_instance.get_tasks(TaskState.COMPLETED)
-        user_tasks.reverse()
-        user_tasks = list(
-            filter(
-                lambda task: not self.bpmn_process_instance._is_engine_task(
-                    task.task_spec
-                ),
-                user_tasks,
-            )
+        user_tasks = self.task_index().tasks_in_state(
+            TaskState.COMPLETED, human_tasks_only=True
         )
-        return user_tasks  # type: ignore
+        user_tasks.reverse()
+        return user_tasks
 
     def get_task_json_from_spiff_task(self, spiff_task: SpiffTask) -> dict[str, Any]:
         default_registry = DefaultRegistry()
@@ -1618,7 +2868,9 @@ class ProcessInstanceProcessor:
         self, task: SpiffTask, human_task: HumanTaskModel, user: UserModel
     ) -> None:
         """Complete_task."""
+        self.raise_if_read_only("complete a task of")
         self.bpmn_process_instance.complete_task_from_id(task.id)
+        self.invalidate_task_index()
         human_task.completed_by_user_id = user.id
         human_task.completed = True
         db.session.add(human_task)
@@ -1639,7 +2891,9 @@ class ProcessInstanceProcessor:
 
         details_model.task_state = task.get_state_name()
         details_model.end_in_seconds = time.time()
-        details_model.task_json = self.get_task_json_from_spiff_task(task)
+        self.replace_step_task_json(
+            details_model, self.get_task_json_from_spiff_task(task)
+        )
         db.session.add(details_model)
         # this is the thing that actually commits the db transaction (on behalf of the other updates above as well)
         self.save()
@@ -1675,11 +2929,11 @@ class ProcessInstanceProcessor:
 
     def get_ready_user_tasks(self) -> list[SpiffTask]:
         """Get_ready_user_tasks."""
-        return self.bpmn_process_instance.get_ready_user_tasks()  # type: ignore
+        return self.task_index().tasks_in_state(TaskState.READY, human_tasks_only=True)
 
     def get_current_user_tasks(self) -> list[SpiffTask]:
         """Return a list of all user tasks that are READY or COMPLETE and are parallel to the READY Task."""
-        ready_tasks = self.bpmn_process_instance.get_ready_user_tasks()
+        ready_tasks = self.get_ready_user_tasks()
         additional_tasks = []
         if len(ready_tasks) > 0:
             for child in ready_tasks[0].parent.children:
@@ -1689,32 +2943,28 @@ class ProcessInstanceProcessor:
 
     def get_all_user_tasks(self) -> List[SpiffTask]:
         """Get_all_user_tasks."""
-        all_tasks = self.bpmn_process_instance.get_tasks(TaskState.ANY_MASK)
-        return [
-            t
-            for t in all_tasks
-            if not self.bpmn_process_instance._is_engine_task(t.task_spec)
-        ]
+        return list(self.task_index().human_tasks)
 
     def get_all_completed_tasks(self) -> list[SpiffTask]:
         """Get_all_completed_tasks."""
-        all_tasks = self.bpmn_process_instance.get_tasks(TaskState.ANY_MASK)
-        return [
-            t
-            for t in all_tasks
-            if not self.bpmn_process_instance._is_engine_task(t.task_spec)
-            and t.state in [TaskState.COMPLETED, TaskState.CANCELLED]
-        ]
+        return self.task_index().tasks_in_state(
+            TaskState.COMPLETED | TaskState.CANCELLED, human_tasks_only=True
+        )
 
     def get_all_waiting_tasks(self) -> list[SpiffTask]:
         """Get_all_ready_or_waiting_tasks."""
-        all_tasks = self.bpmn_process_instance.get_tasks(TaskState.ANY_MASK)
-        return [t for t in all_tasks if t.state in [TaskState.WAITING]]
+        return self.task_index().tasks_in_state(TaskState.WAITING)
 
     def get_all_ready_or_waiting_tasks(self) -> list[SpiffTask]:
         """Get_all_ready_or_waiting_tasks."""
-        all_tasks = self.bpmn_process_instance.get_tasks(TaskState.ANY_MASK)
-        return [t for t in all_tasks if t.state in [TaskState.WAITING, TaskState.READY]]
+        return self.task_index().tasks_in_state(TaskState.WAITING | TaskState.READY)
+
+    def get_task_by_spec_name(self, bpmn_task_identifier: str) -> Optional[SpiffTask]:
+        """Like get_task_by_bpmn_identifier but served from the task index of this processor."""
+        tasks = self.task_index().tasks_with_spec_name(bpmn_task_identifier)
+        if len(tasks) > 0:
+            return tasks[0]
+        return None
 
     @classmethod
     def get_task_by_bpmn_identifier(
@@ -1765,7 +3015,9 @@ class ProcessInstanceProcessor:
 
     def terminate(self) -> None:
         """Terminate."""
+        self.raise_if_read_only("terminate")
         self.bpmn_process_instance.cancel()
+        self.invalidate_task_index()
         self.save()
         self.process_instance_model.status = "terminated"
         db.session.add(self.process_instance_model)
@@ -1780,5 +3032,35 @@ class ProcessInstanceProcessor:
     def resume(self) -> None:
         """Resume."""
         self.process_instance_model.status = ProcessInstanceStatus.waiting.value
+        # what it waited on may have happened while it was suspended
+        self.process_instance_model.next_run_at_in_seconds = round(time.time())
         db.session.add(self.process_instance_model)
         db.session.commit()
+
+
+@listens_for(Session, "after_commit")  # type: ignore
+def cache_serialized_specs_after_commit(session: Session) -> None:
+    """Caches the specs store_serialized_spec stored once the transaction that stored them is committed."""
+    # releasing a savepoint commits nothing yet
+    if session.in_nested_transaction():
+        return
+    serialized_specs_to_cache = session.info.pop(SERIALIZED_SPECS_TO_CACHE_KEY, None)
+    if serialized_specs_to_cache:
+        serialized_spec_cache = ProcessInstanceProcessor.serialized_spec_cache()
+        for spec_hash, spec_dict in serialized_specs_to_cache.items():
+            serialized_spec_cache.put(spec_hash, spec_dict)
+
+
+@listens_for(Session, "after_rollback")  # type: ignore
+def forget_serialized_specs_after_rollback(session: Session) -> None:
+    """Forget_serialized_specs_after_rollback."""
+    if not session.in_nested_transaction():
+        session.info.pop(SERIALIZED_SPECS_TO_CACHE_KEY, None)
+
+
+@listens_for(Session, "after_rollback")  # type: ignore
+def forget_step_snapshots_after_rollback(session: Session) -> None:
+    """Forgets the last step snapshot of processors since the step it is of may have been rolled back."""
+    # rolling back to a savepoint may discard steps too
+    for processor in session.info.pop(STEP_SNAPSHOT_PROCESSORS_KEY, []):
+        processor._last_step_snapshot = None
@@ -1,15 +1,21 @@
 """Process_instance_service."""
 import time
+from dataclasses import dataclass
 from typing import Any
+from typing import Callable
 from typing import List
 from typing import Optional
 
 import sentry_sdk
 from flask import current_app
 from SpiffWorkflow.task import Task as SpiffTask  # type: ignore
+from sqlalchemy import and_
+from sqlalchemy import not_
+from sqlalchemy import or_
 
 from spiffworkflow_backend import db
 from spiffworkflow_backend.exceptions.api_error import ApiError
+from spiffworkflow_backend.models.db import supports_skip_locked
 from spiffworkflow_backend.models.human_task import HumanTaskModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceApi
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
@@ -29,6 +35,18 @@ from spiffworkflow_backend.services.process_instance_processor import (
 from spiffworkflow_backend.services.process_model_service import ProcessModelService
 
 
+@dataclass
+class WaitingProcessInstanceCounts:
+    """What one run of the background processor did with the waiting process instances.
+
+    skipped counts the due instances that something else had locked.
+    """
+
+    claimed: int = 0
+    skipped: int = 0
+    errors: int = 0
+
+
 class ProcessInstanceService:
     """ProcessInstanceService."""
 
@@ -70,41 +88,203 @@ class ProcessInstanceService:
         return cls.create_process_instance(process_model, user)
 
     @staticmethod
-    def do_waiting() -> None:
-        """Do_waiting."""
-        records = (
-            db.session.query(ProcessInstanceModel)
-            .filter(ProcessInstanceModel.status == ProcessInstanceStatus.waiting.value)
-            .all()
+    def is_due_for_background_processing(current_time_in_seconds: int) -> Any:
+        """Filter for the process instances the background processor should run by now.
+
+        Besides waiting ones that is user_input_required ones with engine tasks left ready next to their
+        user tasks, which are the only user_input_required ones save gives a next_run_at_in_seconds.
+        """
+        return and_(
+            ProcessInstanceModel.status.in_(  # type: ignore
+                [
+                    ProcessInstanceStatus.waiting.value,
+                    ProcessInstanceStatus.user_input_required.value,
+                ]
+            ),
+            ProcessInstanceModel.next_run_at_in_seconds <= current_time_in_seconds,  # type: ignore
+        )
+
+    @classmethod
+    def claim_waiting_process_instances(
+        cls, lock_prefix: str, batch_size: int
+    ) -> tuple[list[int], int]:
+        """Locks up to batch_size due waiting process instances nothing else has locked without loading them.
+
+        Returns the ids of the locked process instances, the ones that have been due longest first, and how
+        many due process instances were skipped since something else has them locked. Where the database
+        supports it the batch is selected with FOR UPDATE SKIP LOCKED and locked with one update. Otherwise
+        each process instance is locked with the same conditional update lock_process_instance uses.
+        """
+        locked_by = ProcessInstanceProcessor.lock_owner(lock_prefix)
+        current_time_in_seconds = round(time.time())
+        lock_expiry_in_seconds = ProcessInstanceProcessor.lock_expiry_in_seconds(
+            current_time_in_seconds
+        )
+        is_due = cls.is_due_for_background_processing(current_time_in_seconds)
+        is_unlocked = or_(
+            ProcessInstanceModel.locked_by.is_(None),  # type: ignore
+            ProcessInstanceModel.locked_at_in_seconds < lock_expiry_in_seconds,  # type: ignore
+        )
+        lock_values = {
+            ProcessInstanceModel.locked_by: locked_by,
+            ProcessInstanceModel.locked_at_in_seconds: current_time_in_seconds,
+        }
+
+        locked_elsewhere_count = (
+            db.session.query(ProcessInstanceModel.id)
+            .filter(is_due, not_(is_unlocked))
+            .count()
+        )
+        candidate_query = (
+            db.session.query(ProcessInstanceModel.id)
+            .filter(is_due, is_unlocked)
+            .order_by(
+                ProcessInstanceModel.next_run_at_in_seconds, ProcessInstanceModel.id
+            )
+            .limit(batch_size)
+        )
+
+        if supports_skip_locked():
+            # rows being claimed by another process are skipped instead of waited for and the ones
+            # selected here stay locked until the commit so the update cannot lose any of them.
+            claimed_ids = [
+                row.id
+                for row in candidate_query.with_for_update(skip_locked=True).all()
+            ]
+            if claimed_ids:
+                db.session.query(ProcessInstanceModel).filter(
+                    ProcessInstanceModel.id.in_(claimed_ids)  # type: ignore
+                ).update(lock_values, synchronize_session=False)
+            db.session.commit()
+            for claimed_id in claimed_ids:
+                ProcessInstanceProcessor.hold_lock(claimed_id, locked_by)
+            return (claimed_ids, locked_elsewhere_count)
+
+        candidate_ids = [row.id for row in candidate_query.all()]
+        claimed_ids = []
+        for candidate_id in candidate_ids:
+            locked_count = (
+                db.session.query(ProcessInstanceModel)
+                .filter(ProcessInstanceModel.id == candidate_id, is_due, is_unlocked)
+                .update(lock_values, synchronize_session=False)
+            )
+            if locked_count > 0:
+                claimed_ids.append(candidate_id)
+        db.session.commit()
+        for claimed_id in claimed_ids:
+            ProcessInstanceProcessor.hold_lock(claimed_id, locked_by)
+        skipped_count = locked_elsewhere_count + len(candidate_ids) - len(claimed_ids)
+        return (claimed_ids, skipped_count)
+
+    @classmethod
+    def do_waiting(
+        cls, should_stop: Optional[Callable[[], bool]] = None
+    ) -> WaitingProcessInstanceCounts:
+        """Locks a batch of due waiting process instances first and only then loads and runs them one at a time.
+
+        If should_stop returns True the process instances of the batch that did not run yet are left
+        locked for the caller to release.
+        """
+        lock_prefix = "Background"
+        claimed_ids, skipped_count = cls.claim_waiting_process_instances(
+            lock_prefix,
+            current_app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_BATCH_SIZE"],
         )
-        process_instance_lock_prefix = "Background"
-        for process_instance in records:
-            locked = False
-            processor = None
-            try:
-                current_app.logger.info(
-                    f"Processing process_instance {process_instance.id}"
+        counts = WaitingProcessInstanceCounts(
+            claimed=len(claimed_ids), skipped=skipped_count
+        )
+        for process_instance_id in claimed_ids:
+            if should_stop is not None and should_stop():
+                break
+            process_instance = ProcessInstanceModel.query.filter_by(
+                id=process_instance_id
+            ).first()
+            if process_instance is None:
+                ProcessInstanceProcessor.let_go_of_lock(
+                    process_instance_id,
+                    ProcessInstanceProcessor.lock_owner(lock_prefix),
                 )
-                processor = ProcessInstanceProcessor(process_instance)
+                continue
+            if not cls.run_waiting_process_instance(
+                process_instance, lock_prefix, lock_already_held=True
+            ):
+                counts.errors += 1
+
+        if counts.claimed or counts.skipped:
+            current_app.logger.info(
+                f"Waiting process instances: claimed {counts.claimed}, skipped"
+                f" {counts.skipped}, errors {counts.errors}"
+            )
+        return counts
+
+    @staticmethod
+    def run_waiting_process_instance(
+        process_instance: ProcessInstanceModel,
+        process_instance_lock_prefix: str = "Background",
+        lock_already_held: bool = False,
+    ) -> bool:
+        """Runs the engine steps of a waiting process instance unless something else has it locked.
+
+        Returns False if running it failed, in which case the process instance is put in error. If
+        lock_already_held the caller locked it with process_instance_lock_prefix and it is unlocked here.
+        The lock is renewed first since it may have expired and been confiscated while the instances
+        claimed before this one ran. The process instance is skipped if it was.
+        """
+        if (
+            lock_already_held
+            and not ProcessInstanceProcessor.renew_process_instance_lock(
+                process_instance.id, process_instance_lock_prefix
+            )
+        ):
+            ProcessInstanceProcessor.let_go_of_lock(
+                process_instance.id,
+                ProcessInstanceProcessor.lock_owner(process_instance_lock_prefix),
+            )
+            current_app.logger.info(
+                f"Skipping process_instance {process_instance.id} since its lock was"
+                " confiscated before it could run"
+            )
+            return True
+
+        locked = lock_already_held
+        processor = None
+        try:
+            current_app.logger.info(
+                f"Processing process_instance {process_instance.id}"
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            if not locked:
                 processor.lock_process_instance(process_instance_lock_prefix)
                 locked = True
-                processor.do_engine_steps(save=True)
-            except ProcessInstanceIsAlreadyLockedError:
-                continue
-            except Exception as e:
-                db.session.rollback()  # in case the above left the database with a bad transaction
-                process_instance.status = ProcessInstanceStatus.error.value
+            processor.do_engine_steps(save=True)
+        except ProcessInstanceIsAlreadyLockedError:
+            return True
+        except Exception as e:
+            db.session.rollback()  # in case the above left the database with a bad transaction
+            process_instance.status = ProcessInstanceStatus.error.value
+            db.session.add(process_instance)
+            db.session.commit()
+            error_message = (
+                "Error running waiting task for process_instance"
+                f" {process_instance.id}"
+                + f"({process_instance.process_model_identifier}). {str(e)}"
+            )
+            current_app.logger.error(error_message)
+            return False
+        finally:
+            if locked and processor:
+                processor.unlock_process_instance(process_instance_lock_prefix)
+            elif locked:
+                # the processor could not even be created so there is nothing to unlock it with
+                ProcessInstanceProcessor.let_go_of_lock(
+                    process_instance.id,
+                    ProcessInstanceProcessor.lock_owner(process_instance_lock_prefix),
+                )
+                process_instance.locked_by = None
+                process_instance.locked_at_in_seconds = None
                 db.session.add(process_instance)
                 db.session.commit()
-                error_message = (
-                    "Error running waiting task for process_instance"
-                    f" {process_instance.id}"
-                    + f"({process_instance.process_model_identifier}). {str(e)}"
-                )
-                current_app.logger.error(error_message)
-            finally:
-                if locked and processor:
-                    processor.unlock_process_instance(process_instance_lock_prefix)
+        return True
 
     @staticmethod
     def processor_to_process_instance_api(
@@ -216,11 +396,17 @@ class ProcessInstanceService:
         data: dict[str, Any],
         user: UserModel,
         human_task: HumanTaskModel,
+        continue_in_background: bool = False,
     ) -> None:
         """All the things that need to happen when we complete a form.
 
         Abstracted here because we need to do it multiple times when completing all tasks in
         a multi-instance task.
+
+        With continue_in_background the engine steps after the task are not run here. Completing
+        the task saves the instance with a next_run_at_in_seconds of now if engine tasks are ready,
+        whether or not a user task is ready too, so the caller or the background processor can pick
+        it up from there.
         """
         AuthorizationService.assert_user_can_complete_spiff_task(
             processor.process_instance_model.id, spiff_task, user
@@ -230,10 +416,12 @@ class ProcessInstanceService:
         spiff_task.update_data(dot_dct)
         # ProcessInstanceService.post_process_form(spiff_task)  # some properties may update the data store.
         processor.complete_task(spiff_task, human_task, user=user)
+        if continue_in_background:
+            return
 
         with sentry_sdk.start_span(op="task", description="backend_do_engine_steps"):
             # maybe move this out once we have the interstitial page since this is here just so we can get the next human task
-            processor.do_engine_steps(save=True)
+            processor.do_engine_steps(save=True, budgeted=True)
 
     @staticmethod
     def create_dot_dict(data: dict) -> dict[str, Any]:
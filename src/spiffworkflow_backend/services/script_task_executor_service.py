@@ -0,0 +1,315 @@
+"""Script_task_executor_service."""
+import multiprocessing
+
+# payloads only travel between this process and the script task processes it started
+import pickle  # noqa: S403
+import queue
+import resource
+import signal
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from types import CodeType
+from types import FrameType
+from typing import Any
+from typing import Iterable
+from typing import Optional
+
+from flask import current_app
+
+from spiffworkflow_backend.helpers.compiled_code_cache import referenced_names
+
+# how much longer than the script timeout the web process waits before it gives up on a worker
+# that did not stop itself, for example because it is stuck in c code that never checks for signals.
+HARD_TIMEOUT_GRACE_SECONDS = 5
+
+
+class ScriptTaskExecutionError(Exception):
+    """A script failed in a script task process. The error is described since the exception itself stays there."""
+
+    def __init__(
+        self,
+        error_type: str,
+        message: str,
+        line_number: int = 0,
+        script_changes: Optional["ScriptChanges"] = None,
+    ) -> None:
+        """__init__."""
+        super().__init__(message)
+        self.error_type = error_type
+        self.message = message
+        self.line_number = line_number
+        self.script_changes = script_changes
+
+
+class ScriptTimeoutError(BaseException):
+    """Not an Exception so a script cannot catch it with its own except Exception."""
+
+
+@dataclass
+class ScriptChanges:
+    """What running a script did to its user defined variables.
+
+    values are the variables to set, dropped_keys are variables the script rebound to something that
+    is not user data like a function and deleted_keys are variables the script deleted.
+    """
+
+    values: dict[str, Any] = field(default_factory=dict)
+    dropped_keys: list[str] = field(default_factory=list)
+    deleted_keys: list[str] = field(default_factory=list)
+
+    @classmethod
+    def between(
+        cls,
+        original_namespace: dict[str, Any],
+        namespace: dict[str, Any],
+        keys_to_filter: set[str],
+        unchanged_keys_to_include: Iterable[str] = (),
+    ) -> "ScriptChanges":
+        """Compares the namespace a script ran in with what it was before it ran.
+
+        Only names the script rebound, added or deleted are looked at, plus unchanged_keys_to_include
+        which lets values that were changed in place be sent back from another process.
+        """
+        script_changes = cls(
+            deleted_keys=list(original_namespace.keys() - namespace.keys())
+        )
+        for key, value in namespace.items():
+            if key in original_namespace and original_namespace[key] is value:
+                continue
+            if key in keys_to_filter or callable(value):
+                script_changes.dropped_keys.append(key)
+            else:
+                script_changes.values[key] = value
+        for key in unchanged_keys_to_include:
+            if key in keys_to_filter or key not in namespace:
+                continue
+            value = namespace[key]
+            if key not in script_changes.values and not callable(value):
+                script_changes.values[key] = value
+        return script_changes
+
+
+class ScriptTaskExecutorService:
+    """Optionally runs scripts in a pool of worker processes instead of the thread that runs the engine.
+
+    Task data goes to the worker pickled and what the script changed comes back the same way.
+    Each worker stops a script after SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS with an alarm
+    and limits its own address space to SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_MAX_MEMORY_MB.
+
+    Every worker has an executor of its own since a ProcessPoolExecutor fails all of its scripts once
+    one of its workers is stopped. A worker that does not come back in time or dies is replaced
+    without touching the scripts running in the others.
+    """
+
+    # one slot per worker. a slot holds None until its executor is started.
+    _idle_executors: Optional["queue.Queue[Optional[ProcessPoolExecutor]]"] = None
+    _executor_lock = threading.Lock()
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        """Is_enabled."""
+        return bool(current_app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES"])
+
+    @classmethod
+    def idle_executors(cls) -> "queue.Queue[Optional[ProcessPoolExecutor]]":
+        """Idle_executors."""
+        with cls._executor_lock:
+            if cls._idle_executors is None:
+                cls._idle_executors = queue.Queue()
+                for _ in range(
+                    current_app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES"]
+                ):
+                    cls._idle_executors.put(None)
+            return cls._idle_executors
+
+    @classmethod
+    def new_executor(cls) -> ProcessPoolExecutor:
+        """New_executor."""
+        # forkserver starts the worker from a clean process instead of forking a web worker
+        # that may hold threads, locks and database connections.
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("forkserver"),
+            initializer=_initialize_worker,
+            initargs=(
+                current_app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_MAX_MEMORY_MB"],
+            ),
+        )
+
+    @classmethod
+    def stop_executor(cls, executor: ProcessPoolExecutor) -> None:
+        """Stops the worker of the given executor even if it is still running a script."""
+        # there is no public way to stop a worker that is still running a script
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stops the idle workers. The next script starts new ones with the current config."""
+        with cls._executor_lock:
+            idle_executors = cls._idle_executors
+            cls._idle_executors = None
+        while idle_executors is not None:
+            try:
+                executor = idle_executors.get_nowait()
+            except queue.Empty:
+                break
+            if executor is not None:
+                cls.stop_executor(executor)
+
+    @classmethod
+    def execute(
+        cls,
+        script: str,
+        user_values: dict[str, Any],
+        keys_to_filter: set[str],
+    ) -> Optional[ScriptChanges]:
+        """Runs the script in a worker process and returns what it changed.
+
+        Returns None without running anything if the values cannot be pickled, in which case the
+        caller runs the script itself. Raises ScriptTaskExecutionError if the script fails, with
+        what the script changed before it failed if that made it back.
+        """
+        timeout_seconds = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS"
+        ]
+        try:
+            payload = pickle.dumps(
+                (script, user_values, keys_to_filter, timeout_seconds),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        except Exception:
+            return None
+
+        hard_timeout = None
+        if timeout_seconds > 0:
+            hard_timeout = timeout_seconds + HARD_TIMEOUT_GRACE_SECONDS
+        idle_executors = cls.idle_executors()
+        executor = idle_executors.get()
+        try:
+            if executor is None:
+                executor = cls.new_executor()
+            result = executor.submit(_run_script, payload).result(timeout=hard_timeout)
+        except (FutureTimeoutError, ScriptTimeoutError) as exception:
+            if isinstance(exception, FutureTimeoutError) and executor is not None:
+                cls.stop_executor(executor)
+                executor = None
+            raise ScriptTaskExecutionError(
+                ScriptTimeoutError.__name__,
+                f"Script did not finish within {timeout_seconds} seconds",
+            ) from exception
+        except BrokenProcessPool as exception:
+            if executor is not None:
+                cls.stop_executor(executor)
+            executor = None
+            raise ScriptTaskExecutionError(
+                exception.__class__.__name__,
+                "The script task process stopped while running the script. It may have run out of memory.",
+            ) from exception
+        finally:
+            idle_executors.put(executor)
+
+        status, script_changes, error = pickle.loads(result)  # noqa: S301
+        if status == "error":
+            error_type, message, line_number = error
+            raise ScriptTaskExecutionError(
+                error_type, message, line_number, script_changes
+            )
+        return script_changes
+
+
+# everything below runs in the worker processes
+
+_worker_globals: dict[str, Any] = {}
+
+
+def _initialize_worker(max_memory_mb: int) -> None:
+    """_initialize_worker."""
+    # imported here since the processor imports this module
+    from spiffworkflow_backend.services.process_instance_processor import (
+        CustomBpmnScriptEngine,
+    )
+
+    _worker_globals.update(CustomBpmnScriptEngine().environment.globals)
+
+    # limited only now so importing the app does not count against what the scripts may use
+    if max_memory_mb > 0:
+        max_memory = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+
+
+@lru_cache(maxsize=256)
+def _compile(script: str) -> tuple[CodeType, frozenset[str]]:
+    """_compile."""
+    code = compile(script, "<string>", "exec")
+    return (code, frozenset(referenced_names(code)))
+
+
+def _raise_timeout(_signum: int, _frame: Optional[FrameType]) -> None:
+    """_raise_timeout."""
+    raise ScriptTimeoutError("Script did not finish in time")
+
+
+def _run_script(payload: bytes) -> bytes:
+    """Runs one script and returns the pickled status, ScriptChanges and error."""
+    script, user_values, keys_to_filter, timeout_seconds = pickle.loads(  # noqa: S301
+        payload
+    )
+    code, names = _compile(script)
+
+    namespace = {
+        name: _worker_globals[name] for name in names if name in _worker_globals
+    }
+    namespace.update(user_values)
+    if "__builtins__" in _worker_globals:
+        namespace["__builtins__"] = _worker_globals["__builtins__"]
+    original_namespace = dict(namespace)
+
+    error = None
+    if timeout_seconds > 0:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    try:
+        exec(code, namespace)  # noqa
+    except (Exception, ScriptTimeoutError) as exception:
+        line_number = 0
+        for frame_summary in traceback.extract_tb(exception.__traceback__):
+            if (
+                frame_summary.filename == "<string>"
+                and frame_summary.lineno is not None
+            ):
+                line_number = frame_summary.lineno
+        error = (exception.__class__.__name__, str(exception), line_number)
+    finally:
+        if timeout_seconds > 0:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    script_changes = ScriptChanges.between(
+        original_namespace, namespace, keys_to_filter, user_values.keys()
+    )
+    try:
+        return pickle.dumps(
+            ("error" if error else "ok", script_changes, error),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    except Exception as exception:
+        return pickle.dumps(
+            (
+                "error",
+                None,
+                error
+                or (
+                    exception.__class__.__name__,
+                    f"Script created values that cannot be stored as task data: {exception}",
+                    0,
+                ),
+            ),
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
@@ -12,6 +12,9 @@ from SpiffWorkflow.task import Task as SpiffTask  # type: ignore
 from spiffworkflow_backend.services.process_instance_processor import (
     CustomBpmnScriptEngine,
 )
+from spiffworkflow_backend.services.script_task_executor_service import (
+    ScriptTaskExecutionError,
+)
 
 PythonScriptContext = dict[str, Any]
 
@@ -63,6 +66,10 @@ class ScriptUnitTestRunner:
                 raise ex
             error_message = f"{ex.__class__.__name__}: {str(ex)}"
             line_number = 0
+            if isinstance(ex, ScriptTaskExecutionError):
+                # the script ran in a script task process so there is no traceback to look through
+                error_message = f"{ex.error_type}: {ex.message}"
+                line_number = ex.line_number
             _cl, _exc, tb = sys.exc_info()
             # Loop back through the stack trace to find the file called
             # 'string' - which is the script we are executing, then use that
@@ -1,12 +1,29 @@
 """ServiceTask_service."""
+import hashlib
 import json
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Any
+from typing import Optional
+from uuid import UUID
 
 import requests
 import sentry_sdk
 from flask import current_app
+from flask import Flask
 from flask import g
+from SpiffWorkflow.bpmn.workflow import BpmnWorkflow  # type: ignore
+from SpiffWorkflow.task import Task as SpiffTask  # type: ignore
+from SpiffWorkflow.task import TaskState
 
+from spiffworkflow_backend.helpers.lru_cache import LruCache
+from spiffworkflow_backend.services.connector_proxy_client import (
+    ConnectorCircuitOpenError,
+)
+from spiffworkflow_backend.services.connector_proxy_client import ConnectorProxyClient
 from spiffworkflow_backend.services.file_system_service import FileSystemService
 from spiffworkflow_backend.services.secret_service import SecretService
 from spiffworkflow_backend.services.user_service import UserService
@@ -21,6 +38,86 @@ def connector_proxy_url() -> Any:
     return current_app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_URL"]
 
 
+@dataclass
+class CachedConnectorResponse:
+    """CachedConnectorResponse."""
+
+    response_text: str
+    expires_at_in_seconds: float
+
+    def is_fresh(self) -> bool:
+        """Is_fresh."""
+        return time.time() < self.expires_at_in_seconds
+
+
+class ConnectorResponseCache:
+    """Keeps successful connector responses for as long as the caller asks in an LruCache bounded by bytes.
+
+    Responses are keyed by the command plus its params after secrets and files were filled in. The task
+    data sent along with every request is not part of the key, so only commands whose response depends on
+    nothing but their params should be cached. Responses that refreshed a token are never cached.
+    """
+
+    _cache: Optional[LruCache] = None
+
+    @classmethod
+    def cache(cls) -> LruCache:
+        """Cache."""
+        if cls._cache is None:
+            cls._cache = LruCache(
+                current_app.config[
+                    "SPIFFWORKFLOW_BACKEND_CONNECTOR_RESPONSE_CACHE_MAX_BYTES"
+                ]
+            )
+        return cls._cache
+
+    @classmethod
+    def reset(cls) -> None:
+        """Reset."""
+        cls._cache = None
+
+    @staticmethod
+    def cache_key(name: str, params: dict[str, Any]) -> tuple[str, str]:
+        """Cache_key."""
+        params_without_task_data = {
+            key: value for key, value in params.items() if key != "spiff__task_data"
+        }
+        # hashed so the secrets in the params are not kept around in the keys
+        normalized_params = json.dumps(
+            params_without_task_data, sort_keys=True, default=str
+        )
+        return (name, hashlib.sha256(normalized_params.encode("utf-8")).hexdigest())
+
+    @classmethod
+    def get(cls, cache_key: tuple[str, str]) -> Optional[str]:
+        """Get."""
+        cached_response = cls.cache().get(
+            cache_key, is_valid=CachedConnectorResponse.is_fresh
+        )
+        if cached_response is None:
+            return None
+        return str(cached_response.response_text)
+
+    @classmethod
+    def put(
+        cls,
+        cache_key: tuple[str, str],
+        proxied_response: requests.Response,
+        response_text: str,
+        cache_seconds: float,
+    ) -> None:
+        """Put."""
+        if cache_seconds <= 0 or proxied_response.status_code >= 300:
+            return
+        if "refreshed_token_set" in proxied_response.text:
+            return
+        cls.cache().put(
+            cache_key,
+            CachedConnectorResponse(response_text, time.time() + cache_seconds),
+            weight=len(response_text),
+        )
+
+
 class ServiceTaskDelegate:
     """ServiceTaskDelegate."""
 
@@ -87,72 +184,323 @@ class ServiceTaskDelegate:
         return msg
 
     @staticmethod
-    def call_connector(name: str, bpmn_params: Any, task_data: Any) -> str:
-        """Calls a connector via the configured proxy."""
+    def connector_params(bpmn_params: Any, task_data: Any) -> dict[str, Any]:
+        """The request body for a connector with secrets and files filled in."""
+        params = {
+            k: ServiceTaskDelegate.check_prefixes(v["value"])
+            for k, v in bpmn_params.items()
+        }
+        params["spiff__task_data"] = task_data
+        return params
+
+    @staticmethod
+    def send_to_connector(name: str, params: dict[str, Any]) -> requests.Response:
+        """Sends the params to the connector proxy.
+
+        This only makes the http request so it can run in other threads as long as they have an app context.
+        """
+        try:
+            return ConnectorProxyClient.request(
+                "POST",
+                f"/v1/do/{name}",
+                command=name,
+                idempotent=ConnectorProxyClient.is_idempotent_command(name),
+                json=params,
+            )
+        except ConnectorCircuitOpenError as exception:
+            raise ConnectorProxyError(str(exception)) from exception
+        except requests.RequestException as exception:
+            raise ConnectorProxyError(
+                f"Could not get a response from service {name} :"
+                f" {exception.__class__.__name__}. The connector proxy may be down"
+                " or too slow."
+            ) from exception
+
+    @staticmethod
+    def handle_connector_response(
+        name: str, proxied_response: requests.Response
+    ) -> str:
+        """Returns the api response from the connector and stores any token it refreshed."""
+        response_text = proxied_response.text
+        json_parse_error = None
+
+        if response_text == "":
+            response_text = "{}"
+        try:
+            parsed_response = json.loads(response_text)
+        except Exception as e:
+            json_parse_error = e
+            parsed_response = {}
+
+        if proxied_response.status_code >= 300:
+            message = ServiceTaskDelegate.get_message_for_status(
+                proxied_response.status_code
+            )
+            error = f"Received an unexpected response from service {name} : {message}"
+            if "error" in parsed_response:
+                error += parsed_response["error"]
+            if json_parse_error:
+                error += (
+                    "A critical component (The connector proxy) is not responding"
+                    " correctly."
+                )
+            raise ConnectorProxyError(error)
+        elif json_parse_error:
+            raise ConnectorProxyError(
+                f"There is a problem with this connector: '{name}'. "
+                "Responses for connectors must be in JSON format. "
+            )
+
+        if "refreshed_token_set" not in parsed_response:
+            return response_text
+
+        secret_key = parsed_response["auth"]
+        refreshed_token_set = json.dumps(parsed_response["refreshed_token_set"])
+        user_id = g.user.id if UserService.has_user() else None
+        SecretService().update_secret(secret_key, refreshed_token_set, user_id)
+        return json.dumps(parsed_response["api_response"])
+
+    @staticmethod
+    def call_connector(
+        name: str, bpmn_params: Any, task_data: Any, cache_seconds: float = 0
+    ) -> str:
+        """Calls a connector via the configured proxy.
+
+        If cache_seconds is given a response to the same params from the last cache_seconds is returned
+        instead and a new successful response is kept that long.
+        """
         call_url = f"{connector_proxy_url()}/v1/do/{name}"
         with sentry_sdk.start_span(op="call-connector", description=call_url):
-            params = {
-                k: ServiceTaskDelegate.check_prefixes(v["value"])
-                for k, v in bpmn_params.items()
-            }
-            params["spiff__task_data"] = task_data
-
-            proxied_response = requests.post(call_url, json=params)
-            response_text = proxied_response.text
-            json_parse_error = None
-
-            if response_text == "":
-                response_text = "{}"
-            try:
-                parsed_response = json.loads(response_text)
-            except Exception as e:
-                json_parse_error = e
-                parsed_response = {}
-
-            if proxied_response.status_code >= 300:
-                message = ServiceTaskDelegate.get_message_for_status(
-                    proxied_response.status_code
-                )
-                error = (
-                    f"Received an unexpected response from service {name} : {message}"
+            params = ServiceTaskDelegate.connector_params(bpmn_params, task_data)
+            cache_key = None
+            if cache_seconds > 0:
+                cache_key = ConnectorResponseCache.cache_key(name, params)
+                cached_response_text = ConnectorResponseCache.get(cache_key)
+                if cached_response_text is not None:
+                    return cached_response_text
+
+            proxied_response = ServiceTaskDelegate.send_to_connector(name, params)
+            response_text = ServiceTaskDelegate.handle_connector_response(
+                name, proxied_response
+            )
+            if cache_key is not None:
+                ConnectorResponseCache.put(
+                    cache_key, proxied_response, response_text, cache_seconds
                 )
-                if "error" in parsed_response:
-                    error += parsed_response["error"]
-                if json_parse_error:
-                    error += (
-                        "A critical component (The connector proxy) is not responding"
-                        " correctly."
-                    )
-                raise ConnectorProxyError(error)
-            elif json_parse_error:
-                raise ConnectorProxyError(
-                    f"There is a problem with this connector: '{name}'. "
-                    "Responses for connectors must be in JSON format. "
+            return response_text
+
+
+@dataclass
+class DispatchedConnectorCall:
+    """A connector request that was sent before the engine got to its service task."""
+
+    name: str
+    bpmn_params: dict[str, Any]
+    params: dict[str, Any]
+    cache_seconds: float
+    future: Future
+
+
+def _send_to_connector_with_app_context(
+    app: Flask, name: str, params: dict[str, Any]
+) -> requests.Response:
+    """_send_to_connector_with_app_context."""
+    with app.app_context():
+        return ServiceTaskDelegate.send_to_connector(name, params)
+
+
+class ServiceTaskDispatcher:
+    """Makes the connector calls of the service tasks run during one engine run.
+
+    A service task can have its responses cached by setting the connectorResponseCacheSeconds property
+    in its extensions.
+
+    If SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS is set, the requests of service tasks that are ready at
+    the same time are sent concurrently. The engine still runs service tasks one after another. When it gets
+    to a service task that was not dispatched yet, the requests of the other ready service tasks are sent on
+    a thread pool and each task then only waits for its own response. Responses are handled on the thread
+    running the engine, so results, refreshed tokens and errors are applied in the order the engine runs
+    the tasks.
+
+    A request sent ahead may be sent again, when the params of its task evaluate differently by the time it
+    runs, or never be used, when the engine stops on an error first. So only the requests of commands in
+    SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS are sent ahead.
+    """
+
+    CACHE_SECONDS_PROPERTY = "connectorResponseCacheSeconds"
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, script_engine: Any) -> None:
+        """__init__."""
+        self.script_engine = script_engine
+        self.dispatched_calls: dict[UUID, DispatchedConnectorCall] = {}
+        self.current_task: Optional[SpiffTask] = None
+
+    @classmethod
+    def is_concurrent(cls) -> bool:
+        """Is_concurrent."""
+        return bool(current_app.config["SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"])
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """Executor."""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=current_app.config[
+                        "SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"
+                    ],
+                    thread_name_prefix="service-task",
                 )
+            return cls._executor
+
+    @classmethod
+    def cache_seconds_for(cls, task: Optional[SpiffTask]) -> float:
+        """Cache_seconds_for."""
+        if task is None:
+            return 0
+        properties = getattr(task.task_spec, "extensions", {}).get("properties", {})
+        try:
+            return float(properties.get(cls.CACHE_SECONDS_PROPERTY, 0))
+        except ValueError:
+            return 0
+
+    def has_dispatched(self, task: SpiffTask) -> bool:
+        """Has_dispatched."""
+        return task.id in self.dispatched_calls
+
+    def will_run_task(
+        self, task: SpiffTask, bpmn_process_instance: BpmnWorkflow
+    ) -> None:
+        """Dispatches the ready service tasks if the engine is about to run one that was not dispatched."""
+        self.current_task = task
+        if (
+            task.task_spec.spec_type != "Service Task"
+            or self.has_dispatched(task)
+            or not self.is_concurrent()
+        ):
+            return
+
+        service_tasks = [
+            ready_task
+            for ready_task in bpmn_process_instance.get_tasks(TaskState.READY)
+            if ready_task.task_spec.spec_type == "Service Task"
+            and not self.has_dispatched(ready_task)
+            and ConnectorProxyClient.is_idempotent_command(
+                ready_task.task_spec.operation_name
+            )
+        ]
+        # the task about to run gains nothing from being sent on another thread unless others go with it
+        if all(service_task.id == task.id for service_task in service_tasks):
+            return
+        for service_task in service_tasks:
+            self.dispatch(service_task)
+
+    def dispatch(self, task: SpiffTask) -> None:
+        """Sends the connector request of the service task on the thread pool unless its response is cached."""
+        try:
+            bpmn_params = {
+                key: {
+                    **param,
+                    "value": self.script_engine.evaluate(task, param["value"]),
+                }
+                for key, param in task.task_spec.operation_params.items()
+            }
+        except Exception:
+            # leave it to the engine so the error is raised from the task when it runs
+            return
+
+        name = task.task_spec.operation_name
+        params = ServiceTaskDelegate.connector_params(bpmn_params, task.data)
+        cache_seconds = self.cache_seconds_for(task)
+        if cache_seconds > 0:
+            cache_key = ConnectorResponseCache.cache_key(name, params)
+            if ConnectorResponseCache.get(cache_key) is not None:
+                return
 
-            if "refreshed_token_set" not in parsed_response:
-                return response_text
+        future = self.executor().submit(
+            _send_to_connector_with_app_context,
+            current_app._get_current_object(),  # type: ignore
+            name,
+            params,
+        )
+        self.dispatched_calls[task.id] = DispatchedConnectorCall(
+            name, bpmn_params, params, cache_seconds, future
+        )
+
+    def call_connector(self, name: str, bpmn_params: Any, task_data: Any) -> str:
+        """Returns the response to the request dispatched for the running task or calls the connector."""
+        dispatched_call = None
+        if self.current_task is not None:
+            dispatched_call = self.dispatched_calls.pop(self.current_task.id, None)
+        if (
+            dispatched_call is None
+            or dispatched_call.name != name
+            or dispatched_call.bpmn_params != bpmn_params
+        ):
+            return ServiceTaskDelegate.call_connector(
+                name,
+                bpmn_params,
+                task_data,
+                cache_seconds=self.cache_seconds_for(self.current_task),
+            )
 
-            secret_key = parsed_response["auth"]
-            refreshed_token_set = json.dumps(parsed_response["refreshed_token_set"])
-            user_id = g.user.id if UserService.has_user() else None
-            SecretService().update_secret(secret_key, refreshed_token_set, user_id)
-            return json.dumps(parsed_response["api_response"])
+        call_url = f"{connector_proxy_url()}/v1/do/{name}"
+        with sentry_sdk.start_span(op="call-connector", description=call_url):
+            proxied_response = dispatched_call.future.result()
+            response_text = ServiceTaskDelegate.handle_connector_response(
+                name, proxied_response
+            )
+            if dispatched_call.cache_seconds > 0:
+                ConnectorResponseCache.put(
+                    ConnectorResponseCache.cache_key(name, dispatched_call.params),
+                    proxied_response,
+                    response_text,
+                    dispatched_call.cache_seconds,
+                )
+            return response_text
 
 
 class ServiceTaskService:
     """ServiceTaskService."""
 
+    @staticmethod
+    def connector_proxy_listing(path: str, command: str) -> Optional[Any]:
+        """Returns a listing from the connector proxy or None if it did not return one.
+
+        Listings are cached for SPIFFWORKFLOW_BACKEND_CONNECTOR_LIST_CACHE_SECONDS since the editor asks
+        for them every time it loads.
+        """
+        cache_seconds = current_app.config[
+            "SPIFFWORKFLOW_BACKEND_CONNECTOR_LIST_CACHE_SECONDS"
+        ]
+        cache_key = (command, "")
+        if cache_seconds > 0:
+            cached_response_text = ConnectorResponseCache.get(cache_key)
+            if cached_response_text is not None:
+                return json.loads(cached_response_text)
+
+        response = ConnectorProxyClient.request(
+            "GET", path, command=command, idempotent=True
+        )
+        if response.status_code != 200:
+            return None
+
+        parsed_response = json.loads(response.text)
+        ConnectorResponseCache.put(cache_key, response, response.text, cache_seconds)
+        return parsed_response
+
     @staticmethod
     def available_connectors() -> Any:
         """Returns a list of available connectors."""
         try:
-            response = requests.get(f"{connector_proxy_url()}/v1/commands")
-
-            if response.status_code != 200:
+            parsed_response = ServiceTaskService.connector_proxy_listing(
+                "/v1/commands", "v1/commands"
+            )
+            if parsed_response is None:
                 return []
-
-            parsed_response = json.loads(response.text)
             return parsed_response
         except Exception as e:
             current_app.logger.error(e)
@@ -162,12 +510,11 @@ class ServiceTaskService:
     def authentication_list() -> Any:
         """Returns a list of available authentications."""
         try:
-            response = requests.get(f"{connector_proxy_url()}/v1/auths")
-
-            if response.status_code != 200:
+            parsed_response = ServiceTaskService.connector_proxy_listing(
+                "/v1/auths", "v1/auths"
+            )
+            if parsed_response is None:
                 return []
-
-            parsed_response = json.loads(response.text)
             return parsed_response
         except Exception as exception:
             raise ConnectorProxyError(exception.__class__.__name__) from exception
@@ -0,0 +1,58 @@
+"""Stub_connector_proxy."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+
+
+class StubConnectorProxy:
+    """Answers each command with the next of its queued (status_code, body, delay_in_seconds)."""
+
+    def __init__(self) -> None:
+        """__init__."""
+        self.responses: dict[str, list[tuple[int, Any, float]]] = {}
+        self.requests: list[tuple[str, int]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:  # noqa: N802
+                self.respond()
+
+            def do_POST(self) -> None:  # noqa: N802
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.respond()
+
+            def respond(self) -> None:
+                stub.requests.append((self.path, self.client_address[1]))
+                queued_responses = stub.responses.get(self.path, [])
+                status_code, body, delay_in_seconds = (200, {}, 0.0)
+                if queued_responses:
+                    status_code, body, delay_in_seconds = queued_responses.pop(0)
+                time.sleep(delay_in_seconds)
+                response_body = json.dumps(body).encode()
+                self.send_response(status_code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            def log_message(self, *_args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def requests_for(self, path: str) -> int:
+        """Requests_for."""
+        return len([request for request in self.requests if request[0] == path])
+
+    def stop(self) -> None:
+        """Stop."""
+        self.server.shutdown()
+        self.server.server_close()
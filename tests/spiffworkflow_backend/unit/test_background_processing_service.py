@@ -0,0 +1,63 @@
+"""Test_background_processing_service."""
+import time
+
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.models.user import UserModel
+from spiffworkflow_backend.services.background_processing_service import (
+    BackgroundProcessingService,
+)
+from spiffworkflow_backend.services.process_instance_service import (
+    WaitingProcessInstanceCounts,
+)
+
+
+class TestBackgroundProcessingService(BaseTest):
+    """TestBackgroundProcessingService."""
+
+    def test_runs_waiting_process_instances_on_workers(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_runs_waiting_process_instances_on_workers."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        process_instance_ids = []
+        for _ in range(3):
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            process_instance.status = ProcessInstanceStatus.waiting.value
+            process_instance.next_run_at_in_seconds = round(time.time())
+            db.session.add(process_instance)
+            db.session.commit()
+            process_instance_ids.append(process_instance.id)
+
+        app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS"] = 2
+        try:
+            counts = BackgroundProcessingService(
+                app
+            ).process_waiting_process_instances_with_workers()
+            BackgroundProcessingService.shutdown_waiting_process_instance_workers()
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_BACKGROUND_PROCESSOR_WORKERS"] = 0
+        assert counts == WaitingProcessInstanceCounts(claimed=3, skipped=0, errors=0)
+
+        db.session.expire_all()
+        process_instances = ProcessInstanceModel.query.filter(
+            ProcessInstanceModel.id.in_(process_instance_ids)  # type: ignore
+        ).all()
+        assert [
+            (process_instance.status, process_instance.locked_by)
+            for process_instance in process_instances
+        ] == [(ProcessInstanceStatus.complete.value, None)] * 3
@@ -0,0 +1,133 @@
+"""Test_background_worker_service."""
+import threading
+import time
+
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.models.user import UserModel
+from spiffworkflow_backend.services.background_processing_service import (
+    BackgroundProcessingService,
+)
+from spiffworkflow_backend.services.background_worker_service import (
+    BackgroundWorkerService,
+)
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessor,
+)
+
+
+class TestBackgroundWorkerService(BaseTest):
+    """TestBackgroundWorkerService."""
+
+    def test_renews_and_releases_the_locks_of_this_process_only(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_renews_and_releases_the_locks_of_this_process_only."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        # the second lock is one this process took but nothing is running the process instance under
+        locked_by_values = [
+            ProcessInstanceProcessor.lock_owner("Background"),
+            ProcessInstanceProcessor.lock_owner("Background"),
+            "Background_SomethingElse",
+        ]
+        process_instance_ids = []
+        for locked_by in locked_by_values:
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            process_instance.locked_by = locked_by
+            process_instance.locked_at_in_seconds = 1
+            db.session.add(process_instance)
+            db.session.commit()
+            process_instance_ids.append(process_instance.id)
+        ProcessInstanceProcessor.hold_lock(process_instance_ids[0], locked_by_values[0])
+
+        assert (
+            ProcessInstanceProcessor.renew_locks_held_by_this_process(
+                BackgroundProcessingService.LOCK_PREFIXES
+            )
+            == 1
+        )
+        db.session.expire_all()
+        mine, leaked, other = [
+            ProcessInstanceModel.query.filter_by(id=process_instance_id).first()
+            for process_instance_id in process_instance_ids
+        ]
+        assert mine.locked_at_in_seconds >= round(time.time()) - 1
+        assert leaked.locked_at_in_seconds == 1
+        assert other.locked_at_in_seconds == 1
+
+        assert (
+            ProcessInstanceProcessor.release_locks_held_by_this_process(
+                BackgroundProcessingService.LOCK_PREFIXES
+            )
+            == 2
+        )
+        db.session.expire_all()
+        assert mine.locked_by is None
+        assert leaked.locked_by is None
+        assert other.locked_by == "Background_SomethingElse"
+        assert (
+            ProcessInstanceProcessor.renew_locks_held_by_this_process(
+                BackgroundProcessingService.LOCK_PREFIXES
+            )
+            == 0
+        )
+
+    def test_runs_waiting_process_instances_until_stopped(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_runs_waiting_process_instances_until_stopped."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        process_instance.status = ProcessInstanceStatus.waiting.value
+        process_instance.next_run_at_in_seconds = round(time.time())
+        db.session.add(process_instance)
+        db.session.commit()
+        assert (
+            BackgroundProcessingService.queue_metrics()["due_waiting_process_instances"]
+            == 1
+        )
+
+        background_worker_service = BackgroundWorkerService(app)
+        worker_thread = threading.Thread(target=background_worker_service.run)
+        worker_thread.start()
+        try:
+            for _ in range(50):
+                db.session.expire_all()
+                if process_instance.status == ProcessInstanceStatus.complete.value:
+                    break
+                time.sleep(0.1)
+        finally:
+            background_worker_service.stop()
+            worker_thread.join(timeout=10)
+
+        assert not worker_thread.is_alive()
+        db.session.expire_all()
+        assert process_instance.status == ProcessInstanceStatus.complete.value
+        assert process_instance.locked_by is None
+        assert (
+            BackgroundProcessingService.queue_metrics()["due_waiting_process_instances"]
+            == 0
+        )
@@ -0,0 +1,101 @@
+"""Test_connector_proxy_client."""
+import json
+import time
+
+import pytest
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.stub_connector_proxy import (
+    StubConnectorProxy,
+)
+
+from spiffworkflow_backend.services.connector_proxy_client import ConnectorProxyClient
+from spiffworkflow_backend.services.service_task_service import ConnectorProxyError
+from spiffworkflow_backend.services.service_task_service import ServiceTaskDelegate
+from spiffworkflow_backend.services.service_task_service import ServiceTaskService
+
+
+class TestConnectorProxyClient(BaseTest):
+    """TestConnectorProxyClient."""
+
+    def test_reuses_connections_and_records_latency(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_reuses_connections_and_records_latency."""
+        stub_connector_proxy.responses["/v1/do/http/GetRequest"] = [
+            (200, {"hey": "one"}, 0.0),
+            (200, {"hey": "two"}, 0.0),
+        ]
+        assert ServiceTaskDelegate.call_connector("http/GetRequest", {}, {}) == (
+            json.dumps({"hey": "one"})
+        )
+        assert ServiceTaskDelegate.call_connector("http/GetRequest", {}, {}) == (
+            json.dumps({"hey": "two"})
+        )
+
+        client_ports = {port for _path, port in stub_connector_proxy.requests}
+        assert len(client_ports) == 1
+        assert ConnectorProxyClient.latency_stats()["http/GetRequest"]["count"] == 2
+
+    def test_retries_idempotent_commands_only(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_retries_idempotent_commands_only."""
+        stub_connector_proxy.responses["/v1/do/http/GetRequest"] = [
+            (503, {}, 0.0),
+            (200, {"ok": True}, 0.0),
+        ]
+        assert ServiceTaskDelegate.call_connector("http/GetRequest", {}, {}) == (
+            json.dumps({"ok": True})
+        )
+        assert stub_connector_proxy.requests_for("/v1/do/http/GetRequest") == 2
+
+        stub_connector_proxy.responses["/v1/do/http/PostRequest"] = [
+            (503, {}, 0.0),
+            (200, {"ok": True}, 0.0),
+        ]
+        with pytest.raises(ConnectorProxyError):
+            ServiceTaskDelegate.call_connector("http/PostRequest", {}, {})
+        assert stub_connector_proxy.requests_for("/v1/do/http/PostRequest") == 1
+
+        stub_connector_proxy.responses["/v1/commands"] = [
+            (503, {}, 0.0),
+            (200, [{"id": "http/GetRequest"}], 0.0),
+        ]
+        assert ServiceTaskService.available_connectors() == [{"id": "http/GetRequest"}]
+
+    def test_times_out_and_opens_the_circuit_of_a_failing_command(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_times_out_and_opens_the_circuit_of_a_failing_command."""
+        app.config[
+            "SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_CIRCUIT_BREAKER_FAILURE_THRESHOLD"
+        ] = 2
+        stub_connector_proxy.responses["/v1/do/slow/Command"] = [
+            (200, {}, 2.0),
+            (200, {}, 2.0),
+        ]
+
+        for _ in range(2):
+            start = time.time()
+            with pytest.raises(ConnectorProxyError) as exception:
+                ServiceTaskDelegate.call_connector("slow/Command", {}, {})
+            assert "ReadTimeout" in str(exception.value)
+            assert time.time() - start < 1.5
+
+        with pytest.raises(ConnectorProxyError) as exception:
+            ServiceTaskDelegate.call_connector("slow/Command", {}, {})
+        assert "failed 2 times in a row" in str(exception.value)
+        assert stub_connector_proxy.requests_for("/v1/do/slow/Command") == 2
+
+        # other commands still go through
+        assert ServiceTaskDelegate.call_connector("http/GetRequest", {}, {}) == "{}"
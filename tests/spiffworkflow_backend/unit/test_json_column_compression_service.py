@@ -0,0 +1,85 @@
+"""Test_json_column_compression_service."""
+import pytest
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
+
+from spiffworkflow_backend.helpers.json_codec import JsonCodec
+from spiffworkflow_backend.helpers.json_codec import JsonCodecError
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.user import UserModel
+from spiffworkflow_backend.services.json_column_compression_service import (
+    JsonColumnCompressionService,
+)
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessor,
+)
+
+
+class TestJsonColumnCompressionService(BaseTest):
+    """TestJsonColumnCompressionService."""
+
+    def test_json_codec_round_trips_and_reads_legacy_json(
+        self,
+        app: Flask,
+    ) -> None:
+        """Test_json_codec_round_trips_and_reads_legacy_json."""
+        value = {"tasks": {"one": {"data": {"key": "value" * 100}}}}
+        for codec_name in ["none", "zlib", JsonCodec.LEGACY_CODEC_NAME]:
+            data = JsonCodec.encode(value, codec_name)
+            assert JsonCodec.codec_name_of(data) == codec_name
+            assert JsonCodec.decode(data) == value
+
+        assert len(JsonCodec.encode(value, "zlib")) < len(
+            JsonCodec.encode(value, "none")
+        )
+        assert JsonCodec.decode(b'{"legacy": true}') == {"legacy": True}
+        with pytest.raises(JsonCodecError):
+            JsonCodec.encode(value, "not_a_codec")
+        JsonCodec.check_codec(app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"])
+        with pytest.raises(JsonCodecError):
+            JsonCodec.check_codec("not_a_codec")
+
+    def test_recompresses_existing_rows(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_recompresses_existing_rows."""
+        original_codec_name = app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"]
+        app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"] = "none"
+        try:
+            process_model = load_test_spec(
+                process_model_id="test_group/simple_script",
+                bpmn_file_name="simple_script.bpmn",
+                process_model_source_directory="simple_script",
+            )
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True)
+            bpmn_json = process_instance.bpmn_json
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_JSON_COLUMN_CODEC"] = original_codec_name
+
+        (
+            bpmn_json_stats,
+            task_json_stats,
+        ) = JsonColumnCompressionService.recompress_all("zlib")
+        assert bpmn_json_stats.rows_recompressed == 1
+        assert bpmn_json_stats.compression_ratio > 1
+        assert task_json_stats.rows_recompressed > 0
+        assert task_json_stats.compression_ratio > 1
+
+        (bpmn_json_stats, _) = JsonColumnCompressionService.recompress_all("zlib")
+        assert bpmn_json_stats.rows_seen == 1
+        assert bpmn_json_stats.rows_recompressed == 0
+
+        db.session.expire_all()
+        process_instance = ProcessInstanceModel.query.filter_by(
+            id=process_instance.id
+        ).first()
+        assert process_instance.bpmn_json == bpmn_json
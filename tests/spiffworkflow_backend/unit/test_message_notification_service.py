@@ -0,0 +1,65 @@
+"""Test_message_notification_service."""
+import time
+
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.message_notification import (
+    MessageNotificationModel,
+)
+from spiffworkflow_backend.services.message_notification_service import (
+    DatabaseMessageNotificationQueue,
+)
+from spiffworkflow_backend.services.message_notification_service import (
+    InMemoryMessageNotificationQueue,
+)
+from spiffworkflow_backend.services.message_notification_service import (
+    MessageNotificationService,
+)
+
+
+class TestMessageNotificationService(BaseTest):
+    """TestMessageNotificationService."""
+
+    def test_database_queue_hands_out_each_notification_once(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_database_queue_hands_out_each_notification_once."""
+        queue = DatabaseMessageNotificationQueue()
+        queue.publish([3, 1, 2])
+
+        assert queue.take(2) == [3, 1]
+        assert queue.take(2) == [2]
+        assert queue.take(2) == []
+        assert MessageNotificationModel.query.count() == 0
+
+        queue.publish([4])
+        notification = MessageNotificationModel.query.first()
+        notification.created_at_in_seconds = round(time.time()) - 60
+        db.session.add(notification)
+        db.session.commit()
+        queue.publish([5])
+        assert queue.discard_older_than(round(time.time()) - 30) == 1
+        assert queue.take(10) == [5]
+
+    def test_notify_wakes_up_the_background_processor_of_this_process(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_notify_wakes_up_the_background_processor_of_this_process."""
+        MessageNotificationService.set_queue(InMemoryMessageNotificationQueue())
+        try:
+            MessageNotificationService.wait_for_notification(0)
+            assert MessageNotificationService.wait_for_notification(0) is False
+
+            MessageNotificationService.notify([7])
+            assert MessageNotificationService.wait_for_notification(0) is True
+            assert MessageNotificationService.take_notified_message_instance_ids(
+                10
+            ) == [7]
+        finally:
+            MessageNotificationService.set_queue(None)
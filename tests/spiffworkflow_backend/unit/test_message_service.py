@@ -7,9 +7,18 @@ from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
 
 from spiffworkflow_backend.exceptions.api_error import ApiError
 from spiffworkflow_backend.models.message_instance import MessageInstanceModel
+from spiffworkflow_backend.models.message_instance_correlation import (
+    MessageInstanceCorrelationValueModel,
+)
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.user import UserModel
 from spiffworkflow_backend.routes.messages_controller import message_send
+from spiffworkflow_backend.services.message_notification_service import (
+    InMemoryMessageNotificationQueue,
+)
+from spiffworkflow_backend.services.message_notification_service import (
+    MessageNotificationService,
+)
 from spiffworkflow_backend.services.message_service import MessageService
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
@@ -226,6 +235,64 @@ class TestMessageService(BaseTest):
         assert po_curr is not None
         assert customer_curr is not None
 
+        # and the values a send message has to match are stored for the join
+        assert {
+            (correlation_value.name, correlation_value.value_hash)
+            for correlation_value in message.correlation_values
+        } == {
+            ("po_number", MessageInstanceCorrelationValueModel.hash_value(1001)),
+            (
+                "customer_id",
+                MessageInstanceCorrelationValueModel.hash_value("Sartography"),
+            ),
+        }
+
+    def test_single_conversation_between_two_processes_through_notifications(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_single_conversation_between_two_processes_through_notifications."""
+        self.payload = {
+            "customer_id": "Sartography",
+            "po_number": 1001,
+            "description": "We built a new feature for messages!",
+            "amount": "100.00",
+        }
+        load_test_spec(
+            "test_group/message_receive",
+            process_model_source_directory="message_send_one_conversation",
+            bpmn_file_name="message_receiver.bpmn",
+        )
+
+        MessageNotificationService.set_queue(InMemoryMessageNotificationQueue())
+        try:
+            self.start_sender_process(
+                client, with_super_admin_user, "test_between_processes"
+            )
+            self.assure_a_message_was_sent()
+
+            # the send message starts the receiver, which answers with a send message of its own
+            MessageService.correlate_notified_message_instances(
+                MessageNotificationService.take_notified_message_instance_ids(100)
+            )
+            self.assure_there_is_a_process_waiting_on_a_message()
+            MessageService.correlate_notified_message_instances(
+                MessageNotificationService.take_notified_message_instance_ids(100)
+            )
+            assert (
+                MessageNotificationService.take_notified_message_instance_ids(100) == []
+            )
+        finally:
+            MessageNotificationService.set_queue(None)
+
+        assert self.process_instance.status == "complete"
+        assert (
+            MessageInstanceModel.query.filter_by(status="ready").count() == 0
+        ), "every message should have been correlated without a periodic run"
+
     def test_can_send_message_to_multiple_process_models(
         self,
         app: Flask,
@@ -0,0 +1,133 @@
+"""Test_parallel_service_task_dispatcher."""
+import time
+from typing import Optional
+
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.stub_connector_proxy import (
+    StubConnectorProxy,
+)
+from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
+
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.models.process_model import ProcessModelInfo
+from spiffworkflow_backend.models.user import UserModel
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessor,
+)
+from spiffworkflow_backend.services.process_model_service import ProcessModelService
+
+
+class TestParallelServiceTaskDispatcher(BaseTest):
+    """TestParallelServiceTaskDispatcher."""
+
+    def run_parallel_service_tasks(
+        self,
+        stub_connector_proxy: StubConnectorProxy,
+        user: UserModel,
+        process_model: Optional[ProcessModelInfo] = None,
+    ) -> tuple[ProcessInstanceProcessor, float]:
+        """Runs the model with each connector taking 0.3 seconds and returns how long that took."""
+        for command, number in [("One", 1), ("Two", 2), ("Three", 3)]:
+            stub_connector_proxy.responses[f"/v1/do/test/{command}"] = [
+                (200, {"number": number}, 0.3)
+            ]
+        if process_model is None:
+            process_model = load_test_spec(
+                process_model_id="test_group/parallel_service_tasks",
+                process_model_source_directory="parallel_service_tasks",
+            )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        start = time.time()
+        processor.do_engine_steps(save=True)
+        return (processor, time.time() - start)
+
+    def test_sends_connector_requests_of_parallel_branches_concurrently(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_sends_connector_requests_of_parallel_branches_concurrently."""
+        app.config["SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"] = 3
+        app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"] = [
+            "test/One",
+            "test/Two",
+            "test/Three",
+        ]
+        try:
+            processor, seconds = self.run_parallel_service_tasks(
+                stub_connector_proxy, with_super_admin_user
+            )
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"] = 0
+            app.config["SPIFFWORKFLOW_BACKEND_CONNECTOR_PROXY_IDEMPOTENT_COMMANDS"] = []
+
+        assert seconds < 0.8
+        assert processor.process_instance_model.status == (
+            ProcessInstanceStatus.complete.value
+        )
+        assert processor.get_data()["results"] == [1, 2, 3]
+        for command in ["One", "Two", "Three"]:
+            assert stub_connector_proxy.requests_for(f"/v1/do/test/{command}") == 1
+
+    def test_sends_connector_requests_one_by_one_by_default(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_sends_connector_requests_one_by_one_by_default."""
+        processor, seconds = self.run_parallel_service_tasks(
+            stub_connector_proxy, with_super_admin_user
+        )
+
+        assert seconds >= 0.9
+        assert processor.get_data()["results"] == [1, 2, 3]
+
+    def test_only_sends_requests_of_idempotent_commands_concurrently(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_only_sends_requests_of_idempotent_commands_concurrently."""
+        app.config["SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"] = 3
+        try:
+            processor, seconds = self.run_parallel_service_tasks(
+                stub_connector_proxy, with_super_admin_user
+            )
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_SERVICE_TASK_THREADS"] = 0
+
+        assert seconds >= 0.9
+        assert processor.get_data()["results"] == [1, 2, 3]
+
+    def test_reuses_responses_of_service_tasks_that_ask_for_it(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_reuses_responses_of_service_tasks_that_ask_for_it."""
+        processor, _seconds = self.run_parallel_service_tasks(
+            stub_connector_proxy, with_super_admin_user
+        )
+        processor, _seconds = self.run_parallel_service_tasks(
+            stub_connector_proxy,
+            with_super_admin_user,
+            ProcessModelService.get_process_model("test_group/parallel_service_tasks"),
+        )
+        assert processor.get_data()["results"] == [1, 2, 3]
+
+        # only Call One sets connectorResponseCacheSeconds
+        assert stub_connector_proxy.requests_for("/v1/do/test/One") == 1
+        assert stub_connector_proxy.requests_for("/v1/do/test/Two") == 2
+        assert stub_connector_proxy.requests_for("/v1/do/test/Three") == 2
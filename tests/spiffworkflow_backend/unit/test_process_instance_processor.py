@@ -1,19 +1,36 @@
 """Test_process_instance_processor."""
+import json
+import re
+import threading
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
 import pytest
 from flask import g
 from flask.app import Flask
 from flask.testing import FlaskClient
+from SpiffWorkflow.task import TaskState  # type: ignore
+from sqlalchemy import event
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
 from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
 
+from spiffworkflow_backend.models.db import db
 from spiffworkflow_backend.models.group import GroupModel
+from spiffworkflow_backend.models.human_task import HumanTaskModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
 from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
+from spiffworkflow_backend.models.serialized_bpmn_spec import SerializedBpmnSpecModel
+from spiffworkflow_backend.models.serialized_task import SerializedTaskModel
+from spiffworkflow_backend.models.spiff_step_details import SpiffStepDetailsModel
 from spiffworkflow_backend.models.user import UserModel
 from spiffworkflow_backend.services.authorization_service import AuthorizationService
 from spiffworkflow_backend.services.authorization_service import (
     UserDoesNotHaveAccessToTaskError,
 )
+from spiffworkflow_backend.services.process_instance_processor import (
+    NoPotentialOwnersForTaskError,
+)
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceIsAlreadyLockedError,
 )
@@ -23,9 +40,13 @@ from spiffworkflow_backend.services.process_instance_processor import (
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
 )
+from spiffworkflow_backend.services.process_instance_processor import (
+    ProcessInstanceProcessorError,
+)
 from spiffworkflow_backend.services.process_instance_service import (
     ProcessInstanceService,
 )
+from spiffworkflow_backend.services.spec_file_service import SpecFileService
 
 
 class TestProcessInstanceProcessor(BaseTest):
@@ -65,6 +86,114 @@ class TestProcessInstanceProcessor(BaseTest):
         app.config["THREAD_LOCAL_DATA"].process_model_identifier = None
         app.config["THREAD_LOCAL_DATA"].process_instance_id = None
 
+    def test_script_engine_only_carries_user_defined_script_changes(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_script_engine_only_carries_user_defined_script_changes."""
+        environment = ProcessInstanceProcessor._script_engine.environment
+        environment.clear_state()
+        environment.state["from_earlier_script"] = "kept"
+        context = {"a": 1, "items": [1, 2, 3], "to_delete": True}
+
+        environment.execute(
+            "\n".join(
+                [
+                    "def add_a(value):",
+                    "    return value + a",
+                    "b = sum([add_a(item) for item in items])",
+                    "del to_delete",
+                    "timestamp = datetime",
+                ]
+            ),
+            context,
+        )
+
+        expected = {"a": 1, "items": [1, 2, 3], "b": 9, "from_earlier_script": "kept"}
+        assert environment.state == expected
+        assert context == expected
+        assert environment.evaluate("[b + i for i in items if i > a]", {}) == [11, 12]
+        assert environment.evaluate("b", {"b": 0}) == 0
+
+        non_user_defined_keys = set(environment.non_user_defined_keys)
+        environment.execute(
+            "c = get_c()", {}, external_methods={"get_c": lambda: "from_method"}
+        )
+        assert environment.non_user_defined_keys == non_user_defined_keys
+        assert environment.state["c"] == "from_method"
+
+        # functions and modules are not stored with the workflow
+        environment.state["add_a"] = len
+        environment.state["time"] = json
+        bpmn_process_instance = SimpleNamespace(data={})
+        environment.preserve_state(bpmn_process_instance)
+        key = environment.PYTHON_ENVIRONMENT_STATE_KEY
+        assert bpmn_process_instance.data[key] == {**expected, "c": "from_method"}
+        environment.clear_state()
+
+    def test_script_engine_keeps_the_state_of_each_thread_apart(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_script_engine_keeps_the_state_of_each_thread_apart."""
+        environment = ProcessInstanceProcessor._script_engine.environment
+        environment.state = {"from_this_thread": 1}
+        states_seen_by_other_thread = []
+
+        def restore_other_state() -> None:
+            states_seen_by_other_thread.append(dict(environment.state))
+            environment.state = {"from_other_thread": 2}
+
+        thread = threading.Thread(target=restore_other_state)
+        thread.start()
+        thread.join()
+
+        assert states_seen_by_other_thread == [{}]
+        assert environment.state == {"from_this_thread": 1}
+        environment.clear_state()
+
+    def test_script_engine_reuses_augmented_methods_within_an_engine_run(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_script_engine_reuses_augmented_methods_within_an_engine_run."""
+        process_model = load_test_spec(
+            process_model_id="test_group/random_fact",
+            bpmn_file_name="random_fact.bpmn",
+            process_model_source_directory="random_fact",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        script_engine = ProcessInstanceProcessor._script_engine
+
+        cache_key = (
+            app.config["ENV_IDENTIFIER"],
+            process_instance.id,
+            process_model.id,
+        )
+        assert script_engine._evaluate("get_env()", {}) == app.config["ENV_IDENTIFIER"]
+        augmented_methods = script_engine._augmented_script_methods_cache.get(cache_key)
+        assert augmented_methods is not None
+
+        with patch.object(
+            AuthorizationService,
+            "user_has_permission",
+            wraps=AuthorizationService.user_has_permission,
+        ) as mock_user_has_permission:
+            for _ in range(3):
+                script_engine._evaluate("get_all_permissions()", {})
+            assert mock_user_has_permission.call_count == 1
+
+        processor.do_engine_steps(save=True)
+        assert script_engine._augmented_script_methods_cache.get(cache_key) is None
+
     def test_sets_permission_correctly_on_human_task(
         self,
         app: Flask,
@@ -377,3 +506,619 @@ class TestProcessInstanceProcessor(BaseTest):
         # we would actually expect this to change one day if we stop reusing the same guid
         # when we re-do a task.
         assert human_task_two.task_id == human_task_one.task_id
+
+    def test_get_spec_reuses_parsed_spec_until_files_change(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_get_spec_reuses_parsed_spec_until_files_change."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        spec_cache = ProcessInstanceProcessor.spec_cache()
+        spec_cache.clear()
+
+        (spec_one, _) = ProcessInstanceProcessor.get_process_model_and_subprocesses(
+            process_model.id
+        )
+        (spec_two, _) = ProcessInstanceProcessor.get_process_model_and_subprocesses(
+            process_model.id
+        )
+        assert spec_one is spec_two
+        assert spec_cache.hits == 1
+        assert spec_cache.misses == 1
+
+        bpmn_file_path = SpecFileService.full_file_path(
+            process_model, "simple_script.bpmn"
+        )
+        with open(bpmn_file_path, "ab") as f_handle:
+            f_handle.write(b"\n")
+
+        (spec_three, _) = ProcessInstanceProcessor.get_process_model_and_subprocesses(
+            process_model.id
+        )
+        assert spec_three is not spec_one
+        assert spec_cache.misses == 2
+
+    def test_read_only_processors_share_cached_workflow_until_instance_changes(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_read_only_processors_share_cached_workflow_until_instance_changes."""
+        original_max_bytes = app.config[
+            "SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES"
+        ]
+        app.config["SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES"] = 1024**2
+        ProcessInstanceProcessor._workflow_cache = None
+        try:
+            initiator_user = self.find_or_create_user("initiator_user")
+            process_model = load_test_spec(
+                process_model_id="test_group/model_with_lanes",
+                bpmn_file_name="lanes_with_owner_dict.bpmn",
+                process_model_source_directory="model_with_lanes",
+            )
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=initiator_user
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True)
+
+            read_only_one = ProcessInstanceProcessor(process_instance, read_only=True)
+            read_only_two = ProcessInstanceProcessor(process_instance, read_only=True)
+            assert (
+                read_only_one.bpmn_process_instance
+                is read_only_two.bpmn_process_instance
+            )
+            assert (
+                read_only_one.bpmn_process_instance
+                is not processor.bpmn_process_instance
+            )
+            with pytest.raises(ProcessInstanceProcessorError):
+                read_only_one.save()
+            with pytest.raises(ProcessInstanceProcessorError):
+                read_only_one.slam_in_data({"new_key": "new_value"})
+
+            # the script engine state of a read only processor is its own
+            environment = ProcessInstanceProcessor._script_engine.environment
+            environment.state["new_key"] = "new_value"
+            assert "new_key" not in read_only_two.bpmn_process_instance.data.get(
+                environment.PYTHON_ENVIRONMENT_STATE_KEY, {}
+            )
+
+            processor.slam_in_data({"new_key": "new_value"})
+            read_only_three = ProcessInstanceProcessor(process_instance, read_only=True)
+            assert (
+                read_only_three.bpmn_process_instance
+                is not read_only_one.bpmn_process_instance
+            )
+            assert read_only_three.get_data()["new_key"] == "new_value"
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_WORKFLOW_CACHE_MAX_BYTES"] = (
+                original_max_bytes
+            )
+            ProcessInstanceProcessor._workflow_cache = None
+
+    def test_normalized_specs_are_stored_once_and_merged_back_in(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_normalized_specs_are_stored_once_and_merged_back_in."""
+        app.config["SPIFFWORKFLOW_BACKEND_NORMALIZE_SERIALIZED_SPECS"] = True
+        try:
+            initiator_user = self.find_or_create_user("initiator_user")
+            process_model = load_test_spec(
+                process_model_id="test_group/model_with_lanes",
+                bpmn_file_name="lanes_with_owner_dict.bpmn",
+                process_model_source_directory="model_with_lanes",
+            )
+            process_instances = []
+            for _ in range(2):
+                process_instance = self.create_process_instance_from_process_model(
+                    process_model=process_model, user=initiator_user
+                )
+                processor = ProcessInstanceProcessor(process_instance)
+                processor.do_engine_steps(save=True)
+                process_instances.append(process_instance)
+
+            spec_hash = process_instances[0].serialized_bpmn_spec_hash
+            assert spec_hash is not None
+            assert process_instances[1].serialized_bpmn_spec_hash == spec_hash
+            assert SerializedBpmnSpecModel.query.count() == 1
+            assert "spec" not in json.loads(process_instances[0].bpmn_json)
+
+            ProcessInstanceProcessor.serialized_spec_cache().clear()
+            processor = ProcessInstanceProcessor(process_instances[0])
+            assert len(processor.get_ready_user_tasks()) == 1
+            assert "spec" in processor.bpmn_json_dict(process_instances[0])
+
+            # a spec is only cached once the row storing it is committed
+            serialized_spec_cache = ProcessInstanceProcessor.serialized_spec_cache()
+            ProcessInstanceProcessor.store_serialized_spec("rolled_back_hash", "{}")
+            db.session.rollback()
+            assert serialized_spec_cache.get("rolled_back_hash") is None
+            ProcessInstanceProcessor.store_serialized_spec("rolled_back_hash", "{}")
+            db.session.commit()
+            assert serialized_spec_cache.get("rolled_back_hash") == {}
+            assert (
+                SerializedBpmnSpecModel.query.filter_by(hash="rolled_back_hash").count()
+                == 1
+            )
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_NORMALIZE_SERIALIZED_SPECS"] = False
+
+    def test_tasks_persisted_individually_only_write_changed_tasks(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_tasks_persisted_individually_only_write_changed_tasks."""
+        app.config["SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY"] = True
+        try:
+            initiator_user = self.find_or_create_user("initiator_user")
+            process_model = load_test_spec(
+                process_model_id="test_group/model_with_lanes",
+                bpmn_file_name="lanes_with_owner_dict.bpmn",
+                process_model_source_directory="model_with_lanes",
+            )
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=initiator_user
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True)
+            assert "tasks" not in json.loads(process_instance.bpmn_json)
+
+            data_hashes_before = {
+                serialized_task.guid: serialized_task.data_hash
+                for serialized_task in SerializedTaskModel.query.filter_by(
+                    process_instance_id=process_instance.id
+                ).all()
+            }
+            assert len(data_hashes_before) > 0
+
+            processor = ProcessInstanceProcessor(process_instance)
+            human_task = process_instance.active_human_tasks[0]
+            spiff_task = processor.__class__.get_task_by_bpmn_identifier(
+                human_task.task_name, processor.bpmn_process_instance
+            )
+            processor.complete_task(spiff_task, human_task, initiator_user)
+
+            data_hashes_after = {
+                serialized_task.guid: serialized_task.data_hash
+                for serialized_task in SerializedTaskModel.query.filter_by(
+                    process_instance_id=process_instance.id
+                ).all()
+            }
+            guid = str(spiff_task.id)
+            assert data_hashes_after[guid] != data_hashes_before[guid]
+            unchanged_guids = [
+                guid
+                for guid, data_hash in data_hashes_after.items()
+                if data_hashes_before.get(guid) == data_hash
+            ]
+            assert len(unchanged_guids) > 0
+
+            reloaded_processor = ProcessInstanceProcessor(process_instance)
+            reloaded_task = processor.__class__.get_task_by_bpmn_identifier(
+                human_task.task_name, reloaded_processor.bpmn_process_instance
+            )
+            assert reloaded_task.get_state_name() == "COMPLETED"
+
+            # editing task data goes through the same path so its serialized_task row is updated too
+            assert reloaded_processor.update_task_data(guid, {"edited": True})
+            db.session.commit()
+            assert "tasks" not in json.loads(process_instance.bpmn_json)
+            serialized_task = SerializedTaskModel.query.filter_by(
+                process_instance_id=process_instance.id, guid=guid
+            ).first()
+            assert json.loads(serialized_task.task_json)["data"] == {"edited": True}
+            assert not reloaded_processor.update_task_data("not-a-task-id", {})
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_PERSIST_TASKS_INDIVIDUALLY"] = False
+
+    def test_step_details_stored_as_deltas_reconstruct_the_same_task_json(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_step_details_stored_as_deltas_reconstruct_the_same_task_json."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        step_details_by_keyframe_interval = {}
+        for keyframe_interval in [0, 3]:
+            app.config["SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL"] = (
+                keyframe_interval
+            )
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True)
+            step_details_by_keyframe_interval[keyframe_interval] = (
+                SpiffStepDetailsModel.query.filter_by(
+                    process_instance_id=process_instance.id
+                )
+                .order_by(SpiffStepDetailsModel.spiff_step)
+                .all()
+            )
+        app.config["SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL"] = 0
+
+        full_step_details = step_details_by_keyframe_interval[0]
+        delta_step_details = step_details_by_keyframe_interval[3]
+        assert len(full_step_details) == len(delta_step_details)
+        assert any(
+            step_detail.base_spiff_step is not None
+            for step_detail in delta_step_details
+        )
+        for full_step_detail, delta_step_detail in zip(
+            full_step_details, delta_step_details
+        ):
+            assert full_step_detail.base_spiff_step is None
+            assert (
+                ProcessInstanceProcessor.step_snapshot(delta_step_detail).task_json
+                == full_step_detail.task_json
+            )
+
+    def test_step_details_are_not_stored_as_deltas_against_rolled_back_steps(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_step_details_are_not_stored_as_deltas_against_rolled_back_steps."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        app.config["SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL"] = 3
+        try:
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True)
+
+            processor.increment_spiff_step()
+            rolled_back_spiff_step = process_instance.spiff_step
+            processor.spiff_step_details_mapping()
+            db.session.rollback()
+
+            processor.increment_spiff_step()
+            processor.increment_spiff_step()
+            processor.add_step()
+            step_detail = SpiffStepDetailsModel.query.filter_by(
+                process_instance_id=process_instance.id,
+                spiff_step=process_instance.spiff_step,
+            ).first()
+            assert step_detail.base_spiff_step != rolled_back_spiff_step
+            assert ProcessInstanceProcessor.step_snapshot(step_detail).task_json
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_STEP_DETAILS_KEYFRAME_INTERVAL"] = 0
+
+    def test_budgeted_engine_steps_leave_the_rest_to_the_background_processor(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_budgeted_engine_steps_leave_the_rest_to_the_background_processor."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        app.config["SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS"] = 1
+        try:
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True, budgeted=True)
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS"] = 0
+
+        assert processor.engine_steps_budget_exhausted
+        assert process_instance.status == ProcessInstanceStatus.waiting.value
+
+        ProcessInstanceService.do_waiting()
+        process_instance = ProcessInstanceModel.query.filter_by(
+            id=process_instance.id
+        ).first()
+        assert process_instance.status == ProcessInstanceStatus.complete.value
+
+    def test_budgeted_engine_steps_keep_ready_user_tasks_user_input_required(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_budgeted_engine_steps_keep_ready_user_tasks_user_input_required."""
+        process_model = load_test_spec(
+            process_model_id="test_group/parallel_manual_and_script_tasks",
+            bpmn_file_name="parallel_manual_and_script_tasks.bpmn",
+            process_model_source_directory="parallel_manual_and_script_tasks",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        app.config["SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS"] = 4
+        try:
+            processor = ProcessInstanceProcessor(process_instance)
+            processor.do_engine_steps(save=True, budgeted=True)
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_ENGINE_STEP_BUDGET_MAX_TASKS"] = 0
+
+        assert processor.engine_steps_budget_exhausted
+        assert len(processor.get_ready_user_tasks()) == 1
+        assert (
+            process_instance.status == ProcessInstanceStatus.user_input_required.value
+        )
+        assert process_instance.next_run_at_in_seconds is not None
+        human_task_ids = [
+            human_task.id for human_task in process_instance.active_human_tasks
+        ]
+
+        ProcessInstanceService.do_waiting()
+        process_instance = ProcessInstanceModel.query.filter_by(
+            id=process_instance.id
+        ).first()
+        assert (
+            process_instance.status == ProcessInstanceStatus.user_input_required.value
+        )
+        assert process_instance.next_run_at_in_seconds is None
+        assert [
+            human_task.id for human_task in process_instance.active_human_tasks
+        ] == human_task_ids
+        processor = ProcessInstanceProcessor(process_instance)
+        script_three = processor.get_task_by_spec_name("Activity_ScriptThree")
+        assert script_three is not None
+        assert script_three.get_state_name() == "COMPLETED"
+
+    def test_resolves_potential_owners_of_many_tasks_at_once(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_resolves_potential_owners_of_many_tasks_at_once."""
+        self.create_process_group(
+            client, with_super_admin_user, "test_group", "test_group"
+        )
+        initiator_user = self.find_or_create_user("initiator_user")
+        finance_user = self.find_or_create_user("testuser2")
+        AuthorizationService.import_permissions_from_yaml_file()
+        finance_group = GroupModel.query.filter_by(identifier="Finance Team").first()
+        assert finance_group is not None
+        hr_group = GroupModel.query.filter_by(identifier="hr").first()
+        assert hr_group is not None
+
+        process_model = load_test_spec(
+            process_model_id="test_group/model_with_parallel_lanes",
+            bpmn_file_name="parallel_lanes.bpmn",
+            process_model_source_directory="model_with_parallel_lanes",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=initiator_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=False)
+
+        statements: list[str] = []
+
+        def record_statement(
+            conn: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ) -> None:
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record_statement)
+        try:
+            with patch.object(
+                db.session, "commit", wraps=db.session.commit
+            ) as mock_commit:
+                processor.save()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record_statement)
+
+        def select_count(table_name: str) -> int:
+            from_table = re.compile(rf'FROM [`"]?{table_name}[`"]?(\s|$)')
+            return len(
+                [
+                    s
+                    for s in statements
+                    if s.lstrip().upper().startswith("SELECT") and from_table.search(s)
+                ]
+            )
+
+        # six human tasks in four lanes, resolved with one query per table and written in one commit
+        assert mock_commit.call_count == 1
+        assert select_count("user") == 1
+        assert select_count("group") == 1
+        assert select_count("user_group_assignment") == 1
+
+        human_tasks = HumanTaskModel.query.filter_by(
+            process_instance_id=process_instance.id
+        ).all()
+        potential_owners_by_task_name = {
+            human_task.task_name: (
+                sorted(u.user_id for u in human_task.human_task_users),
+                human_task.lane_assignment_id,
+            )
+            for human_task in human_tasks
+        }
+        finance_user_ids = sorted(
+            a.user_id for a in finance_group.user_group_assignments
+        )
+        hr_user_ids = sorted(a.user_id for a in hr_group.user_group_assignments)
+        reviewer_user_ids = sorted([initiator_user.id, finance_user.id])
+        assert potential_owners_by_task_name == {
+            "initiator_approval": ([initiator_user.id], None),
+            "finance_approval_one": (finance_user_ids, finance_group.id),
+            "finance_approval_two": (finance_user_ids, finance_group.id),
+            "hr_approval": (hr_user_ids, hr_group.id),
+            "reviewer_approval_one": (reviewer_user_ids, None),
+            "reviewer_approval_two": (reviewer_user_ids, None),
+        }
+
+        reviewer_task = processor.__class__.get_task_by_bpmn_identifier(
+            "reviewer_approval_one", processor.bpmn_process_instance
+        )
+        assert processor.get_potential_owner_ids_from_task(reviewer_task) == {
+            "potential_owner_ids": [initiator_user.id, finance_user.id],
+            "lane_assignment_id": None,
+        }
+
+    def test_save_leaves_nothing_behind_when_a_task_has_no_potential_owners(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_save_leaves_nothing_behind_when_a_task_has_no_potential_owners."""
+        self.create_process_group(
+            client, with_super_admin_user, "test_group", "test_group"
+        )
+        initiator_user = self.find_or_create_user("initiator_user")
+        AuthorizationService.import_permissions_from_yaml_file()
+        process_model = load_test_spec(
+            process_model_id="test_group/model_with_parallel_lanes",
+            bpmn_file_name="parallel_lanes.bpmn",
+            process_model_source_directory="model_with_parallel_lanes",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=initiator_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=False)
+        for ready_task in processor.get_ready_user_tasks():
+            ready_task.data["lane_owners"] = {"Reviewers": ["nobody"]}
+
+        with pytest.raises(NoPotentialOwnersForTaskError):
+            processor.save()
+        assert not db.session.new
+        assert not db.session.dirty
+        assert process_instance.status == ProcessInstanceStatus.not_started.value
+        assert (
+            HumanTaskModel.query.filter_by(
+                process_instance_id=process_instance.id
+            ).count()
+            == 0
+        )
+
+    def test_task_data_size_only_measures_tasks_that_changed_state(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_task_data_size_only_measures_tasks_that_changed_state."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=True)
+
+        tasks_with_data = ProcessInstanceProcessor.get_tasks_with_data(
+            processor.bpmn_process_instance
+        )
+        assert len(tasks_with_data) > 0
+        expected_size = sum(len(json.dumps(task.data)) for task in tasks_with_data)
+        assert processor.task_data_size == expected_size
+        assert process_instance.task_data_size == expected_size
+
+        processor = ProcessInstanceProcessor(process_instance)
+        task_id = str(tasks_with_data[0].id)
+        assert task_id in processor._task_data_sizes
+
+        # a size stored for the same state change is trusted instead of measuring the task again
+        processor._task_data_sizes[task_id][1] += 1000
+        assert processor.update_task_data_sizes() == expected_size + 1000
+
+        processor._task_data_sizes[task_id][0] = 0
+        assert processor.update_task_data_sizes() == expected_size
+
+    def test_task_lookups_match_walking_the_task_tree(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_task_lookups_match_walking_the_task_tree."""
+        process_model = load_test_spec(
+            process_model_id="test_group/user_task",
+            process_model_source_directory="user_task",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=True)
+
+        def assert_lookups_match() -> None:
+            workflow = processor.bpmn_process_instance
+            all_tasks = workflow.get_tasks(TaskState.ANY_MASK)
+            human_tasks = [
+                t for t in all_tasks if not workflow._is_engine_task(t.task_spec)
+            ]
+            assert processor.get_all_user_tasks() == human_tasks
+            assert processor.get_ready_user_tasks() == workflow.get_ready_user_tasks()
+            assert processor.get_all_ready_or_waiting_tasks() == [
+                t for t in all_tasks if t.state in [TaskState.WAITING, TaskState.READY]
+            ]
+            assert processor.get_all_completed_tasks() == [
+                t
+                for t in human_tasks
+                if t.state in [TaskState.COMPLETED, TaskState.CANCELLED]
+            ]
+            for task in all_tasks:
+                assert processor.get_task_by_spec_name(
+                    task.task_spec.name
+                ) == ProcessInstanceProcessor.get_task_by_bpmn_identifier(
+                    task.task_spec.name, workflow
+                )
+
+        assert_lookups_match()
+        assert len(processor.get_ready_user_tasks()) == 1
+
+        human_task = process_instance.active_human_tasks[0]
+        ProcessInstanceService.complete_form_task(
+            processor,
+            processor.get_ready_user_tasks()[0],
+            {"name": "Elizabeth"},
+            with_super_admin_user,
+            human_task,
+        )
+        assert_lookups_match()
+        assert len(processor.get_ready_user_tasks()) == 0
+        assert len(processor.get_all_completed_tasks()) == 1
+        assert process_instance.status == ProcessInstanceStatus.complete.value
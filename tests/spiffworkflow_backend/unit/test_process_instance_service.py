@@ -1,13 +1,24 @@
 """Test_process_instance_processor."""
+import time
+
 from flask.app import Flask
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
 from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
 
+from spiffworkflow_backend.models.db import db
+from spiffworkflow_backend.models.process_instance import ProcessInstanceModel
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
 from spiffworkflow_backend.models.spiff_logging import SpiffLoggingModel
 from spiffworkflow_backend.models.user import UserModel
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
 )
+from spiffworkflow_backend.services.process_instance_service import (
+    ProcessInstanceService,
+)
+from spiffworkflow_backend.services.process_instance_service import (
+    WaitingProcessInstanceCounts,
+)
 
 
 class TestProcessInstanceService(BaseTest):
@@ -44,3 +55,103 @@ class TestProcessInstanceService(BaseTest):
             process_instance_id=process_instance.id
         ).all()
         assert len(process_instance_logs) == initial_length
+
+    def test_complete_form_task_can_leave_the_engine_steps_for_the_background(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_complete_form_task_can_leave_the_engine_steps_for_the_background."""
+        process_model = load_test_spec(
+            process_model_id="test_group/user_task",
+            process_model_source_directory="user_task",
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model=process_model, user=with_super_admin_user
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=True)
+        human_task = process_instance.active_human_tasks[0]
+        spiff_task = processor.get_ready_user_tasks()[0]
+
+        ProcessInstanceService.complete_form_task(
+            processor,
+            spiff_task,
+            {"name": "Elizabeth"},
+            with_super_admin_user,
+            human_task,
+            continue_in_background=True,
+        )
+        assert human_task.completed
+        assert process_instance.status == ProcessInstanceStatus.waiting.value
+
+        ProcessInstanceService.run_waiting_process_instance(process_instance)
+        assert process_instance.status == ProcessInstanceStatus.complete.value
+        assert process_instance.locked_by is None
+
+    def test_do_waiting_locks_a_batch_of_waiting_instances_before_loading_them(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_do_waiting_locks_a_batch_of_waiting_instances_before_loading_them."""
+        process_model = load_test_spec(
+            process_model_id="test_group/simple_script",
+            bpmn_file_name="simple_script.bpmn",
+            process_model_source_directory="simple_script",
+        )
+        process_instance_ids = []
+        for _ in range(3):
+            process_instance = self.create_process_instance_from_process_model(
+                process_model=process_model, user=with_super_admin_user
+            )
+            process_instance.status = ProcessInstanceStatus.waiting.value
+            process_instance.next_run_at_in_seconds = round(time.time())
+            db.session.add(process_instance)
+            db.session.commit()
+            process_instance_ids.append(process_instance.id)
+        locked_elsewhere = ProcessInstanceModel.query.filter_by(
+            id=process_instance_ids[0]
+        ).first()
+        locked_elsewhere.locked_by = "SomethingElse"
+        locked_elsewhere.locked_at_in_seconds = round(time.time())
+        db.session.commit()
+
+        claimed_ids, skipped_count = (
+            ProcessInstanceService.claim_waiting_process_instances("Background", 1)
+        )
+        assert claimed_ids == [process_instance_ids[1]]
+        assert skipped_count == 1
+
+        # the instance claimed above is locked too so only the last one is left
+        assert ProcessInstanceService.do_waiting() == WaitingProcessInstanceCounts(
+            claimed=1, skipped=2, errors=0
+        )
+        process_instances = ProcessInstanceModel.query.filter(
+            ProcessInstanceModel.id.in_(process_instance_ids)  # type: ignore
+        ).order_by(ProcessInstanceModel.id)
+        assert [
+            (process_instance.status, process_instance.locked_by)
+            for process_instance in process_instances
+        ] == [
+            (ProcessInstanceStatus.waiting.value, "SomethingElse"),
+            (
+                ProcessInstanceStatus.waiting.value,
+                ProcessInstanceProcessor.lock_owner("Background"),
+            ),
+            (ProcessInstanceStatus.complete.value, None),
+        ]
+
+        # a claimed instance whose lock was confiscated before it got to run is left alone
+        confiscated = ProcessInstanceModel.query.filter_by(
+            id=process_instance_ids[1]
+        ).first()
+        confiscated.locked_by = "SomethingElse"
+        db.session.commit()
+        assert ProcessInstanceService.run_waiting_process_instance(
+            confiscated, "Background", lock_already_held=True
+        )
+        assert confiscated.status == ProcessInstanceStatus.waiting.value
+        assert confiscated.locked_by == "SomethingElse"
@@ -173,6 +173,54 @@ class TestProcessModel(BaseTest):
         assert process_instance_metadata_awesome_var is not None
         assert process_instance_metadata_awesome_var.value == "123"
 
+    def test_extract_metadata_only_writes_changed_metadata(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_extract_metadata_only_writes_changed_metadata."""
+        self.create_process_group(
+            client, with_super_admin_user, "test_group", "test_group"
+        )
+        process_model = load_test_spec(
+            "test_group/hello_world",
+            process_model_source_directory="nested-task-data-structure",
+        )
+        ProcessModelService.update_process_model(
+            process_model,
+            {
+                "metadata_extraction_paths": [
+                    {"key": "awesome_var", "path": "outer.inner"}
+                ]
+            },
+        )
+
+        process_instance = self.create_process_instance_from_process_model(
+            process_model
+        )
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=True)
+        assert process_instance.metadata_extraction_hash is not None
+
+        metadata = ProcessInstanceMetadataModel.query.filter_by(
+            process_instance_id=process_instance.id, key="awesome_var"
+        ).first()
+        metadata.value = "changed elsewhere"
+        db.session.add(metadata)
+        db.session.commit()
+
+        # the extracted value has not changed since the last save so it is not written again
+        processor.save()
+        db.session.refresh(metadata)
+        assert metadata.value == "changed elsewhere"
+
+        process_instance.metadata_extraction_hash = None
+        processor.save()
+        db.session.refresh(metadata)
+        assert metadata.value == "sweet2"
+
     def create_test_process_model(self, id: str, display_name: str) -> ProcessModelInfo:
         """Create_test_process_model."""
         return ProcessModelInfo(
@@ -0,0 +1,92 @@
+"""Test_script_task_executor_service."""
+from flask.app import Flask
+from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+
+from spiffworkflow_backend.services.script_task_executor_service import ScriptChanges
+from spiffworkflow_backend.services.script_task_executor_service import (
+    ScriptTaskExecutorService,
+)
+from spiffworkflow_backend.services.script_unit_test_runner import ScriptUnitTestRunner
+
+
+class TestScriptTaskExecutorService(BaseTest):
+    """TestScriptTaskExecutorService."""
+
+    def test_script_changes_only_include_user_defined_changes(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_script_changes_only_include_user_defined_changes."""
+        items = [1, 2]
+        original_namespace = {"items": items, "unchanged": 1, "gone": 2, "sum": sum}
+        namespace = {
+            "items": items,
+            "unchanged": 1,
+            "sum": 3,
+            "new_value": "hey",
+            "new_function": len,
+        }
+
+        script_changes = ScriptChanges.between(original_namespace, namespace, {"sum"})
+        assert script_changes.values == {"new_value": "hey"}
+        assert sorted(script_changes.dropped_keys) == ["new_function", "sum"]
+        assert script_changes.deleted_keys == ["gone"]
+
+        script_changes = ScriptChanges.between(
+            original_namespace, namespace, {"sum"}, ["items", "sum"]
+        )
+        assert script_changes.values == {"new_value": "hey", "items": [1, 2]}
+
+    def test_runs_scripts_in_script_task_processes(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+    ) -> None:
+        """Test_runs_scripts_in_script_task_processes."""
+        app.config["THREAD_LOCAL_DATA"].process_instance_id = None
+        app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES"] = 1
+        app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS"] = 2
+        try:
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    "items.append(3)\ntotal = sum(items)",
+                    {"items": [1, 2]},
+                    {"items": [1, 2, 3], "total": 6},
+                )
+            )
+            assert unit_test_result.result
+
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    "a = 1\nb = a / 0", {}, {}
+                )
+            )
+            assert unit_test_result.result is False
+            assert unit_test_result.error is not None
+            assert "ZeroDivisionError" in unit_test_result.error
+            assert unit_test_result.line_number == 2
+
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    "while True:\n    pass", {}, {}
+                )
+            )
+            assert unit_test_result.result is False
+            assert unit_test_result.error is not None
+            assert "ScriptTimeoutError" in unit_test_result.error
+
+            # a script cannot catch the timeout itself
+            script = "try:\n    while True:\n        pass\nexcept Exception:\n    pass"
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    script, {}, {}
+                )
+            )
+            assert unit_test_result.result is False
+            assert unit_test_result.error is not None
+            assert "ScriptTimeoutError" in unit_test_result.error
+        finally:
+            app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_PROCESSES"] = 0
+            app.config["SPIFFWORKFLOW_BACKEND_SCRIPT_TASK_TIMEOUT_SECONDS"] = 0
+            ScriptTaskExecutorService.shutdown()
@@ -4,6 +4,7 @@ from flask.testing import FlaskClient
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
 from tests.spiffworkflow_backend.helpers.test_data import load_test_spec
 
+from spiffworkflow_backend.helpers.compiled_code_cache import CompiledCodeCache
 from spiffworkflow_backend.models.user import UserModel
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
@@ -182,3 +183,39 @@ class TestScriptUnitTestRunner(BaseTest):
 
         assert unit_test_result.result
         assert unit_test_result.context == expected_output_context
+
+    def test_reuses_compiled_scripts_and_reports_syntax_errors(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_reuses_compiled_scripts_and_reports_syntax_errors."""
+        app.config["THREAD_LOCAL_DATA"].process_instance_id = None
+        CompiledCodeCache.cache().clear()
+
+        script = "b = a + 1"
+        for a in [1, 2]:
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    script, {"a": a}, {"a": a, "b": a + 1}
+                )
+            )
+            assert unit_test_result.result
+
+        stats = CompiledCodeCache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+
+        for _ in range(2):
+            unit_test_result = (
+                ScriptUnitTestRunner.run_with_script_and_pre_post_contexts(
+                    "a = 1\nb = (", {}, {}
+                )
+            )
+            assert unit_test_result.result is False
+            assert unit_test_result.error is not None
+            assert unit_test_result.error.startswith("Syntax error:")
+            assert unit_test_result.line_number == 2
+        assert len(CompiledCodeCache.cache()) == 1
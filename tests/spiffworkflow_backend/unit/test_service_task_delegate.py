@@ -1,13 +1,19 @@
 """Test_various_bpmn_constructs."""
+import json
+import time
 from unittest.mock import patch
 
 import pytest
 from flask.app import Flask
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
+from tests.spiffworkflow_backend.helpers.stub_connector_proxy import (
+    StubConnectorProxy,
+)
 
 from spiffworkflow_backend.services.secret_service import SecretService
 from spiffworkflow_backend.services.service_task_service import ConnectorProxyError
 from spiffworkflow_backend.services.service_task_service import ServiceTaskDelegate
+from spiffworkflow_backend.services.service_task_service import ServiceTaskService
 
 
 class TestServiceTaskDelegate(BaseTest):
@@ -39,7 +45,7 @@ class TestServiceTaskDelegate(BaseTest):
     def test_invalid_call_returns_good_error_message(
         self, app: Flask, with_db_and_bpmn_file_cleanup: None
     ) -> None:
-        with patch("requests.post") as mock_post:
+        with patch("requests.Session.request") as mock_post:
             mock_post.return_value.status_code = 404
             mock_post.return_value.ok = True
             mock_post.return_value.json.return_value = ""
@@ -51,3 +57,54 @@ class TestServiceTaskDelegate(BaseTest):
             "A critical component (The connector proxy) is not responding correctly."
             in str(ae)
         )
+
+    def test_caches_connector_responses_by_params(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_caches_connector_responses_by_params."""
+        stub_connector_proxy.responses["/v1/do/test/Lookup"] = [
+            (500, {}, 0.0),
+            (200, {"rate": 1}, 0.0),
+            (200, {"rate": 2}, 0.0),
+            (200, {"rate": 3}, 0.0),
+        ]
+        usd = {"currency": {"value": "USD"}}
+
+        # errors are not cached
+        with pytest.raises(ConnectorProxyError):
+            ServiceTaskDelegate.call_connector(
+                "test/Lookup", usd, {}, cache_seconds=0.5
+            )
+        assert ServiceTaskDelegate.call_connector(
+            "test/Lookup", usd, {"other": "task data"}, cache_seconds=0.5
+        ) == json.dumps({"rate": 1})
+        assert ServiceTaskDelegate.call_connector(
+            "test/Lookup", usd, {}, cache_seconds=0.5
+        ) == json.dumps({"rate": 1})
+        assert ServiceTaskDelegate.call_connector(
+            "test/Lookup", {"currency": {"value": "EUR"}}, {}, cache_seconds=0.5
+        ) == json.dumps({"rate": 2})
+        assert stub_connector_proxy.requests_for("/v1/do/test/Lookup") == 3
+
+        time.sleep(0.6)
+        assert ServiceTaskDelegate.call_connector(
+            "test/Lookup", usd, {}, cache_seconds=0.5
+        ) == json.dumps({"rate": 3})
+
+    def test_caches_connector_listings(
+        self,
+        app: Flask,
+        with_db_and_bpmn_file_cleanup: None,
+        stub_connector_proxy: StubConnectorProxy,
+    ) -> None:
+        """Test_caches_connector_listings."""
+        stub_connector_proxy.responses["/v1/auths"] = [
+            (200, [{"id": "oauth/Auth"}], 0.0),
+            (200, [], 0.0),
+        ]
+        for _ in range(3):
+            assert ServiceTaskService.authentication_list() == [{"id": "oauth/Auth"}]
+        assert stub_connector_proxy.requests_for("/v1/auths") == 1
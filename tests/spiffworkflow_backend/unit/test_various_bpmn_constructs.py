@@ -1,12 +1,21 @@
 """Test_various_bpmn_constructs."""
+import time
+
 from flask.app import Flask
 from flask.testing import FlaskClient
 from tests.spiffworkflow_backend.helpers.base_test import BaseTest
 
+from spiffworkflow_backend.models.process_instance import ProcessInstanceStatus
 from spiffworkflow_backend.models.user import UserModel
 from spiffworkflow_backend.services.process_instance_processor import (
     ProcessInstanceProcessor,
 )
+from spiffworkflow_backend.services.process_instance_service import (
+    ProcessInstanceService,
+)
+from spiffworkflow_backend.services.process_instance_service import (
+    WaitingProcessInstanceCounts,
+)
 from spiffworkflow_backend.services.process_model_service import ProcessModelService
 
 
@@ -37,3 +46,36 @@ class TestVariousBpmnConstructs(BaseTest):
         )
         processor = ProcessInstanceProcessor(process_instance)
         processor.do_engine_steps(save=True)
+
+    def test_waiting_timer_is_not_run_before_it_is_due(
+        self,
+        app: Flask,
+        client: FlaskClient,
+        with_db_and_bpmn_file_cleanup: None,
+        with_super_admin_user: UserModel,
+    ) -> None:
+        """Test_waiting_timer_is_not_run_before_it_is_due."""
+        process_model_identifier = self.create_group_and_model_with_bpmn(
+            client,
+            with_super_admin_user,
+            "test_group",
+            "timer_intermediate_catch_event",
+        )
+        process_model = ProcessModelService.get_process_model(
+            process_model_id=process_model_identifier
+        )
+        process_instance = self.create_process_instance_from_process_model(
+            process_model
+        )
+        start_in_seconds = round(time.time())
+        processor = ProcessInstanceProcessor(process_instance)
+        processor.do_engine_steps(save=True)
+
+        assert process_instance.status == ProcessInstanceStatus.waiting.value
+        assert process_instance.next_run_at_in_seconds is not None
+        assert (
+            start_in_seconds + 29
+            <= process_instance.next_run_at_in_seconds
+            <= round(time.time()) + 31
+        )
+        assert ProcessInstanceService.do_waiting() == WaitingProcessInstanceCounts()